@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Offline matching accuracy and latency benchmark on a labelled corpus
+
+Reports top-1 accuracy and per-item latency of calculate_match_score (choosing a search
+result) and find_matching_files (choosing a file inside a torrent), and exits non-zero
+when a result falls below the thresholds stored in the corpus.
+
+Usage: python benchmarks/bench_accuracy.py [--corpus PATH] [--backend NAME] [--repeat N] [--no-latency-check]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spotify_downloader.utils.matching import MatchingEngine
+from spotify_downloader.utils.similarity import BACKENDS, rapidfuzz_fuzz
+
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'tests', 'data', 'matching_corpus.json')
+
+
+def load_corpus(path=DEFAULT_CORPUS):
+    """Load a labelled corpus, filling in the file fields the torrent parsers produce"""
+    with open(path, encoding='utf-8') as f:
+        corpus = json.load(f)
+    for case in corpus['files']:
+        for index, file_info in enumerate(case['files']):
+            file_info['index'] = index
+            file_info['name'] = file_info['path'].rsplit('/', 1)[-1]
+    return corpus
+
+
+def best_candidate(engine, case):
+    """Index of the candidate calculate_match_score ranks first"""
+    track = case['track']
+    scores = [engine.calculate_match_score(candidate, track['artist'], track['name'], track['album'])
+              for candidate in case['candidates']]
+    return max(range(len(scores)), key=lambda i: scores[i])
+
+
+def best_file(engine, case):
+    """Path of the file find_matching_files ranks first, or None"""
+    matching = engine.find_track_files([dict(file_info) for file_info in case['files']], case['track'])
+    return matching[0]['path'] if matching else None
+
+
+def timed(func, repeat):
+    """Return the best wall time of func over repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def evaluate(engine, corpus, repeat=3):
+    """Score the corpus, returning accuracies, latencies and the cases that went wrong"""
+    candidate_cases, file_cases = corpus['candidates'], corpus['files']
+    failures = []
+    
+    correct = 0
+    for case in candidate_cases:
+        chosen = best_candidate(engine, case)
+        if chosen == case['correct']:
+            correct += 1
+        else:
+            failures.append(f"{case['track']['artist']} - {case['track']['name']}: "
+                            f"picked {case['candidates'][chosen]['title']!r}")
+    candidate_accuracy = correct / len(candidate_cases)
+    
+    correct = 0
+    for case in file_cases:
+        chosen = best_file(engine, case)
+        if chosen == case['correct']:
+            correct += 1
+        else:
+            failures.append(f"{case['track']['artist']} - {case['track']['name']}: picked file {chosen!r}")
+    file_accuracy = correct / len(file_cases)
+    
+    candidate_count = sum(len(case['candidates']) for case in candidate_cases)
+    file_count = sum(len(case['files']) for case in file_cases)
+    candidate_time = timed(lambda: [best_candidate(engine, case) for case in candidate_cases], repeat)
+    file_time = timed(lambda: [best_file(engine, case) for case in file_cases], repeat)
+    
+    return {
+        'candidate_accuracy': candidate_accuracy,
+        'file_accuracy': file_accuracy,
+        'candidate_latency_us': candidate_time / candidate_count * 1e6,
+        'file_latency_us': file_time / file_count * 1e6,
+        'failures': failures,
+    }
+
+
+def check_thresholds(report, thresholds, latency=True):
+    """Return a message for every metric that regressed past its threshold"""
+    problems = []
+    for metric in ('candidate_accuracy', 'file_accuracy'):
+        if report[metric] < thresholds[metric]:
+            problems.append(f"{metric} {report[metric]:.2%} is below {thresholds[metric]:.2%}")
+    if latency:
+        for metric in ('candidate_latency_us', 'file_latency_us'):
+            if report[metric] > thresholds[metric]:
+                problems.append(f"{metric} {report[metric]:.1f} us is above {thresholds[metric]:.1f} us")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--backend', choices=list(BACKENDS), action='append',
+                        help="Similarity backend to evaluate (repeatable, default: every installed one)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-latency-check', action='store_true',
+                        help="Only fail on accuracy regressions, e.g. on slow CI machines")
+    args = parser.parse_args()
+    
+    corpus = load_corpus(args.corpus)
+    backends = args.backend or [name for name in BACKENDS if name != 'rapidfuzz' or rapidfuzz_fuzz is not None]
+    print(f"Corpus: {len(corpus['candidates'])} search cases, {len(corpus['files'])} file-list cases")
+    
+    failed = False
+    for name in backends:
+        report = evaluate(MatchingEngine(backend=name), corpus, args.repeat)
+        print(f"[{name}]")
+        print(f"  candidate top-1 accuracy  {report['candidate_accuracy']:7.2%}"
+              f"   calculate_match_score {report['candidate_latency_us']:8.2f} us/candidate")
+        print(f"  file top-1 accuracy       {report['file_accuracy']:7.2%}"
+              f"   find_matching_files   {report['file_latency_us']:8.2f} us/file")
+        for failure in report['failures']:
+            print(f"  miss: {failure}")
+        for problem in check_thresholds(report, corpus['thresholds'], latency=not args.no_latency_check):
+            print(f"  REGRESSION: {problem}")
+            failed = True
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
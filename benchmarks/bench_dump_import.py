@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark importing RuTracker XML dumps into the search catalog, and check that time grows linearly
+
+Usage: python benchmarks/bench_dump_import.py [--topics N]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spotify_downloader.utils.catalog import SearchCatalog
+from spotify_downloader.utils.dump_import import import_dump
+
+# Per-topic time of the largest dump may exceed the smallest one's by this factor before failing
+MAX_SLOWDOWN = 1.5
+
+FORUMS = [('737', 'Рок, Панк, Альтернатива (lossless)'), ('1719', 'Зарубежный Рок (lossy)'),
+          ('2', 'Научно-популярные фильмы'), ('1', 'Электронные книги')]
+
+
+def write_dump(path, topic_count):
+    """Write a gzipped dump whose topics cycle through music and non-music forums"""
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<torrents>\n')
+        for i in range(topic_count):
+            forum_id, forum_name = FORUMS[i % len(FORUMS)]
+            title = f"Artist {i % 5003} - Album {i} ({1960 + i % 60}) [{'FLAC' if i % 3 else 'MP3'}]"
+            f.write(f'<torrent id="{i + 1}" registred_at="2020.01.01 00:00:00" size="{300000000 + i}">'
+                    f'<title>{escape(title)}</title><torrent hash="{i:040X}" tracker_id="1"/>'
+                    f'<forum id="{forum_id}">{escape(forum_name)}</forum>'
+                    f'<content>{"Tracklist " * 50}</content></torrent>\n')
+        f.write('</torrents>')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', type=int, default=100000, help="Topics in the largest dump")
+    args = parser.parse_args()
+    
+    sizes = [args.topics // 4, args.topics // 2, args.topics]
+    per_topic = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            dump = os.path.join(directory, f"dump-{size}.xml.gz")
+            write_dump(dump, size)
+            catalog = SearchCatalog(os.path.join(directory, f"catalog-{size}.sqlite"))
+            
+            start = time.perf_counter()
+            added = import_dump(dump, catalog)
+            elapsed = time.perf_counter() - start
+            catalog.close()
+            
+            per_topic.append(elapsed / size)
+            print(f"  {size:8d} topics  {added:8d} imported  {elapsed:7.2f} s  {elapsed / size * 1e6:6.1f} us/topic")
+    
+    slowdown = per_topic[-1] / per_topic[0]
+    print(f"Per-topic time grew {slowdown:.2f}x from {sizes[0]} to {sizes[-1]} topics (limit {MAX_SLOWDOWN}x)")
+    if slowdown > MAX_SLOWDOWN:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory and matching time of dict file lists against the array-backed FileTable
+
+Usage: python benchmarks/bench_file_table.py [--files N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spotify_downloader.utils.file_table import FileTable
+from spotify_downloader.utils.matching import MatchingEngine
+
+
+def make_entries(file_count):
+    """(path, length) pairs of a discography: 15 tracks plus artwork per album directory"""
+    entries = []
+    for i in range(file_count):
+        album = f"Artist - Discography/{1960 + i // 160} - Album {i // 16}"
+        name = 'folder.jpg' if i % 16 == 15 else f"{i % 16 + 1:02d} - Track {i}.flac"
+        entries.append((f"{album}/{name}", 30000000 + i))
+    return entries
+
+
+def build_dicts(entries):
+    """One dict per file, as analyze_torrent_contents returns"""
+    return [{'index': index, 'path': path, 'length': length, 'name': path.rsplit('/', 1)[-1]}
+            for index, (path, length) in enumerate(entries)]
+
+
+def measure(build):
+    """Return (retained bytes, peak bytes) of building a file list"""
+    tracemalloc.start()
+    result = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    # Paths are decoded from the .torrent as fresh strings, so both sides start from their own copies
+    entries = make_entries(args.files)
+    print(f"File list of {args.files} files")
+    for name, build in (('list of dicts', lambda: build_dicts([(p.encode().decode(), n) for p, n in entries])),
+                        ('FileTable', lambda: FileTable.from_entries((p.encode().decode(), n) for p, n in entries))):
+        retained, peak = measure(build)
+        print(f"  {name:16s} retained {retained / 1e6:8.2f} MB   peak {peak / 1e6:8.2f} MB")
+    
+    engine = MatchingEngine(backend='difflib')
+    dicts = build_dicts(entries)
+    table = FileTable.from_entries(entries)
+    track = {'name': f"Track {args.files // 2}", 'artist': 'Artist', 'album': f"Album {args.files // 32}"}
+    assert engine.find_track_files(dicts, track) == engine.find_track_files(table, track), "results must agree"
+    
+    print(f"find_track_files, best of {args.repeat} runs")
+    for name, files in (('list of dicts', dicts), ('FileTable', table)):
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            engine.find_track_files(files, track)
+            best = min(best, time.perf_counter() - start)
+        print(f"  {name:16s} {best * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
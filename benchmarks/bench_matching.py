@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-candidate scoring cost of the MatchingEngine
+
+Usage: python benchmarks/bench_matching.py [--candidates N] [--files N] [--tracks N] [--repeat N] [--workers N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spotify_downloader.utils.matching import MatchingEngine
+from spotify_downloader.utils.parallel import ScoringPool
+from spotify_downloader.utils.similarity import rapidfuzz_fuzz
+
+
+WORDS = ['the', 'beatles', 'queen', 'night', 'opera', 'live', 'greatest', 'hits', 'remastered',
+         'deluxe', 'edition', 'collection', 'discography', 'yesterday', 'help', 'love', 'rhapsody',
+         'bohemian', 'killers', 'best', 'of', 'anthology', 'box', 'set', 'vinyl', 'rip']
+TAGS = ['[FLAC]', '[MP3 320]', '(1975)', '(2011)', '[24bit]', 'CD', 'LP', '[WEB]']
+
+
+def legacy_match_score(result, target_artist, target_track, target_album):
+    """The original per-call scoring, kept as the baseline for comparison"""
+    def similarity(text1, text2):
+        if not text1 or not text2:
+            return 0.0
+        return SequenceMatcher(None, text1.lower().strip(), text2.lower().strip()).ratio()
+    
+    title = result['title'].lower()
+    artist_words = set(target_artist.lower().split())
+    track_words = set(target_track.lower().split())
+    title_words = set(title.split())
+    combined_score = (
+        similarity(target_artist.lower(), title) * 0.3 +
+        similarity(target_track.lower(), title) * 0.3 +
+        similarity(target_album.lower(), title) * 0.2 +
+        len(artist_words.intersection(title_words)) / max(len(artist_words), 1) * 0.1 +
+        len(track_words.intersection(title_words)) / max(len(track_words), 1) * 0.1
+    )
+    quality_bonus = 0.1 if result['quality'] == 'lossless' else 0
+    type_bonus = 0.05 if result['type'] == 'single' else 0
+    return combined_score + quality_bonus + type_bonus
+
+
+def make_candidates(count, seed=42):
+    """Generate reproducible RuTracker-like result titles"""
+    rng = random.Random(seed)
+    candidates = []
+    for _ in range(count):
+        words = rng.sample(WORDS, rng.randint(3, 9))
+        title = ' '.join(word.capitalize() for word in words) + ' ' + ' '.join(rng.sample(TAGS, 2))
+        candidates.append({
+            'title': title,
+            'quality': rng.choice(['lossless', 'lossy']),
+            'type': rng.choice(['single', 'album']),
+        })
+    return candidates
+
+
+def make_files(count, seed=42):
+    """Generate a reproducible discography-style torrent file list"""
+    rng = random.Random(seed)
+    files = []
+    for index in range(count):
+        album = index // 20
+        name = f"{index % 20 + 1:02d} - {' '.join(w.capitalize() for w in rng.sample(WORDS, 3))}.flac"
+        files.append({
+            'index': index,
+            'path': f"The Beatles - Discography/{1963 + album % 10} - Album {album}/{name}",
+            'length': 30000000,
+            'name': name
+        })
+    files.append({'index': count, 'path': 'The Beatles - Discography/1965 - Help!/13 - Yesterday.flac',
+                  'length': 30000000, 'name': '13 - Yesterday.flac'})
+    return files
+
+
+def time_per_candidate(func, candidates, repeat):
+    """Return the best average time per candidate in microseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best / len(candidates) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=500)
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--tracks', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=0, help="Also time scoring in a process pool")
+    args = parser.parse_args()
+    
+    engine = MatchingEngine(backend='difflib')
+    candidates = make_candidates(args.candidates)
+    artist, track, album = 'The Beatles', 'Yesterday', 'Help!'
+    target = engine.compile_target(artist, track, album)
+    
+    legacy = [legacy_match_score(c, artist, track, album) for c in candidates]
+    assert engine.score_many(candidates, target) == legacy, "score_many must match the original scores"
+    
+    timings = {
+        'legacy per-call scoring': lambda: [legacy_match_score(c, artist, track, album) for c in candidates],
+        'calculate_match_score': lambda: [engine.calculate_match_score(c, artist, track, album) for c in candidates],
+        'score_many (compiled target)': lambda: engine.score_many(candidates, target),
+    }
+    if rapidfuzz_fuzz is not None:
+        fast_engine = MatchingEngine(backend='rapidfuzz')
+        fast_target = fast_engine.compile_target(artist, track, album)
+        timings['score_many (rapidfuzz)'] = lambda: fast_engine.score_many(candidates, fast_target)
+    
+    print(f"Scoring {len(candidates)} candidates, best of {args.repeat} runs")
+    baseline = None
+    for name, func in timings.items():
+        cost = time_per_candidate(func, candidates, args.repeat)
+        baseline = baseline or cost
+        print(f"  {name:32s} {cost:8.2f} us/candidate  ({baseline / cost:.2f}x)")
+    
+    files = make_files(args.files)
+    unfiltered = MatchingEngine(backend='difflib')
+    unfiltered.PREFILTER_MIN_CANDIDATES = len(files) + 1
+    unfiltered.TREE_MIN_FILES = len(files) + 1
+    file_timings = {
+        'find_matching_files (no prefilter)': lambda: unfiltered.find_matching_files(files, track, artist),
+        'find_matching_files (token index)': lambda: engine.find_matching_files(files, track, artist),
+        'find_matching_files (directory tree)': lambda: engine.find_matching_files(files, track, artist, album),
+    }
+    
+    print(f"Matching against {len(files)} torrent files, best of {args.repeat} runs")
+    baseline = None
+    for name, func in file_timings.items():
+        cost = time_per_candidate(func, files, args.repeat)
+        baseline = baseline or cost
+        print(f"  {name:36s} {cost:8.2f} us/file  ({baseline / cost:.2f}x)")
+    
+    rng = random.Random(7)
+    targets = [engine.compile_target(' '.join(rng.sample(WORDS, 2)), ' '.join(rng.sample(WORDS, 2)),
+                                     ' '.join(rng.sample(WORDS, 3))) for _ in range(args.tracks)]
+    pairs = [None] * (len(targets) * len(candidates))
+    matrix_timings = {
+        'pairwise score_with_target': lambda: [engine.score_with_target(c, t) for t in targets for c in candidates],
+        'score_matrix (top 10 fuzzy)': lambda: engine.score_matrix(targets, candidates, top_k=10),
+    }
+    
+    print(f"Scoring {len(targets)} tracks x {len(candidates)} pooled candidates, best of {args.repeat} runs")
+    baseline = None
+    for name, func in matrix_timings.items():
+        cost = time_per_candidate(func, pairs, args.repeat)
+        baseline = baseline or cost
+        print(f"  {name:36s} {cost:8.2f} us/pair  ({baseline / cost:.2f}x)")
+    
+    if args.workers:
+        # The paths a run takes, with the default offload threshold: prefiltered batches stay inline
+        pool = ScoringPool(args.workers)
+        pooled = MatchingEngine(backend='difflib')
+        pooled.pool = pool
+        path_timings = [
+            ('score_candidates', candidates,
+             lambda: engine.score_candidates([dict(c) for c in candidates], target),
+             lambda: pooled.score_candidates([dict(c) for c in candidates], target)),
+            ('find_matching_files', files,
+             lambda: engine.find_matching_files(files, track, artist),
+             lambda: pooled.find_matching_files(files, track, artist)),
+        ]
+        
+        # Whole batches sent to the workers, as when a caller scores results without the prefilter
+        eager = ScoringPool(args.workers, chunk_size=max(len(candidates) // (args.workers * 4), 64), min_batch=0)
+        eager_engine = MatchingEngine(backend='difflib')
+        eager_engine.pool = eager
+        assert eager_engine.score_many(candidates, target) == engine.score_many(candidates, target)
+        path_timings += [
+            ('score_many (unfiltered)', candidates,
+             lambda: engine.score_many(candidates, target),
+             lambda: eager_engine.score_many(candidates, target)),
+            ('score_files (unfiltered)', files,
+             lambda: engine.score_files(files, track, artist),
+             lambda: eager.score_files(eager_engine, files, track, artist)),
+        ]
+        
+        print(f"Inline versus {args.workers} worker processes (min_batch {pool.min_batch}), best of {args.repeat} runs")
+        for name, batch, inline_func, pooled_func in path_timings:
+            inline_cost = time_per_candidate(inline_func, batch, args.repeat)
+            pooled_cost = time_per_candidate(pooled_func, batch, args.repeat)
+            print(f"  {name:28s} inline {inline_cost:8.2f}  pooled {pooled_cost:8.2f} us/item  "
+                  f"({inline_cost / pooled_cost:.2f}x)")
+        print(f"  pool started for run paths: {'yes' if pool._executor is not None else 'no'}")
+        pool.close()
+        eager.close()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark reading the file list and info-hash of a large .torrent
+
+Usage: python benchmarks/bench_torrent.py [--files N] [--pieces-mb N] [--repeat N]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+import bencodepy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spotify_downloader.utils.bencode import read_torrent
+
+
+def make_torrent(path, file_count, pieces_mb):
+    """Write a discography-sized torrent with pieces_mb MB of piece hashes"""
+    info = {
+        b'name': b'Artist - Discography',
+        b'piece length': 4194304,
+        b'pieces': os.urandom(20) * (pieces_mb * 1024 * 1024 // 20),
+        b'files': [{b'path': [f'Album {i // 15}'.encode(), f'{i % 15 + 1:02d} - Track {i}.flac'.encode()],
+                    b'length': 30000000 + i} for i in range(file_count)],
+    }
+    with open(path, 'wb') as f:
+        f.write(bencodepy.encode({b'announce': b'http://bt.example/ann', b'info': info}))
+
+
+def legacy_read(path):
+    """The previous approach: read and decode everything, then re-encode info for the hash"""
+    with open(path, 'rb') as f:
+        data = bencodepy.decode(f.read())
+    files = [('/'.join(p.decode() for p in entry[b'path']), entry[b'length']) for entry in data[b'info'][b'files']]
+    return files, hashlib.sha1(bencodepy.encode(data[b'info'])).hexdigest()
+
+
+def streaming_read(path):
+    """The mmap reader that skips piece hashes"""
+    torrent = read_torrent(path)
+    return [('/'.join(parts), length) for parts, length in torrent['files']], torrent['info_hash']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--pieces-mb', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'large.torrent')
+        make_torrent(path, args.files, args.pieces_mb)
+        assert legacy_read(path) == streaming_read(path), "both readers must agree"
+        
+        print(f"Reading a {os.path.getsize(path) / 1e6:.1f} MB torrent with {args.files} files, "
+              f"best of {args.repeat} runs")
+        baseline = None
+        for name, func in (('bencodepy decode + re-encode', legacy_read), ('mmap reader', streaming_read)):
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                func(path)
+                best = min(best, time.perf_counter() - start)
+            baseline = baseline or best
+            print(f"  {name:30s} {best * 1000:8.2f} ms  ({baseline / best:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
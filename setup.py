@@ -41,6 +41,13 @@ setup(
     python_requires=">=3.8",
     install_requires=read_requirements(),
     extras_require={
+        "fast": [
+            "rapidfuzz>=3.0.0",
+            "numpy>=1.21.0",
+        ],
+        "tags": [
+            "mutagen>=1.45.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "black>=22.0.0",
@@ -4,10 +4,13 @@ Command line interface for Spotify Playlist Downloader
 
 import argparse
 import logging
+import os
 import sys
 from pathlib import Path
 
+from ..utils.catalog import SearchCatalog
 from ..utils.config import Config
+from ..utils.dump_import import import_dump
 from ..core.downloader import SpotifyPlaylistDownloader
 
 
@@ -111,6 +114,110 @@ Environment Variables:
         help="Don't download torrent files, only find matches"
     )
     
+    parser.add_argument(
+        "--no-album-planning",
+        action="store_true",
+        help="Pick each track's best match on its own instead of minimizing torrents across the playlist"
+    )
+    
+    parser.add_argument(
+        "--verify-candidates",
+        type=int,
+        metavar="K",
+        help="Check the file lists of the top K candidates per track before choosing (0 disables, default: 3)"
+    )
+    
+    parser.add_argument(
+        "--similarity-backend",
+        choices=["auto", "difflib", "rapidfuzz"],
+        help="String similarity implementation (default: auto, rapidfuzz when installed)"
+    )
+    
+    parser.add_argument(
+        "--scoring-workers",
+        type=int,
+        metavar="N",
+        help="Score batches of 256+ candidates or files in N worker processes; prefiltered batches stay inline "
+             "(default: 0, inline)"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore matches and misses remembered from previous runs"
+    )
+    
+    parser.add_argument(
+        "--music-library",
+        action="append",
+        help="Music folder to check for tracks you already own (repeatable, adds to MUSIC_LIBRARY)"
+    )
+    
+    parser.add_argument(
+        "--no-library",
+        action="store_true",
+        help="Do not skip tracks already in the music library or download folder"
+    )
+    
+    parser.add_argument(
+        "--no-catalog",
+        action="store_true",
+        help="Always search RuTracker instead of answering from earlier search results"
+    )
+    
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Only report the searches, downloads and time a run would need, without contacting RuTracker"
+    )
+    
+    parser.add_argument(
+        "--request-delay",
+        type=float,
+        metavar="SECONDS",
+        help="Pause after each RuTracker search, file-list request and .torrent download (default: 2)"
+    )
+    
+    parser.add_argument(
+        "--no-adaptive-search",
+        action="store_true",
+        help="Always try the search strategies in their fixed order instead of by past win rates"
+    )
+    
+    parser.add_argument(
+        "--offline-search",
+        action="store_true",
+        help="Search only the local catalog (see --import-dump); RuTracker is only contacted for .torrent files"
+    )
+    
+    parser.add_argument(
+        "--import-dump",
+        metavar="FILE",
+        help="Import the music topics of a RuTracker XML dump (.xml, .gz, .bz2 or .xz) into the catalog and exit"
+    )
+    
+    parser.add_argument(
+        "--no-torrent-index",
+        action="store_true",
+        help="Do not look for tracks in already downloaded torrents before searching"
+    )
+    
+    parser.add_argument(
+        "--invalidate-cache",
+        choices=["all", "hits", "misses"],
+        help="Forget cached matches before running (optionally limited with --invalidate-artist)"
+    )
+    
+    parser.add_argument(
+        "--invalidate-artist",
+        help="Only invalidate cache entries for this artist"
+    )
+    
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory for persistent caches (default: CACHE_DIR or cache)"
+    )
+    
     parser.add_argument(
         "--debug-dir",
         default="debug_html",
@@ -170,11 +277,45 @@ def main() -> None:
         config.open_with_transmission = not args.no_transmission
         config.selective_download = not args.no_selective
         config.download_torrents = not args.no_download
+        if args.no_album_planning:
+            config.album_planning = False
+        if args.cache_dir:
+            config.cache_dir = args.cache_dir
+        if args.no_cache:
+            config.use_match_cache = False
+        if args.no_torrent_index:
+            config.use_torrent_index = False
+        if args.music_library:
+            config.music_library = os.pathsep.join(filter(None, [config.music_library] + args.music_library))
+        if args.no_library:
+            config.use_library = False
+        if args.no_catalog:
+            config.use_catalog = False
+        if args.no_adaptive_search:
+            config.adaptive_search = False
+        if args.offline_search:
+            config.offline_search = True
+        if args.similarity_backend:
+            config.similarity_backend = args.similarity_backend
+        if args.verify_candidates is not None:
+            config.verify_candidates = args.verify_candidates
+        if args.scoring_workers is not None:
+            config.scoring_workers = args.scoring_workers
+        if args.request_delay is not None:
+            config.request_delay = args.request_delay
         
         # Override download folder if provided
         if args.download_folder:
             config.download_folder = args.download_folder
         
+        # Importing a dump needs no credentials
+        if args.import_dump:
+            catalog = SearchCatalog(config.catalog_path)
+            import_dump(args.import_dump, catalog)
+            logger.info(f"Catalog now holds {len(catalog)} topics")
+            catalog.close()
+            return
+        
         # Validate configuration
         try:
             config.validate()
@@ -185,7 +326,14 @@ def main() -> None:
         
         # Create and run downloader
         downloader = SpotifyPlaylistDownloader(config)
-        downloader.run(limit=args.limit)
+        
+        if args.invalidate_cache or args.invalidate_artist:
+            downloader.match_cache.invalidate(args.invalidate_cache or 'all', args.invalidate_artist)
+        
+        if args.plan:
+            downloader.plan(limit=args.limit)
+        else:
+            downloader.run(limit=args.limit)
         
     except KeyboardInterrupt:
         logger.info("Download interrupted by user")
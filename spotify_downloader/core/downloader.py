@@ -5,17 +5,27 @@ Main downloader class that orchestrates the entire process
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
 import csv
-import re
 import time
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 from ..utils.config import Config
+from ..utils.file_table import FileTable
+from ..utils.planner import AcquisitionPlanner
+from ..utils.library import MusicLibrary
+from ..utils.match_cache import MatchCache
+from ..utils.normalize import normalize_name
+from ..utils.run_estimate import RunEstimate
+from ..utils.torrent_index import TorrentIndex
+from ..utils.parallel import ScoringPool
 from .rutracker import RuTrackerClient
 from .transmission import TransmissionClient
 
 logger = logging.getLogger(__name__)
 
+# (Spotify track, RuTracker match, CSV result row)
+MatchedTrack = Tuple[Dict[str, str], Dict[str, Any], Dict[str, Any]]
+
 
 class SpotifyPlaylistDownloader:
     """Main downloader class that orchestrates the entire process"""
@@ -35,6 +45,25 @@ class SpotifyPlaylistDownloader:
         # Initialize other clients
         self.rutracker_client = RuTrackerClient(config)
         self.transmission_client = TransmissionClient(config)
+        self.planner = AcquisitionPlanner(
+            self.rutracker_client.matching_engine,
+            selective=self.config.selective_download
+        )
+        self.match_cache = MatchCache(
+            self.config.match_cache_path,
+            negative_ttl=self.config.negative_cache_ttl_hours * 3600
+        )
+        self.torrent_index = TorrentIndex(self.config.torrent_index_path)
+        self.library = MusicLibrary(self.config.library_index_path)
+        self.logged_in = False
+        self.login_failed = False
+        
+        # Both clients share one worker pool for large scoring batches
+        self.scoring_pool = None
+        if self.config.scoring_workers > 0:
+            self.scoring_pool = ScoringPool(self.config.scoring_workers)
+            self.rutracker_client.matching_engine.pool = self.scoring_pool
+            self.transmission_client.matching_engine.pool = self.scoring_pool
     
     def get_playlist_tracks(self, playlist_id: Optional[str] = None) -> List[Dict[str, str]]:
         """Retrieve all tracks from a Spotify playlist"""
@@ -55,9 +84,16 @@ class SpotifyPlaylistDownloader:
                     artist = track['artists'][0]['name'] if track['artists'] else 'Unknown Artist'
                     album = track['album']['name'] if track['album'] else 'Unknown Album'
                     tracks.append({
+                        'id': track.get('id'),
                         'name': track['name'],
                         'artist': artist,
-                        'album': album
+                        'album': album,
+                        'album_type': (track['album'] or {}).get('album_type'),
+                        'artists': [a['name'] for a in track['artists']],
+                        'duration_ms': track.get('duration_ms'),
+                        'track_number': track.get('track_number'),
+                        'disc_number': track.get('disc_number'),
+                        'isrc': (track.get('external_ids') or {}).get('isrc')
                     })
                 
                 if results['next']:
@@ -77,80 +113,310 @@ class SpotifyPlaylistDownloader:
             tracks = tracks[:limit]
             logger.info(f"Processing {len(tracks)} tracks (limited)")
         
-        # Login to RuTracker
-        if not self.rutracker_client.login():
-            logger.error("RuTracker login failed. Exiting.")
-            return []
+        present = {}
+        self.refresh_local_data()
         
         # Process tracks
         logger.info("Searching for matches on RuTracker...")
-        results = []
+        track_candidates = []
+        
+        searched = set()
         
         for i, track in enumerate(tracks):
             logger.info(f"Processing {i+1}/{len(tracks)}: {track['artist']} - {track['name']}")
             
+            source, found = self.resolve_locally(track)
+            if source == 'library':
+                logger.info(f"Already present: {found}")
+                present[i] = found
+                track_candidates.append([])
+                continue
+            
+            if source == 'cache':
+                if found:
+                    logger.info(f"Cached match (score: {found['match_score']:.3f}): {found['title']}")
+                else:
+                    logger.info("Cached as not found, skipping search")
+                track_candidates.append([found] if found else [])
+                continue
+            
+            if source == 'torrents':
+                logger.info(f"Found in downloaded torrent: {found['title']} ({found['verified_file']})")
+                track_candidates.append([found])
+                searched.add(i)
+                continue
+            
+            # Catalog rows are checked like search results; if none holds the track, search after all
+            catalog_candidates = self.rutracker_client.verify_candidates(track, found) if source == 'catalog' else []
+            if catalog_candidates:
+                best = catalog_candidates[0]
+                logger.info(f"Best catalog match (score: {best['match_score']:.3f}): {best['title']}")
+                track_candidates.append(catalog_candidates)
+                searched.add(i)
+                continue
+            
+            # Login to RuTracker only once a search is actually needed
+            if not self.config.offline_search and not self.ensure_login():
+                # Tracks resolved from local data are still planned and reported
+                logger.warning(f"Not logged in to RuTracker, cannot search for: {track['artist']} - {track['name']}")
+                track_candidates.append([])
+                continue
+            
             try:
-                match = self.rutracker_client.get_best_match(track)
+                candidates = self.rutracker_client.get_candidates(track)
+                if candidates is None:
+                    # A failed search is not remembered as a miss, so the next run searches again
+                    candidates = []
+                else:
+                    candidates = self.rutracker_client.verify_candidates(track, candidates)
+                    searched.add(i)
             except Exception as e:
                 logger.error(f"Error processing track: {str(e)}")
-                match = None
+                candidates = []
+            
+            if candidates:
+                logger.info(f"Best match (score: {candidates[0]['match_score']:.3f}): {candidates[0]['title']}")
+            track_candidates.append(candidates)
             
+            # Add delay to avoid overwhelming the server
+            if not self.config.offline_search:
+                time.sleep(self.config.request_delay)
+        
+        # Choose one torrent per track, looking at all tracks together
+        if self.config.album_planning:
+            matches = self.planner.plan(tracks, track_candidates, self._stored_file_list)
+        else:
+            matches = [candidates[0] if candidates else None for candidates in track_candidates]
+        
+        # Remember this run's outcome for the tracks that were actually searched
+        for i in searched:
+            match = matches[i]
+            topic_id = self.rutracker_client.get_topic_id(match['link']) if match else None
+            # A miss in the local catalog says nothing about RuTracker, so the next online run searches again
+            if match or not self.config.offline_search:
+                self.match_cache.put(tracks[i], match, topic_id)
+            if match and not self.config.offline_search:
+                # Every strategy whose search returned the chosen topic shares the win
+                for strategy in match.get('search_strategies', []):
+                    self.rutracker_client.query_planner.record_win(tracks[i], strategy)
+        
+        results = []
+        matched = []
+        
+        for i, (track, match) in enumerate(zip(tracks, matches)):
             # Initialize result data
+            not_found = 'Already present' if i in present else 'Not found'
             result_data = {
                 'spotify_track': track['name'],
                 'spotify_artist': track['artist'],
                 'spotify_album': track['album'],
-                'rutracker_link': match['link'] if match else 'Not found',
+                'rutracker_link': match['link'] if match else not_found,
                 'rutracker_title': match['title'] if match else '',
                 'quality': match['quality'] if match else '',
                 'type': match['type'] if match else '',
                 'match_score': f"{match['match_score']:.3f}" if match and 'match_score' in match else '',
                 'torrent_download_url': '',
                 'torrent_file': '',
-                'transmission_opened': 'No'
+                'transmission_opened': 'No',
+                'local_file': present.get(i, '')
             }
-            
-            # If we found a match and torrent downloading is enabled
-            if match and self.config.download_torrents:
-                try:
-                    # Extract torrent download URL
-                    download_url = self.rutracker_client.get_torrent_download_url(match['link'])
-                    if download_url:
-                        result_data['torrent_download_url'] = download_url
-                        
-                        # Create a safe filename
-                        safe_filename = re.sub(r'[^\\w\\s-]', '', f"{track['artist']} - {track['name']}")
-                        safe_filename = re.sub(r'[-\\s]+', '-', safe_filename)
-                        torrent_filename = f"{safe_filename}.torrent"
-                        
-                        # Download the torrent file
-                        torrent_file = self.rutracker_client.download_torrent_file(download_url, torrent_filename)
-                        if torrent_file:
-                            result_data['torrent_file'] = torrent_file
-                            
-                            # Open with Transmission if enabled
-                            if self.config.open_with_transmission:
-                                if self.transmission_client.add_torrent(torrent_file, track['name'], track['artist']):
-                                    result_data['transmission_opened'] = 'Yes'
-                                else:
-                                    result_data['transmission_opened'] = 'Failed'
-                            
-                            logger.info(f"Successfully processed torrent for: {track['artist']} - {track['name']}")
-                        else:
-                            logger.warning(f"Failed to download torrent for: {track['artist']} - {track['name']}")
-                    else:
-                        logger.warning(f"No download URL found for: {track['artist']} - {track['name']}")
-                        
-                except Exception as e:
-                    logger.error(f"Error processing torrent for {track['artist']} - {track['name']}: {str(e)}")
-            
             results.append(result_data)
             
-            # Add delay to avoid overwhelming the server
-            time.sleep(2)
+            if match:
+                matched.append((track, match, result_data))
+        
+        # Fetch and add each matched topic once, for all of its tracks
+        if matched and self.config.download_torrents:
+            self._acquire_torrents(matched)
         
         return results
     
+    def estimate_run(self, tracks: List[Dict[str, str]], limit: Optional[int] = None) -> RunEstimate:
+        """Count the requests, downloads and bytes process_tracks would need, without contacting RuTracker"""
+        if limit:
+            tracks = tracks[:limit]
+        estimate = RunEstimate(tracks=len(tracks))
+        self.refresh_local_data()
+        
+        online = not self.config.offline_search
+        # Offline runs only verify candidates against file lists that are already known
+        top_k = self.config.verify_candidates if online else 0
+        topics = {}
+        new_groups = set()
+        
+        for i, track in enumerate(tracks):
+            source, found = self.resolve_locally(track)
+            if source == 'library':
+                estimate.present += 1
+                continue
+            
+            if source == 'cache':
+                estimate.cached += 1
+                if found:
+                    self._estimate_match(estimate, track, found, topics)
+                continue
+            
+            if source == 'torrents':
+                estimate.in_torrents += 1
+                self._estimate_match(estimate, track, found, topics)
+                continue
+            
+            if source == 'catalog':
+                estimate.from_catalog += 1
+                # Catalog rows are verified before any login, so file lists are only fetched
+                # once an earlier track's search has logged in
+                if online and (estimate.to_search or self.logged_in):
+                    estimate.topic_fetches += sum(
+                        1 for candidate in found[:top_k]
+                        if self.rutracker_client.get_known_file_list(candidate['link']) is None)
+                self._estimate_match(estimate, track, found[0], topics)
+                continue
+            
+            estimate.to_search += 1
+            if online:
+                estimate.searches += self.rutracker_client.estimate_searches(track)
+                estimate.topic_fetches += top_k
+            
+            # With album planning the tracks of one album usually end up in one torrent
+            group = (normalize_name(track['artist']), normalize_name(track['album'])) \
+                if self.config.album_planning else (i,)
+            guess = {'quality': 'lossless', 'type': 'album' if self.config.album_planning else 'single'}
+            if self.config.selective_download or group not in new_groups:
+                estimate.download_bytes += self.planner.download_bytes(track, guess)
+            new_groups.add(group)
+        
+        if self.config.download_torrents:
+            estimate.torrent_downloads = sum(1 for stored in topics.values() if not stored) + len(new_groups)
+            if self.config.open_with_transmission:
+                estimate.transmission_adds = len(topics) + len(new_groups)
+        if not (self.config.download_torrents and self.config.open_with_transmission):
+            estimate.download_bytes = 0
+        if (online and estimate.to_search) or estimate.torrent_downloads:
+            estimate.logins = 1
+        return estimate
+    
+    def _estimate_match(self, estimate: RunEstimate, track: Dict[str, str], match: Dict[str, Any],
+                        topics: Dict[str, bool]) -> None:
+        """Count a track whose topic is already known: its bytes, and whether the topic must be downloaded"""
+        topic_key = self.rutracker_client.get_topic_id(match['link']) or match['link']
+        first = topic_key not in topics
+        if first:
+            topics[topic_key] = self.rutracker_client.torrent_store.get_by_topic(topic_key) is not None
+        if self.config.selective_download or first:
+            files = self.rutracker_client.get_known_file_list(match['link'])
+            estimate.download_bytes += self.planner.download_bytes(track, match, files)
+    
+    def refresh_local_data(self) -> None:
+        """Bring the music library and downloaded torrent indexes up to date before resolving tracks"""
+        # Tracks already in the music library need neither a search nor a download
+        if self.config.use_library:
+            self.library.scan(self.config.library_roots())
+        
+        # Torrents downloaded on earlier runs may already contain some of the tracks
+        if self.config.use_torrent_index:
+            self.refresh_torrent_index()
+    
+    def resolve_locally(self, track: Dict[str, str]) -> Tuple[Optional[str], Any]:
+        """Resolve a track without RuTracker: ('library', path), ('cache', match or None),
+        ('torrents', match), ('catalog', unverified candidates) or (None, None) when it needs a search"""
+        owned_file = self.library.find_track(track) if self.config.use_library else None
+        if owned_file:
+            return 'library', owned_file
+        
+        # Tracks matched (or not found) on a previous run need no searches
+        cached = self.match_cache.get(track) if self.config.use_match_cache else None
+        if cached is not None:
+            return 'cache', cached['match']
+        
+        local_match = self.torrent_index.find_track(track, self.rutracker_client.matching_engine) \
+            if self.config.use_torrent_index else None
+        if local_match:
+            return 'torrents', local_match
+        
+        # Rows of earlier searches often already name the track
+        catalog_candidates = self.rutracker_client.get_catalog_candidates(track) \
+            if self.config.use_catalog else []
+        if catalog_candidates:
+            return 'catalog', catalog_candidates
+        
+        return None, None
+    
+    def ensure_login(self) -> bool:
+        """Log in to RuTracker on first use; runs served from local data never log in"""
+        if not self.logged_in and not self.login_failed:
+            self.logged_in = self.rutracker_client.login()
+            # A failed login is not retried for every remaining track and topic
+            self.login_failed = not self.logged_in
+            if self.login_failed:
+                logger.error("RuTracker login failed; only tracks resolved from local data will be matched")
+        return self.logged_in
+    
+    def refresh_torrent_index(self) -> None:
+        """Bring the index of downloaded torrents up to date and let the store reuse them by topic"""
+        store = self.rutracker_client.torrent_store
+        self.torrent_index.refresh(self.config.torrents_dir, store.topics_by_hash())
+        store.adopt(self.torrent_index.topics())
+    
+    def _stored_file_list(self, candidate: Dict[str, Any]) -> Optional[FileTable]:
+        """Return a candidate's file list if it is already known locally"""
+        return self.rutracker_client.get_known_file_list(candidate['link'])
+    
+    def group_matches_by_topic(self, matched: List[MatchedTrack]) -> Dict[str, List[MatchedTrack]]:
+        """Group (track, match, result) entries by RuTracker topic, keeping playlist order"""
+        groups = {}
+        for entry in matched:
+            match = entry[1]
+            topic_key = self.rutracker_client.get_topic_id(match['link']) or match['link']
+            groups.setdefault(topic_key, []).append(entry)
+        return groups
+    
+    def _acquire_torrents(self, matched: List[MatchedTrack]) -> None:
+        """Download each matched topic's torrent once and add it with every wanted file selected"""
+        groups = self.group_matches_by_topic(matched)
+        logger.info(f"Fetching {len(groups)} torrents for {len(matched)} matched tracks...")
+        
+        for topic_key, entries in groups.items():
+            group_tracks = [track for track, _, _ in entries]
+            group_results = [result_data for _, _, result_data in entries]
+            description = ', '.join(f"{track['artist']} - {track['name']}" for track in group_tracks)
+            link = entries[0][1]['link']
+            was_stored = self.rutracker_client.torrent_store.get_by_topic(topic_key) is not None
+            if not was_stored and not self.ensure_login():
+                logger.warning(f"Not logged in to RuTracker, cannot fetch torrent for: {description}")
+                continue
+            
+            try:
+                # Fetch the torrent, reusing the local store when the topic was seen before
+                download_url, torrent_file = self.rutracker_client.fetch_torrent(link)
+                if not download_url:
+                    logger.warning(f"No download URL found for: {description}")
+                    continue
+                
+                for result_data in group_results:
+                    result_data['torrent_download_url'] = download_url
+                
+                if not torrent_file:
+                    logger.warning(f"Failed to download torrent for: {description}")
+                    continue
+                
+                for result_data in group_results:
+                    result_data['torrent_file'] = torrent_file
+                
+                # Open with Transmission if enabled
+                if self.config.open_with_transmission:
+                    opened = 'Yes' if self.transmission_client.add_torrent_for_tracks(torrent_file, group_tracks) else 'Failed'
+                    for result_data in group_results:
+                        result_data['transmission_opened'] = opened
+                
+                logger.info(f"Successfully processed torrent for: {description}")
+            
+            except Exception as e:
+                logger.error(f"Error processing torrent for {description}: {str(e)}")
+            
+            # Only pace requests that actually went to the server
+            if not was_stored:
+                time.sleep(self.config.request_delay)
+    
     def save_results(self, results: List[Dict[str, Any]], output_file: Optional[str] = None) -> None:
         """Save results to CSV file"""
         output_file = output_file or self.config.output_csv
@@ -160,7 +426,7 @@ class SpotifyPlaylistDownloader:
                 fieldnames = [
                     'spotify_track', 'spotify_artist', 'spotify_album',
                     'rutracker_link', 'rutracker_title', 'quality', 'type', 'match_score',
-                    'torrent_download_url', 'torrent_file', 'transmission_opened'
+                    'torrent_download_url', 'torrent_file', 'transmission_opened', 'local_file'
                 ]
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                 writer.writeheader()
@@ -180,9 +446,32 @@ class SpotifyPlaylistDownloader:
             return
         
         # Process tracks
-        results = self.process_tracks(tracks, limit)
+        try:
+            results = self.process_tracks(tracks, limit)
+        finally:
+            if self.scoring_pool is not None:
+                self.scoring_pool.close()
         
         # Save results
         self.save_results(results)
         
-        logger.info("Download process completed")
\ No newline at end of file
+        logger.info("Download process completed")
+    
+    def plan(self, playlist_id: Optional[str] = None, limit: Optional[int] = None) -> Optional[RunEstimate]:
+        """Report what a run would cost, using the playlist and local data only"""
+        logger.info("Planning Spotify playlist download (no RuTracker requests)")
+        
+        tracks = self.get_playlist_tracks(playlist_id)
+        if not tracks:
+            logger.error("No tracks found. Exiting.")
+            return None
+        
+        try:
+            estimate = self.estimate_run(tracks, limit)
+        finally:
+            if self.scoring_pool is not None:
+                self.scoring_pool.close()
+        
+        for line in estimate.summary(self.config.request_delay, not self.config.offline_search):
+            logger.info(line)
+        return estimate
\ No newline at end of file
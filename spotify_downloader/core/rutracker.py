@@ -7,12 +7,17 @@ from bs4 import BeautifulSoup
 import re
 import time
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from urllib.parse import quote, urlparse, parse_qs
 import os
 
+from ..utils.catalog import SearchCatalog, search_row
 from ..utils.config import Config
-from ..utils.matching import MatchingEngine
+from ..utils.file_table import FileTable
+from ..utils.matching import MatchingEngine, MatchTarget, clean_query
+from ..utils.query_planner import QueryPlanner, STRATEGIES, STRATEGY_LABELS
+from ..utils.torrent import TorrentAnalyzer
+from ..utils.torrent_store import TorrentStore
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +25,19 @@ logger = logging.getLogger(__name__)
 class RuTrackerClient:
     """Client for interacting with RuTracker"""
     
+    # Searches not worth a request once a specific one found a confident match
+    BROAD_STRATEGIES = ('artist', 'track', 'album', 'artist_word')
+    
     def __init__(self, config: Config):
         self.config = config
         self.session = None
-        self.matching_engine = MatchingEngine()
+        self.matching_engine = MatchingEngine(config.similarity_backend)
+        self.torrent_store = TorrentStore(config.torrents_dir)
+        self.torrent_analyzer = TorrentAnalyzer()
+        self._file_lists = {}
+        # Every parsed search row is kept, so later tracks can be answered without searching
+        self.catalog = SearchCatalog(config.catalog_path)
+        self.query_planner = QueryPlanner(config.strategy_stats_path)
         
     def login(self) -> bool:
         """Log in to RuTracker and return authenticated session"""
@@ -74,8 +88,11 @@ class RuTrackerClient:
             logger.error(f"Login error: {str(e)}")
             return False
     
-    def search(self, query: str) -> List[Dict[str, Any]]:
-        """Search RuTracker for a query and return results"""
+    def search(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Search RuTracker for a query and return results, or None when the request failed"""
+        if self.config.offline_search:
+            return self.search_offline(query)
+        
         logger.info(f"Searching RuTracker: {query}")
         search_url = 'https://rutracker.org/forum/search.php'
         headers = {
@@ -85,10 +102,10 @@ class RuTrackerClient:
         
         try:
             # Clean the query of problematic characters first
-            clean_query = re.sub(r'[^\w\s.-]', '', query)
+            safe_query = re.sub(r'[^\w\s.-]', '', query)
             
             # Use simple UTF-8 encoding for better compatibility
-            encoded_query = quote(clean_query, safe='')
+            encoded_query = quote(safe_query, safe='')
             params = {'nm': encoded_query}
             
             # Log the exact search URL we're using
@@ -109,7 +126,7 @@ class RuTrackerClient:
             
             if response.status_code != 200:
                 logger.warning(f"Search failed: HTTP {response.status_code} for query: {query}")
-                return []
+                return None
             
             # Save HTML for debugging
             filename = f"search_{re.sub(r'[^a-zA-Z0-9]', '_', query)[:50]}.html"
@@ -118,92 +135,231 @@ class RuTrackerClient:
             # Parse results
             results = self._parse_search_results(response.text)
             logger.info(f"Found {len(results)} results for query: {query}")
+            self.catalog.add(results)
             return results
             
         except Exception as e:
             logger.error(f"Search error for query '{query}': {str(e)}")
-            return []
+            return None
+    
+    def search_offline(self, query: str) -> List[Dict[str, Any]]:
+        """Search the local catalog (filled by search pages and imported dumps) instead of the site"""
+        logger.info(f"Searching local catalog: {query}")
+        results = self.catalog.search_text(re.sub(r'[^\w\s.-]', '', query))
+        logger.info(f"Found {len(results)} results for query: {query}")
+        return results
     
     def get_best_match(self, track: Dict[str, str]) -> Optional[Dict[str, Any]]:
         """Find the best RuTracker match for a track"""
-        artist = track['artist']
-        track_name = track['name']
-        album = track['album']
-        
-        # Clean problematic characters and normalize text
-        def clean_text(text):
-            # Remove special characters but keep alphanumeric, spaces, dots, and hyphens
-            cleaned = re.sub(r'[^\w\s.-]', '', text)
-            # Normalize whitespace
-            cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-            return cleaned
-        
-        artist = clean_text(artist)
-        track_name = clean_text(track_name)
-        album = clean_text(album)
-        
-        # Multiple search strategies with different approaches
-        # Start with more specific searches, then broaden
-        search_strategies = [
-            # Strategy 1: Artist + track (most specific)
-            (f"Searching for artist + track: {artist} {track_name}", f"{artist} {track_name}"),
-            
-            # Strategy 2: Artist + album 
-            (f"Searching for artist + album: {artist} {album}", f"{artist} {album}"),
-            
-            # Strategy 3: Artist only (often gives good results)
-            (f"Searching for artist: {artist}", artist),
-            
-            # Strategy 4: Track name only (broader search)
-            (f"Searching for track: {track_name}", track_name),
+        candidates = self.verify_candidates(track, self.get_candidates(track) or [])
+        if not candidates:
+            return None
+        
+        best_match = candidates[0]
+        logger.info(f"Best match (score: {best_match['match_score']:.3f}): {best_match['title']}")
+        return best_match
+    
+    def verify_candidates(self, track: Dict[str, str], candidates: List[Dict[str, Any]],
+                          top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Check the top candidates' file lists and move those that contain the track to the front"""
+        top_k = self.config.verify_candidates if top_k is None else top_k
+        if top_k <= 0 or not candidates:
+            return candidates
+        
+        verified = []
+        unverified = []
+        for candidate in candidates[:top_k]:
+            files = self.get_topic_file_list(candidate['link'])
+            if files is None:
+                # Listing unavailable, keep the candidate on its search score alone
+                unverified.append(candidate)
+                continue
             
-            # Strategy 5: Album only (if it's distinctive)
-            (f"Searching for album: {album}", album),
+            matching_files = self.matching_engine.find_track_files(files, track)
+            if matching_files:
+                candidate['verified_file'] = matching_files[0]['path']
+                verified.append(candidate)
+                logger.debug(f"Verified {candidate['title'][:60]}: {matching_files[0]['path']}")
+            else:
+                logger.info(f"Rejected candidate without a matching audio file: {candidate['title'][:60]}")
+        
+        if not verified:
+            logger.warning(f"No candidate verified for: {track['artist']} - {track['name']}")
+        
+        return verified + unverified + candidates[top_k:]
+    
+    def get_topic_file_list(self, torrent_page_url: str) -> Optional[FileTable]:
+        """Get a topic's file list from the local store or RuTracker's file-list endpoint"""
+        files = self.get_known_file_list(torrent_page_url)
+        if files is not None:
+            return files
+        
+        topic_id = self.get_topic_id(torrent_page_url)
+        if not topic_id or not self.session or self.config.offline_search:
+            return None
+        
+        try:
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Referer': torrent_page_url
+            }
+            response = self.session.post('https://rutracker.org/forum/viewtorrent.php',
+                                         data={'t': topic_id}, headers=headers)
+            # File-list requests are paced like searches and downloads
+            time.sleep(self.config.request_delay)
+            if response.status_code != 200:
+                logger.warning(f"File list request failed: HTTP {response.status_code}")
+                return None
             
-            # Strategy 6: Simplified versions (only if original searches fail)
-            (f"Searching simplified artist: {artist.split()[0] if artist else ''}", artist.split()[0] if artist else ''),
-        ]
+            files = FileTable.from_dicts(self._parse_file_list(response.text))
+            logger.debug(f"Found {len(files)} files in topic {topic_id}")
+            self._file_lists[topic_id] = files
+            return files
+        
+        except Exception as e:
+            logger.error(f"Error fetching file list for topic {topic_id}: {str(e)}")
+            return None
+    
+    def get_known_file_list(self, torrent_page_url: str) -> Optional[FileTable]:
+        """Get a topic's file list without network access, if it is already known"""
+        topic_id = self.get_topic_id(torrent_page_url)
+        if not topic_id:
+            return None
+        
+        if topic_id in self._file_lists:
+            return self._file_lists[topic_id]
+        
+        torrent_file = self.torrent_store.get_by_topic(topic_id)
+        if torrent_file:
+            files = self.torrent_analyzer.get_file_table(torrent_file)
+            self._file_lists[topic_id] = files
+            return files
+        
+        return None
+    
+    def track_target(self, track: Dict[str, str]) -> MatchTarget:
+        """Compile a Spotify track into the target its search results are scored against"""
+        # Fold accents, drop "feat." and remaster notes, clean problematic characters
+        return self.matching_engine.compile_target(clean_query(track['artist']), clean_query(track['name']),
+                                                   clean_query(track['album']))
+    
+    def get_catalog_candidates(self, track: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Answer a track from earlier search rows, if they hold a title naming its artist and name"""
+        target = self.track_target(track)
+        results = self.catalog.search(re.findall(r'\w+', target.artist))
+        if not any(self.matching_engine.is_confident(result, target) for result in results):
+            return []
+        
+        for result in results:
+            result['search_strategy'] = 'catalog'
+        logger.info(f"Answered from the search catalog with {len(results)} known topics")
+        return self._rank(results, target)
+    
+    def _rank(self, results: List[Dict[str, Any]], target: MatchTarget) -> List[Dict[str, Any]]:
+        """Score results against a target and sort them best first"""
+        results = self.matching_engine.score_candidates(results, target)
+        for result in results:
+            logger.debug(f"Score {result['match_score']:.3f}: {result['title'][:60]}...")
+        
+        # Sort by match score (higher is better), then by priority
+        results.sort(key=lambda x: (x['match_score'], x['priority']), reverse=True)
+        return results
+    
+    def search_queries(self, track: Dict[str, str]) -> Dict[str, str]:
+        """Return the query of each search strategy for a track, from specific to broad"""
+        artist = clean_query(track['artist'])
+        track_name = clean_query(track['name'])
+        album = clean_query(track['album'])
+        queries = {
+            'artist_track': f"{artist} {track_name}",
+            'artist_album': f"{artist} {album}",
+            'artist': artist,
+            'track': track_name,
+            'album': album,
+            'artist_word': artist.split()[0] if artist else '',
+        }
+        # Too short to search for
+        return {strategy: query for strategy, query in queries.items() if len(query.strip()) >= 2}
+    
+    def plan_strategies(self, track: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """Return (strategies to try in order, strategies kept for when the others find nothing)"""
+        # Strategies that won most often for similar tracks go first; ones that rarely win are kept in reserve
+        if self.config.adaptive_search:
+            return self.query_planner.order(track)
+        return list(STRATEGIES), []
+    
+    def estimate_searches(self, track: Dict[str, str]) -> float:
+        """Expected number of search requests get_candidates makes for a track, from the recorded hit rates"""
+        queries = self.search_queries(track)
+        planned, _ = self.plan_strategies(track)
+        expected = 0.0
+        unconfident = 1.0
+        for strategy in planned:
+            if strategy not in queries:
+                continue
+            expected += unconfident if strategy in self.BROAD_STRATEGIES else 1.0
+            unconfident *= 1.0 - self.query_planner.hit_rate(track, strategy)
+        return expected
+    
+    def get_candidates(self, track: Dict[str, str]) -> Optional[List[Dict[str, Any]]]:
+        """Find all RuTracker results for a track, scored and sorted best first; None when a search failed"""
+        target = self.track_target(track)
+        artist = clean_query(track['artist'])
+        track_name = clean_query(track['name'])
+        
+        # Multiple search strategies with different approaches, from specific to broad
+        queries = self.search_queries(track)
+        planned, reserve = self.plan_strategies(track)
         
         all_results = []
+        confident = False
         
-        for strategy_desc, query in search_strategies:
-            if not query or len(query.strip()) < 2:
+        for strategy in planned + reserve:
+            query = queries.get(strategy)
+            if not query:
                 continue
-                
-            logger.info(strategy_desc)
+            if strategy in reserve and all_results:
+                break
+            # Broad fallbacks are skipped once a search found a title naming the artist and the track
+            if strategy in self.BROAD_STRATEGIES and confident:
+                logger.info(f"Confident match found, skipping {STRATEGY_LABELS[strategy]} search for: "
+                            f"{artist} - {track_name}")
+                continue
+            
+            logger.info(f"Searching for {STRATEGY_LABELS[strategy]}: {query}")
             results = self.search(query)
+            if results is None:
+                # Outages and rate limits say nothing about the track, and further requests would fail too
+                logger.warning(f"Search failed, leaving {artist} - {track_name} for a later run")
+                return None
+            hit = any(self.matching_engine.is_confident(result, target) for result in results)
+            if not self.config.offline_search:
+                # Catalog lookups cost no request and would skew the statistics of real searches
+                self.query_planner.record_search(track, strategy, hit)
             
             if results:
                 # Tag results with their search strategy for better ranking
                 for result in results:
-                    result['search_strategy'] = strategy_desc
+                    result['search_strategy'] = strategy
                 all_results.extend(results)
+                confident = confident or hit
         
         if all_results:
-            # Remove duplicates based on link
-            seen_links = set()
-            unique_results = []
+            # Remove duplicates based on link, remembering every strategy that found each topic
+            unique = {}
             for result in all_results:
-                if result['link'] not in seen_links:
-                    seen_links.add(result['link'])
-                    unique_results.append(result)
+                kept = unique.setdefault(result['link'], result)
+                strategies = kept.setdefault('search_strategies', [])
+                if result['search_strategy'] not in strategies:
+                    strategies.append(result['search_strategy'])
+            unique_results = list(unique.values())
             
             # Calculate match scores for all results
             logger.info(f"Calculating match scores for {len(unique_results)} unique results...")
-            for result in unique_results:
-                result['match_score'] = self.matching_engine.calculate_match_score(result, artist, track_name, album)
-                logger.debug(f"Score {result['match_score']:.3f}: {result['title'][:60]}...")
-            
-            # Sort by match score (higher is better), then by priority
-            unique_results.sort(key=lambda x: (x['match_score'], x['priority']), reverse=True)
-            
-            best_match = unique_results[0]
-            logger.info(f"Best match (score: {best_match['match_score']:.3f}): {best_match['title']}")
-            
-            return best_match
+            return self._rank(unique_results, target)
         
         logger.warning(f"No results found for: {artist} - {track_name}")
-        return None
+        return []
     
     def get_torrent_download_url(self, torrent_page_url: str) -> Optional[str]:
         """Extract the torrent download URL from a RuTracker page"""
@@ -256,8 +412,37 @@ class RuTrackerClient:
             logger.error(f"Error extracting torrent download URL: {str(e)}")
             return None
     
-    def download_torrent_file(self, download_url: str, filename: str) -> Optional[str]:
-        """Download a torrent file"""
+    @staticmethod
+    def get_topic_id(torrent_page_url: str) -> Optional[str]:
+        """Extract the topic ID from a RuTracker topic or download URL"""
+        topic_id_match = re.search(r'[?&]t=(\d+)', torrent_page_url or '')
+        return topic_id_match.group(1) if topic_id_match else None
+    
+    def fetch_torrent(self, torrent_page_url: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return (download URL, local torrent file) for a topic, preferring the local store"""
+        topic_id = self.get_topic_id(torrent_page_url)
+        
+        # A stored torrent for this topic needs no network traffic at all
+        cached_file = self.torrent_store.get_by_topic(topic_id)
+        if cached_file:
+            logger.info(f"Using stored torrent for topic {topic_id}: {cached_file}")
+            return f'https://rutracker.org/forum/dl.php?t={topic_id}', cached_file
+        
+        download_url = self.get_torrent_download_url(torrent_page_url)
+        if not download_url:
+            return None, None
+        
+        return download_url, self.download_torrent_file(download_url, topic_id)
+    
+    def download_torrent_file(self, download_url: str, topic_id: Optional[str] = None) -> Optional[str]:
+        """Stream a torrent file into the local torrent store"""
+        topic_id = topic_id or self.get_topic_id(download_url)
+        
+        cached_file = self.torrent_store.get_by_topic(topic_id)
+        if cached_file:
+            logger.info(f"Torrent for topic {topic_id} already stored: {cached_file}")
+            return cached_file
+        
         logger.info(f"Downloading torrent: {download_url}")
         
         try:
@@ -266,23 +451,22 @@ class RuTrackerClient:
                 'Referer': 'https://rutracker.org/forum/index.php'
             }
             
-            response = self.session.get(download_url, headers=headers)
-            
-            if response.status_code == 200:
+            with self.session.get(download_url, headers=headers, stream=True) as response:
+                if response.status_code != 200:
+                    logger.warning(f"Download failed: HTTP {response.status_code}")
+                    return None
+                
                 # Check if it's actually a torrent file
                 content_type = response.headers.get('content-type', '')
-                if 'application/x-bittorrent' in content_type or filename.endswith('.torrent'):
-                    filepath = os.path.join(self.config.torrents_dir, filename)
-                    with open(filepath, 'wb') as f:
-                        f.write(response.content)
-                    logger.info(f"Downloaded torrent file: {filepath}")
-                    return filepath
-                else:
+                if 'text/html' in content_type:
                     logger.warning(f"Response doesn't appear to be a torrent file. Content-Type: {content_type}")
                     return None
-            else:
-                logger.warning(f"Download failed: HTTP {response.status_code}")
-                return None
+                
+                filepath = self.torrent_store.save_stream(response.iter_content(chunk_size=64 * 1024), topic_id)
+            
+            if filepath:
+                logger.info(f"Downloaded torrent file: {filepath}")
+            return filepath
                 
         except Exception as e:
             logger.error(f"Error downloading torrent: {str(e)}")
@@ -335,38 +519,46 @@ class RuTrackerClient:
                 else:
                     link = relative_link
                 
-                # Determine quality
-                quality = 'lossy'
-                if re.search(r'\b(FLAC|APE|WAV|24bit|lossless|无损)\b', title, re.IGNORECASE):
-                    quality = 'lossless'
-                
-                # Determine type
-                result_type = 'single'
-                if re.search(r'\b(album|дискография|сборник|collection|disc|LP|EP|CD|box)\b', title, re.IGNORECASE):
-                    result_type = 'album'
-                    
-                # Calculate priority
-                priority = 1
-                if quality == 'lossless' and result_type == 'single':
-                    priority = 4
-                elif quality == 'lossless' and result_type == 'album':
-                    priority = 3
-                elif quality == 'lossy' and result_type == 'single':
-                    priority = 2
-                    
-                results.append({
-                    'title': title,
-                    'link': link,
-                    'quality': quality,
-                    'type': result_type,
-                    'priority': priority
-                })
+                results.append(search_row(title, link))
             except Exception as e:
                 logger.debug(f"Error parsing result row: {str(e)}")
                 continue
         
         return results
     
+    def _parse_file_list(self, html: str) -> List[Dict[str, Any]]:
+        """Parse the file tree returned by viewtorrent.php"""
+        soup = BeautifulSoup(html, 'html.parser')
+        files = []
+        
+        def walk(ul, parents):
+            for item in ul.find_all('li', recursive=False):
+                classes = item.get('class') or []
+                if 'dir' in classes:
+                    name_tag = item.find('b')
+                    dir_name = name_tag.get_text(strip=True) if name_tag else ''
+                    subtree = item.find('ul')
+                    if subtree:
+                        walk(subtree, parents + [dir_name] if dir_name else parents)
+                else:
+                    name_tag = item.find('b')
+                    if not name_tag:
+                        continue
+                    name = name_tag.get_text(strip=True)
+                    size_tag = item.find('i')
+                    size_text = re.sub(r'\D', '', size_tag.get_text()) if size_tag else ''
+                    files.append({
+                        'index': len(files),
+                        'path': '/'.join(parents + [name]),
+                        'length': int(size_text) if size_text else 0,
+                        'name': name
+                    })
+        
+        tree = soup.find('ul', class_='ftree') or soup.find('ul')
+        if tree:
+            walk(tree, [])
+        return files
+    
     def _save_debug_html(self, content: str, filename: str) -> None:
         """Save HTML content for debugging"""
         path = os.path.join(self.config.debug_dir, filename)
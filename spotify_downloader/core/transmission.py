@@ -3,12 +3,12 @@ Transmission client for managing torrent downloads
 """
 
 import subprocess
-import time
 import os
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 
 from ..utils.config import Config
+from ..utils.file_table import FileTable
 from ..utils.torrent import TorrentAnalyzer
 from ..utils.matching import MatchingEngine
 
@@ -21,24 +21,30 @@ class TransmissionClient:
     def __init__(self, config: Config):
         self.config = config
         self.torrent_analyzer = TorrentAnalyzer()
-        self.matching_engine = MatchingEngine()
+        self.matching_engine = MatchingEngine(config.similarity_backend)
     
     def add_torrent(self, torrent_file: str, target_track: Optional[str] = None, 
                    target_artist: Optional[str] = None) -> bool:
         """Add torrent to Transmission, optionally with selective download"""
+        tracks = []
+        if target_track and target_artist:
+            tracks.append({'name': target_track, 'artist': target_artist})
+        return self.add_torrent_for_tracks(torrent_file, tracks)
+    
+    def add_torrent_for_tracks(self, torrent_file: str, tracks: List[Dict[str, str]]) -> bool:
+        """Add torrent to Transmission once, selecting the best file for every given track"""
         logger.info(f"Adding {torrent_file} to Transmission...")
         
         # Analyze torrent contents if selective download is enabled
         selected_files = []
         all_files = []
-        if self.config.selective_download and target_track and target_artist:
+        if self.config.selective_download and tracks:
             logger.info(f"Analyzing torrent contents for selective download...")
-            all_files = self.torrent_analyzer.analyze_torrent_contents(torrent_file)
+            all_files = self.torrent_analyzer.get_file_table(torrent_file) or []
             if all_files:
                 logger.info(f"Found {len(all_files)} files in torrent")
-                matching_files = self.matching_engine.find_matching_files(all_files, target_track, target_artist)
-                if matching_files:
-                    selected_files = matching_files[:1]  # Take only the best match
+                selected_files = self.select_files(all_files, tracks)
+                if selected_files:
                     logger.info(f"Selected {len(selected_files)} matching files:")
                     for file_info in selected_files:
                         logger.info(f"  - {file_info['name']} (score: {file_info['match_score']:.3f})")
@@ -68,6 +74,16 @@ class TransmissionClient:
         
         return success
     
+    def select_files(self, all_files: Union[List[Dict[str, Any]], FileTable], tracks: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Pick a matching file for each track, assigned jointly so two tracks never claim one file"""
+        selected_files = {}
+        for track, best_file in zip(tracks, self.matching_engine.assign_files(all_files, tracks)):
+            if best_file:
+                selected_files.setdefault(best_file['index'], best_file)
+            else:
+                logger.info(f"No matching file for: {track['artist']} - {track['name']}")
+        return sorted(selected_files.values(), key=lambda f: f['index'])
+    
     def _is_transmission_remote_available(self) -> bool:
         """Check if transmission-remote is available"""
         try:
@@ -169,86 +185,38 @@ class TransmissionClient:
                            all_files: List[Dict[str, Any]]) -> bool:
         """Set file selection in Transmission using transmission-remote"""
         try:
-            # Wait for torrent to be added
-            time.sleep(3)
-            
-            # Get torrent ID
-            torrent_id = self._find_torrent_id(selected_files)
-            if not torrent_id:
-                logger.warning("Could not find torrent ID")
+            # transmission-remote accepts an info-hash wherever it takes a torrent ID, so the
+            # torrent just added is addressed directly instead of being looked up in the list
+            info_hash = self.torrent_analyzer.get_info_hash(torrent_file)
+            if not info_hash:
+                logger.warning("Could not compute the torrent info-hash")
                 return False
             
-            logger.info(f"Found torrent ID: {torrent_id}")
+            logger.info(f"Selecting files of torrent {info_hash}")
             
-            # Get the selected file indices
-            selected_indices = [f['index'] for f in selected_files]
+            # Get the selected file indices as one comma-separated list
+            selected_indices = ','.join(str(f['index']) for f in selected_files)
             
             # First, set all files to NOT download
-            for file_info in all_files:
-                file_index = str(file_info['index'])
-                if file_info['index'] not in selected_indices:
-                    result = subprocess.run(['transmission-remote', '-t', torrent_id, '--no-get', file_index], 
-                                          capture_output=True, text=True, timeout=10)
-                    if result.returncode == 0:
-                        logger.debug(f"Disabled download for file: {file_info['name']}")
-                    else:
-                        logger.debug(f"Failed to disable file {file_index}: {result.stderr}")
+            result = subprocess.run(['transmission-remote', '-t', info_hash, '--no-get', 'all'], 
+                                  capture_output=True, text=True, timeout=10)
+            if result.returncode != 0:
+                logger.debug(f"Failed to disable files: {result.stderr}")
             
-            # Then, ensure selected files are set to download
-            for file_info in selected_files:
-                file_index = str(file_info['index'])
-                result = subprocess.run(['transmission-remote', '-t', torrent_id, '--get', file_index], 
-                                      capture_output=True, text=True, timeout=10)
-                if result.returncode == 0:
+            # Then, enable all selected files with high priority in a single call
+            result = subprocess.run(['transmission-remote', '-t', info_hash, '--get', selected_indices, 
+                                   '--priority-high', selected_indices], 
+                                  capture_output=True, text=True, timeout=10)
+            if result.returncode == 0:
+                for file_info in selected_files:
                     logger.info(f"Enabled download for file: {file_info['name']}")
-                else:
-                    logger.warning(f"Failed to enable file {file_index}: {result.stderr}")
-            
-            # Set high priority for selected files
-            for file_info in selected_files:
-                file_index = str(file_info['index'])
-                subprocess.run(['transmission-remote', '-t', torrent_id, '--priority-high', file_index], 
-                              capture_output=True, text=True, timeout=10)
+            else:
+                logger.warning(f"Failed to enable files {selected_indices}: {result.stderr}")
+                return False
             
-            logger.info(f"Successfully configured selective download for torrent {torrent_id}")
+            logger.info(f"Successfully configured selective download for torrent {info_hash}")
             return True
             
         except Exception as e:
             logger.error(f"Error setting file selection: {str(e)}")
-            return False
-    
-    def _find_torrent_id(self, selected_files: List[Dict[str, Any]]) -> Optional[str]:
-        """Find the torrent ID for the most recently added torrent"""
-        max_attempts = 10
-        
-        for attempt in range(max_attempts):
-            try:
-                result = subprocess.run(['transmission-remote', '-l'], 
-                                      capture_output=True, text=True, timeout=10)
-                if result.returncode != 0:
-                    logger.warning("Failed to get torrent list from transmission-remote")
-                    time.sleep(1)
-                    continue
-                
-                # Find torrent ID by looking for recently added torrents
-                lines = result.stdout.strip().split('\n')
-                # Skip header line and sum line
-                torrent_lines = [line for line in lines if line.strip() and not line.startswith('Sum:') and not line.startswith('ID')]
-                
-                if torrent_lines:
-                    # Take the last torrent (most recently added)
-                    last_line = torrent_lines[-1]
-                    parts = last_line.strip().split()
-                    if parts and parts[0].isdigit():
-                        torrent_id = parts[0]
-                        logger.info(f"Using most recent torrent ID: {torrent_id}")
-                        return torrent_id
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                logger.debug(f"Error finding torrent ID: {str(e)}")
-                time.sleep(1)
-                continue
-        
-        return None
\ No newline at end of file
+            return False
\ No newline at end of file
@@ -3,11 +3,17 @@ Utility functions for Spotify Playlist Downloader
 """
 
 from .config import Config
-from .torrent import TorrentAnalyzer
-from .matching import MatchingEngine
+from .torrent import TorrentAnalyzer, TorrentMetadata
+from .matching import MatchingEngine, MatchTarget
+from .torrent_store import TorrentStore
+from .torrent_index import TorrentIndex
 
 __all__ = [
     "Config",
     "TorrentAnalyzer",
-    "MatchingEngine"
+    "TorrentMetadata",
+    "MatchingEngine",
+    "MatchTarget",
+    "TorrentStore",
+    "TorrentIndex"
 ]
\ No newline at end of file
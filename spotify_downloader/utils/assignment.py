@@ -0,0 +1,68 @@
+"""
+Optimal one-to-one assignment (Hungarian algorithm) for matching tracks to files
+"""
+
+from typing import List, Optional
+
+
+def max_weight_assignment(weights: List[List[Optional[float]]]) -> List[Optional[int]]:
+    """Return the column (or None) of each row so no column is shared and the total weight is maximal"""
+    # weights[i][j] is the gain of giving column j to row i, or None when that pair is not allowed
+    rows = len(weights)
+    if not rows:
+        return []
+    columns = len(weights[0])
+    
+    # Every row also gets a private "unassigned" column of cost 0, so the problem is always
+    # square enough to solve and leaving a row out is never worse than a forbidden pair
+    width = columns + rows
+    cost = []
+    for row in weights:
+        cost.append([-gain if gain is not None else 0.0 for gain in row] + [0.0] * rows)
+    
+    # Shortest augmenting path formulation with row/column potentials, O(rows^2 * width)
+    infinity = float('inf')
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (width + 1)
+    owner = [0] * (width + 1)  # owner[j]: 1-based row assigned to 1-based column j
+    way = [0] * (width + 1)
+    for i in range(1, rows + 1):
+        owner[0] = i
+        j0 = 0
+        minv = [infinity] * (width + 1)
+        used = [False] * (width + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row_cost = cost[i0 - 1]
+            delta = infinity
+            j1 = 0
+            for j in range(1, width + 1):
+                if not used[j]:
+                    current = row_cost[j - 1] - u[i0] - v[j]
+                    if current < minv[j]:
+                        minv[j] = current
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(width + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    
+    assignment: List[Optional[int]] = [None] * rows
+    for j in range(1, columns + 1):
+        i = owner[j]
+        if i and weights[i - 1][j - 1] is not None:
+            assignment[i - 1] = j - 1
+    return assignment
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""
+Minimal streaming bencode reader for .torrent files
+"""
+
+import hashlib
+import mmap
+from typing import Any, Dict, Iterator, List, Union
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+class BencodeError(ValueError):
+    """Raised when a buffer is not valid bencode"""
+
+
+class BencodeReader:
+    """Walks a bencoded buffer in place, decoding only the values asked for and skipping the rest"""
+    
+    def __init__(self, data: Buffer, pos: int = 0):
+        self.data = data
+        self.pos = pos
+    
+    def peek(self) -> bytes:
+        """Return the type marker of the next value without consuming it"""
+        if self.pos >= len(self.data):
+            raise BencodeError("Unexpected end of data")
+        return self.data[self.pos:self.pos + 1]
+    
+    def read_int(self) -> int:
+        """Decode an integer (i...e)"""
+        if self.peek() != b'i':
+            raise BencodeError(f"Expected integer at offset {self.pos}")
+        end = self.data.find(b'e', self.pos)
+        if end < 0:
+            raise BencodeError("Unterminated integer")
+        value = int(self.data[self.pos + 1:end])
+        self.pos = end + 1
+        return value
+    
+    def _string_span(self) -> slice:
+        """Consume a byte string (<length>:<bytes>) and return where its bytes are"""
+        colon = self.data.find(b':', self.pos)
+        if colon < 0 or not self.data[self.pos:colon].isdigit():
+            raise BencodeError(f"Expected string at offset {self.pos}")
+        start = colon + 1
+        end = start + int(self.data[self.pos:colon])
+        if end > len(self.data):
+            raise BencodeError("String runs past the end of data")
+        self.pos = end
+        return slice(start, end)
+    
+    def read_bytes(self) -> bytes:
+        """Decode a byte string"""
+        return self.data[self._string_span()]
+    
+    def iter_dict(self) -> Iterator[bytes]:
+        """Yield the keys of a dictionary; the caller must read or skip each value before the next key"""
+        if self.peek() != b'd':
+            raise BencodeError(f"Expected dictionary at offset {self.pos}")
+        self.pos += 1
+        while self.peek() != b'e':
+            yield self.read_bytes()
+        self.pos += 1
+    
+    def iter_list(self) -> Iterator[None]:
+        """Yield once per list item; the caller must read or skip each item"""
+        if self.peek() != b'l':
+            raise BencodeError(f"Expected list at offset {self.pos}")
+        self.pos += 1
+        while self.peek() != b'e':
+            yield None
+        self.pos += 1
+    
+    def read_value(self) -> Any:
+        """Fully decode the next value"""
+        marker = self.peek()
+        if marker == b'i':
+            return self.read_int()
+        if marker == b'l':
+            return [self.read_value() for _ in self.iter_list()]
+        if marker == b'd':
+            return {key: self.read_value() for key in self.iter_dict()}
+        return self.read_bytes()
+    
+    def skip_value(self) -> None:
+        """Move past the next value without building it"""
+        marker = self.peek()
+        if marker == b'i':
+            self.read_int()
+        elif marker == b'l':
+            for _ in self.iter_list():
+                self.skip_value()
+        elif marker == b'd':
+            for _ in self.iter_dict():
+                self.skip_value()
+        else:
+            self._string_span()
+
+
+def decode_text(raw: bytes) -> str:
+    """Decode a torrent string as UTF-8, falling back to cp1251 used by older Russian clients"""
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('cp1251', errors='replace')
+
+
+def _read_info(reader: BencodeReader, torrent: Dict[str, Any]) -> None:
+    """Decode the used fields of the info dictionary, skipping the piece hashes"""
+    for key in reader.iter_dict():
+        if key == b'name':
+            torrent['name'] = decode_text(reader.read_bytes())
+        elif key == b'length':
+            torrent['length'] = reader.read_int()
+        elif key == b'piece length':
+            torrent['piece_length'] = reader.read_int()
+        elif key == b'private':
+            torrent['private'] = reader.read_int() == 1
+        elif key == b'files':
+            files = []
+            for _ in reader.iter_list():
+                path: List[str] = []
+                length = 0
+                for file_key in reader.iter_dict():
+                    if file_key == b'path':
+                        path = [decode_text(part) for part in reader.read_value()]
+                    elif file_key == b'length':
+                        length = reader.read_int()
+                    else:
+                        reader.skip_value()
+                files.append((path, length))
+            torrent['files'] = files
+        else:
+            # Above all b'pieces': 20 bytes per piece, never needed here
+            reader.skip_value()
+
+
+def parse_torrent(data: Buffer) -> Dict[str, Any]:
+    """Decode the fields the downloader uses from torrent data and hash the raw info dictionary"""
+    torrent: Dict[str, Any] = {
+        'name': '', 'files': None, 'length': 0, 'piece_length': 0, 'private': False,
+        'announce': '', 'comment': '', 'created_by': '', 'creation_date': 0, 'info_hash': None,
+    }
+    text_fields = {b'announce': 'announce', b'comment': 'comment', b'created by': 'created_by'}
+    reader = BencodeReader(data)
+    for key in reader.iter_dict():
+        if key == b'info':
+            start = reader.pos
+            _read_info(reader, torrent)
+            # The info-hash is defined over the exact bytes of the info dictionary
+            with memoryview(data) as view, view[start:reader.pos] as info:
+                torrent['info_hash'] = hashlib.sha1(info).hexdigest()
+        elif key in text_fields:
+            torrent[text_fields[key]] = decode_text(reader.read_bytes())
+        elif key == b'creation date':
+            torrent['creation_date'] = reader.read_int()
+        else:
+            reader.skip_value()
+    if torrent['info_hash'] is None:
+        raise BencodeError("Torrent has no info dictionary")
+    return torrent
+
+
+def read_torrent(torrent_file: str) -> Dict[str, Any]:
+    """Decode a .torrent file through mmap, without loading or copying its piece hashes"""
+    with open(torrent_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_torrent(data)
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""
+Local catalog of every RuTracker search result row seen so far
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+from typing import Dict, Any, Optional, List, Iterable
+
+from .normalize import normalize_title
+
+logger = logging.getLogger(__name__)
+
+
+def search_row(title: str, link: str) -> Dict[str, Any]:
+    """Build a search result row for a topic title, classifying its quality, type and priority"""
+    # Determine quality
+    quality = 'lossy'
+    if re.search(r'\b(FLAC|APE|WAV|24bit|lossless|无损)\b', title, re.IGNORECASE):
+        quality = 'lossless'
+    
+    # Determine type
+    result_type = 'single'
+    if re.search(r'\b(album|дискография|сборник|collection|disc|LP|EP|CD|box)\b', title, re.IGNORECASE):
+        result_type = 'album'
+    
+    # Calculate priority
+    priority = 1
+    if quality == 'lossless' and result_type == 'single':
+        priority = 4
+    elif quality == 'lossless' and result_type == 'album':
+        priority = 3
+    elif quality == 'lossy' and result_type == 'single':
+        priority = 2
+    
+    return {
+        'title': title,
+        'link': link,
+        'quality': quality,
+        'type': result_type,
+        'priority': priority
+    }
+
+
+class SearchCatalog:
+    """SQLite catalog of search rows keyed by topic ID, with a full-text index over the titles"""
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS topics (
+            topic_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            link TEXT NOT NULL,
+            quality TEXT,
+            type TEXT,
+            priority INTEGER,
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL
+        )
+    '''
+    # One row per topic, keyed by the numeric topic ID as its rowid so updates never scan the index
+    FTS_SCHEMA = 'CREATE VIRTUAL TABLE IF NOT EXISTS topic_words USING fts5(text)'
+    PLAIN_SCHEMA = 'CREATE TABLE IF NOT EXISTS topic_words (topic_key INTEGER PRIMARY KEY, text TEXT NOT NULL)'
+    
+    FIELDS = ('title', 'link', 'quality', 'type', 'priority')
+    MAX_RESULTS = 200
+    
+    def __init__(self, db_path: str, max_age: float = 180 * 24 * 3600):
+        self.db_path = db_path
+        # Rows not seen in a search for this long may belong to deleted topics
+        self.max_age = max_age
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(self.SCHEMA)
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(topic_words)')]
+        if 'topic_id' in columns:
+            # Catalogs from before the rowid layout are re-indexed from the topics table
+            self.connection.execute('DROP TABLE topic_words')
+        try:
+            self.connection.execute(self.FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to LIKE scans
+            self.connection.execute(self.PLAIN_SCHEMA)
+            self.full_text = False
+        if 'topic_id' in columns:
+            self.connection.executemany(
+                'INSERT INTO topic_words (rowid, text) VALUES (?, ?)',
+                [(int(topic_id), normalize_title(title))
+                 for topic_id, title in self.connection.execute('SELECT topic_id, title FROM topics')])
+        self.connection.commit()
+    
+    @staticmethod
+    def topic_id(link: str) -> Optional[str]:
+        """Extract the topic ID from a topic link"""
+        match = re.search(r'[?&]t=(\d+)', link or '')
+        return match.group(1) if match else None
+    
+    def add(self, results: Iterable[Dict[str, Any]], seen_at: Optional[float] = None) -> int:
+        """Record parsed search rows, refreshing last_seen of known topics; returns how many were new"""
+        seen_at = seen_at or time.time()
+        added = 0
+        try:
+            with self.connection:
+                for result in results:
+                    topic_id = self.topic_id(result.get('link'))
+                    if not topic_id:
+                        continue
+                    row = self.connection.execute(
+                        'SELECT title, first_seen FROM topics WHERE topic_id = ?', (topic_id,)).fetchone()
+                    self.connection.execute(
+                        'INSERT OR REPLACE INTO topics (topic_id, title, link, quality, type, priority, first_seen, '
+                        'last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (topic_id, result['title'], result['link'], result.get('quality'), result.get('type'),
+                         result.get('priority'), row[1] if row else seen_at, seen_at))
+                    if row and row[0] == result['title']:
+                        continue
+                    # New topic, or one whose title was edited: (re)index its words
+                    if row:
+                        self.connection.execute('DELETE FROM topic_words WHERE rowid = ?', (int(topic_id),))
+                    else:
+                        added += 1
+                    self.connection.execute('INSERT INTO topic_words (rowid, text) VALUES (?, ?)',
+                                            (int(topic_id), normalize_title(result['title'])))
+        except Exception as e:
+            logger.error(f"Error updating search catalog: {str(e)}")
+        return added
+    
+    def search(self, words: List[str], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return rows whose title contains every word, in the shape of parsed search results"""
+        if not words:
+            return []
+        if self.full_text:
+            condition = 'topic_words MATCH ?'
+            params = [' AND '.join('"' + word.replace('"', '""') + '"' for word in words)]
+        else:
+            condition = ' AND '.join(['topic_words.text LIKE ?'] * len(words))
+            params = [f'%{word}%' for word in words]
+        query = ('SELECT ' + ', '.join(f'topics.{field}' for field in self.FIELDS) +
+                 ' FROM topic_words JOIN topics ON topics.topic_id = CAST(topic_words.rowid AS TEXT)'
+                 f' WHERE {condition} AND topics.last_seen >= ? ORDER BY topics.last_seen DESC LIMIT ?')
+        try:
+            rows = self.connection.execute(query, params + [time.time() - self.max_age, limit or self.MAX_RESULTS])
+            return [dict(zip(self.FIELDS, row)) for row in rows]
+        except Exception as e:
+            logger.error(f"Error searching catalog: {str(e)}")
+            return []
+    
+    def search_text(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Answer a free-text search query the way the site search would, from the catalog alone"""
+        return self.search(re.findall(r'\w+', normalize_title(query)), limit)
+    
+    def __len__(self) -> int:
+        """Number of topics in the catalog"""
+        return self.connection.execute('SELECT COUNT(*) FROM topics').fetchone()[0]
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        self.connection.close()
\ No newline at end of file
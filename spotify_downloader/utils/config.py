@@ -3,7 +3,7 @@ Configuration management for Spotify Playlist Downloader
 """
 
 import os
-from typing import Optional
+from typing import List, Optional
 from dataclasses import dataclass
 
 
@@ -27,12 +27,26 @@ class Config:
     debug_dir: str = 'debug_html'
     torrents_dir: str = 'torrents'
     download_folder: Optional[str] = None  # Custom download folder for torrents
+    cache_dir: str = 'cache'  # Persistent caches and indexes shared across runs
+    music_library: Optional[str] = None  # Music folders to check for owned tracks (os.pathsep-separated)
     
     # Feature flags
     download_torrents: bool = True
     open_with_transmission: bool = True
     selective_download: bool = True
     enable_content_analysis: bool = False
+    album_planning: bool = True  # Prefer torrents that cover several playlist tracks
+    verify_candidates: int = 3  # Check this many top candidates' file lists (0 disables)
+    use_match_cache: bool = True
+    similarity_backend: str = 'auto'  # 'auto', 'difflib' or 'rapidfuzz'
+    negative_cache_ttl_hours: float = 72.0  # How long "Not found" results are remembered
+    scoring_workers: int = 0  # Worker processes for large scoring batches (0 scores inline)
+    use_torrent_index: bool = True  # Look for tracks in already downloaded torrents before searching
+    use_library: bool = True  # Skip tracks already in the music library or download folder
+    use_catalog: bool = True  # Answer tracks from earlier search rows before searching again
+    adaptive_search: bool = True  # Order search strategies by how often they won for similar tracks
+    request_delay: float = 2.0  # Seconds to wait after each searched track, file-list request and new .torrent download
+    offline_search: bool = False  # Search only the local catalog; RuTracker is used for .torrent downloads
     
     @classmethod
     def from_env(cls) -> 'Config':
@@ -47,10 +61,24 @@ class Config:
             debug_dir=os.getenv('DEBUG_DIR', 'debug_html'),
             torrents_dir=os.getenv('TORRENTS_DIR', 'torrents'),
             download_folder=os.getenv('DOWNLOAD_FOLDER'),
+            cache_dir=os.getenv('CACHE_DIR', 'cache'),
+            music_library=os.getenv('MUSIC_LIBRARY'),
             download_torrents=os.getenv('DOWNLOAD_TORRENTS', 'true').lower() == 'true',
             open_with_transmission=os.getenv('OPEN_WITH_TRANSMISSION', 'true').lower() == 'true',
             selective_download=os.getenv('SELECTIVE_DOWNLOAD', 'true').lower() == 'true',
-            enable_content_analysis=os.getenv('ENABLE_CONTENT_ANALYSIS', 'false').lower() == 'true'
+            enable_content_analysis=os.getenv('ENABLE_CONTENT_ANALYSIS', 'false').lower() == 'true',
+            album_planning=os.getenv('ALBUM_PLANNING', 'true').lower() == 'true',
+            verify_candidates=int(os.getenv('VERIFY_CANDIDATES', '3')),
+            use_match_cache=os.getenv('USE_MATCH_CACHE', 'true').lower() == 'true',
+            similarity_backend=os.getenv('SIMILARITY_BACKEND', 'auto'),
+            negative_cache_ttl_hours=float(os.getenv('NEGATIVE_CACHE_TTL_HOURS', '72')),
+            scoring_workers=int(os.getenv('SCORING_WORKERS', '0')),
+            use_torrent_index=os.getenv('USE_TORRENT_INDEX', 'true').lower() == 'true',
+            use_library=os.getenv('USE_LIBRARY', 'true').lower() == 'true',
+            use_catalog=os.getenv('USE_CATALOG', 'true').lower() == 'true',
+            adaptive_search=os.getenv('ADAPTIVE_SEARCH', 'true').lower() == 'true',
+            request_delay=float(os.getenv('REQUEST_DELAY', '2')),
+            offline_search=os.getenv('OFFLINE_SEARCH', 'false').lower() == 'true'
         )
     
     def validate(self) -> None:
@@ -70,5 +98,38 @@ class Config:
         """Create necessary directories"""
         os.makedirs(self.debug_dir, exist_ok=True)
         os.makedirs(self.torrents_dir, exist_ok=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
         if self.download_folder:
-            os.makedirs(self.download_folder, exist_ok=True)
\ No newline at end of file
+            os.makedirs(self.download_folder, exist_ok=True)
+    
+    @property
+    def match_cache_path(self) -> str:
+        """Path of the persistent match cache database"""
+        return os.path.join(self.cache_dir, 'match_cache.sqlite')
+    
+    @property
+    def torrent_index_path(self) -> str:
+        """Path of the index of downloaded torrents and their file lists"""
+        return os.path.join(self.cache_dir, 'torrent_index.sqlite')
+    
+    @property
+    def catalog_path(self) -> str:
+        """Path of the catalog of search result rows"""
+        return os.path.join(self.cache_dir, 'catalog.sqlite')
+    
+    @property
+    def strategy_stats_path(self) -> str:
+        """Path of the per-strategy search statistics"""
+        return os.path.join(self.cache_dir, 'strategy_stats.sqlite')
+    
+    @property
+    def library_index_path(self) -> str:
+        """Path of the index of owned music files"""
+        return os.path.join(self.cache_dir, 'library.sqlite')
+    
+    def library_roots(self) -> List[str]:
+        """Folders scanned for tracks that are already owned"""
+        roots = [path for path in (self.music_library or '').split(os.pathsep) if path]
+        if self.download_folder:
+            roots.append(self.download_folder)
+        return roots
\ No newline at end of file
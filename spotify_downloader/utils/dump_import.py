@@ -0,0 +1,93 @@
+"""
+Import of RuTracker's XML topic dumps into the local search catalog
+"""
+
+import re
+import bz2
+import gzip
+import lzma
+import time
+import logging
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, Optional, Iterator, Set, IO
+
+from .catalog import SearchCatalog, search_row
+from .torrent_index import TOPIC_URL
+
+logger = logging.getLogger(__name__)
+
+# Whole words naming the music sections: genres, formats and discographies, in Russian and English
+MUSIC_FORUM = re.compile(
+    r'\b(музык\w*|lossless|lossy|mp3|flac|ape|hi-res|дискографи\w*|рок|метал|панк|джаз|блюз|поп|'
+    r'хип-хоп|рэп|шансон|фолк|кантри|саундтрек\w*|music|rock|metal|jazz|blues|pop|hip-hop|folk|soundtracks?)\b',
+    re.IGNORECASE)
+# Books, films and videos share genre words with music ("Музыкальные фильмы", "Аудиокниги: рок-поэзия")
+NON_MUSIC_FORUM = re.compile(r'книг|фильм|видео|сериал', re.IGNORECASE)
+
+
+def is_music_forum(name: str) -> bool:
+    """Whether a forum name belongs to one of the music sections"""
+    return bool(MUSIC_FORUM.search(name)) and not NON_MUSIC_FORUM.search(name)
+
+
+def open_dump(path: str) -> IO[bytes]:
+    """Open a dump file, decompressing .gz, .bz2 and .xz dumps on the fly"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if path.endswith('.xz'):
+        return lzma.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def iter_dump_topics(stream: IO[bytes], forum_ids: Optional[Set[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the music topics of a dump as search result rows, holding one topic in memory at a time"""
+    # <torrents><torrent id=".." size=".."><title/><torrent hash=".."/><forum id="..">name</forum>
+    # <content/></torrent>...</torrents>; the inner <torrent> carries the info-hash, not a topic ID
+    context = ET.iterparse(stream, events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event != 'end' or elem.tag != 'torrent' or 'id' not in elem.attrib:
+            continue
+        
+        title = (elem.findtext('title') or '').strip()
+        forum = elem.find('forum')
+        forum_id = forum.get('id', '') if forum is not None else ''
+        forum_name = (forum.text or '') if forum is not None else ''
+        if forum_ids is not None:
+            keep = forum_id in forum_ids
+        else:
+            keep = is_music_forum(forum_name)
+        if title and keep:
+            yield search_row(title, TOPIC_URL.format(elem.get('id')))
+        
+        # Drop the finished topic, including its (often large) description
+        root.clear()
+
+
+def import_dump(path: str, catalog: SearchCatalog, forum_ids: Optional[Set[str]] = None,
+                batch_size: int = 5000) -> int:
+    """Add the music topics of a dump file to the catalog; returns how many topics were new"""
+    seen_at = time.time()
+    added = 0
+    kept = 0
+    batch = []
+    try:
+        with open_dump(path) as stream:
+            for row in iter_dump_topics(stream, forum_ids):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    added += catalog.add(batch, seen_at)
+                    kept += len(batch)
+                    batch = []
+                    logger.info(f"Imported {kept} music topics...")
+    except Exception as e:
+        logger.error(f"Error reading dump {path}: {str(e)}")
+    
+    # Rows parsed before an error in a truncated dump are still worth keeping
+    if batch:
+        added += catalog.add(batch, seen_at)
+        kept += len(batch)
+    logger.info(f"Imported {kept} music topics from {path} ({added} new)")
+    return added
\ No newline at end of file
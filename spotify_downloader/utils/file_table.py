@@ -0,0 +1,83 @@
+"""
+Compact struct-of-arrays file list for torrents with very many files
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+class FileTable:
+    """Torrent files as parallel arrays: interned directory and name tables, lengths and match scores"""
+    
+    # A file's position in the table is its index in the torrent
+    def __init__(self):
+        self.dirs: List[str] = []
+        self._dir_ids: Dict[str, int] = {}
+        self.dir_ids = array('l')
+        self.names: List[str] = []
+        self.lengths = array('q')
+        self.scores = array('d')
+    
+    @classmethod
+    def from_entries(cls, entries: Iterable[Tuple[str, int]]) -> 'FileTable':
+        """Build a table from (path, length) pairs in torrent order"""
+        table = cls()
+        for path, length in entries:
+            table.append(path, length)
+        return table
+    
+    @classmethod
+    def from_dicts(cls, files: Iterable[Dict[str, Any]]) -> 'FileTable':
+        """Build a table from file dicts; positions follow the list, not the dicts' 'index'"""
+        return cls.from_entries((file_info['path'], file_info.get('length') or 0) for file_info in files)
+    
+    def append(self, path: str, length: int) -> None:
+        """Add one file, sharing its directory string with the files next to it"""
+        directory, _, name = path.rpartition('/')
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_ids[directory] = len(self.dirs)
+            self.dirs.append(sys.intern(directory))
+        self.dir_ids.append(dir_id)
+        self.names.append(sys.intern(name))
+        self.lengths.append(length)
+        self.scores.append(0.0)
+    
+    def __len__(self) -> int:
+        """Number of files"""
+        return len(self.names)
+    
+    def path(self, position: int) -> str:
+        """Full path of a file inside the torrent"""
+        directory = self.dirs[self.dir_ids[position]]
+        return f"{directory}/{self.names[position]}" if directory else self.names[position]
+    
+    def directory(self, position: int) -> str:
+        """Directory of a file, '' for files at the top level"""
+        return self.dirs[self.dir_ids[position]]
+    
+    def as_dict(self, position: int) -> Dict[str, Any]:
+        """A fresh dict in the shape TorrentAnalyzer.analyze_torrent_contents returns"""
+        return {'index': position, 'path': self.path(position), 'length': self.lengths[position],
+                'name': self.names[position]}
+    
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        """The file at a position as a fresh dict"""
+        return self.as_dict(position)
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield every file as a fresh dict, in torrent order"""
+        return (self.as_dict(position) for position in range(len(self.names)))
+    
+    def total_size(self) -> int:
+        """Sum of all file lengths"""
+        return sum(self.lengths)
+    
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the table, counting each shared string once"""
+        strings = {id(text): text for text in self.dirs}
+        strings.update((id(text), text) for text in self.names)
+        return (sum(sys.getsizeof(text) for text in strings.values()) +
+                sys.getsizeof(self.dirs) + sys.getsizeof(self.names) + sys.getsizeof(self._dir_ids) +
+                sum(values.buffer_info()[1] * values.itemsize for values in (self.dir_ids, self.lengths, self.scores)))
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Index of the music already on disk, so owned tracks are not searched or downloaded again
+"""
+
+import os
+import re
+import sqlite3
+import logging
+from typing import Dict, Any, Optional, Iterable, Iterator, Tuple
+
+try:
+    import mutagen
+except ImportError:  # Optional dependency: pip install mutagen
+    mutagen = None
+
+from .matching import FILE_NUMBER
+from .normalize import normalize_name, normalize_title
+
+logger = logging.getLogger(__name__)
+
+
+class MusicLibrary:
+    """SQLite index of local audio files by normalized artist and title, rescanned incrementally by mtime"""
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS library_files (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            artist TEXT NOT NULL,
+            title TEXT NOT NULL,
+            album TEXT NOT NULL,
+            duration_ms INTEGER,
+            title_key TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS library_title ON library_files (title_key);
+    '''
+    
+    AUDIO_EXTENSIONS = ('.mp3', '.flac', '.wav', '.aac', '.ogg', '.m4a', '.wma', '.ape', '.opus')
+    # Files whose duration differs from Spotify's by more than this are another version
+    DURATION_TOLERANCE_MS = 10000
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(self.SCHEMA)
+        self.connection.commit()
+    
+    def scan(self, roots: Iterable[str]) -> int:
+        """Index new and changed audio files under the roots and drop deleted ones; returns how many were read"""
+        roots = [os.path.abspath(root) for root in roots if root and os.path.isdir(root)]
+        on_disk = {}
+        for root in roots:
+            for entry in self._audio_entries(root):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                on_disk[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        
+        indexed = {}
+        for path, mtime_ns, size in self.connection.execute('SELECT path, mtime_ns, size FROM library_files'):
+            if any(path.startswith(root + os.sep) for root in roots):
+                indexed[path] = (mtime_ns, size)
+        
+        updated = 0
+        with self.connection:
+            self.connection.executemany('DELETE FROM library_files WHERE path = ?',
+                                        [(path,) for path in set(indexed) - set(on_disk)])
+            for path, stamp in on_disk.items():
+                if indexed.get(path) == stamp:
+                    continue
+                artist, title, album, duration_ms = self.describe(path)
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO library_files (path, mtime_ns, size, artist, title, album, '
+                    'duration_ms, title_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (path, stamp[0], stamp[1], artist, title, album, duration_ms, normalize_name(title)))
+                updated += 1
+        
+        if updated:
+            logger.info(f"Indexed {updated} library files ({len(on_disk)} total)")
+        return updated
+    
+    def _audio_entries(self, directory: str) -> Iterator[os.DirEntry]:
+        """Yield the audio files below a directory; scandir entries carry their stat results"""
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            logger.warning(f"Could not list {directory}: {str(e)}")
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._audio_entries(entry.path)
+            elif entry.name.lower().endswith(self.AUDIO_EXTENSIONS):
+                yield entry
+    
+    def describe(self, path: str) -> Tuple[str, str, str, Optional[int]]:
+        """Return (artist, title, album, duration in ms) of a file from its tags, else its name and folders"""
+        tags = self._read_tags(path)
+        guessed_artist, guessed_title, guessed_album = self.parse_path(path)
+        return (tags.get('artist') or guessed_artist, tags.get('title') or guessed_title,
+                tags.get('album') or guessed_album, tags.get('duration_ms'))
+    
+    def _read_tags(self, path: str) -> Dict[str, Any]:
+        """Read artist, title, album and duration tags with mutagen, when it is installed"""
+        if mutagen is None:
+            return {}
+        try:
+            audio = mutagen.File(path, easy=True)
+        except Exception as e:
+            logger.debug(f"Could not read tags of {path}: {str(e)}")
+            return {}
+        if audio is None:
+            return {}
+        tags = {}
+        for field in ('artist', 'title', 'album'):
+            values = (audio.tags or {}).get(field)
+            if values:
+                tags[field] = values[0]
+        length = getattr(audio.info, 'length', None)
+        if length:
+            tags['duration_ms'] = int(length * 1000)
+        return tags
+    
+    @staticmethod
+    def parse_path(path: str) -> Tuple[str, str, str]:
+        """Guess (artist, title, album) from 'Artist/Album/03 - Title.ext' or 'Artist - Title.ext'"""
+        folders = os.path.dirname(path).split(os.sep)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        number = FILE_NUMBER.match(stem)
+        if number:
+            stem = stem[number.end():].lstrip(' .-_')
+        
+        album = folders[-1] if folders else ''
+        artist = folders[-2] if len(folders) > 1 else ''
+        if ' - ' in album:
+            # 'Artist - Album (Year)' folders
+            artist, album = album.split(' - ', 1)
+        if ' - ' in stem and not number:
+            # Unnumbered loose files are usually 'Artist - Title'
+            artist, stem = stem.split(' - ', 1)
+        return artist.strip(), stem.strip(), album.strip()
+    
+    def find_track(self, track: Dict[str, Any]) -> Optional[str]:
+        """Return the path of a library file holding this track, or None"""
+        title_key = normalize_name(track.get('name') or '')
+        if not title_key:
+            return None
+        
+        # Any of the credited artists may be the one the file is tagged or filed under
+        artists = track.get('artists') or [track.get('artist') or '']
+        artist_word_sets = [set(re.findall(r'\w+', normalize_name(artist))) for artist in artists]
+        
+        rows = self.connection.execute(
+            'SELECT path, artist, duration_ms FROM library_files WHERE title_key = ?', (title_key,)).fetchall()
+        for path, artist, duration_ms in rows:
+            context = set(re.findall(r'\w+', normalize_title(f"{artist} {path}")))
+            if not any(words and words <= context for words in artist_word_sets):
+                continue
+            if duration_ms and track.get('duration_ms') and \
+                    abs(duration_ms - track['duration_ms']) > self.DURATION_TOLERANCE_MS:
+                continue
+            if os.path.exists(path):
+                return path
+        return None
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        self.connection.close()
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Persistent cache of track matches and misses across runs
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from typing import Dict, Any, Optional, List
+
+from .matching import clean_text
+
+logger = logging.getLogger(__name__)
+
+
+class MatchCache:
+    """SQLite-backed store of chosen matches, with a TTL-bound negative cache for misses"""
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS matches (
+            key TEXT PRIMARY KEY,
+            artist TEXT NOT NULL,
+            track TEXT NOT NULL,
+            topic_id TEXT,
+            score REAL,
+            match TEXT,
+            updated_at REAL NOT NULL
+        )
+    '''
+    
+    def __init__(self, db_path: str, negative_ttl: float = 3 * 24 * 3600):
+        self.db_path = db_path
+        self.negative_ttl = negative_ttl
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(self.SCHEMA)
+        self.connection.commit()
+    
+    @staticmethod
+    def track_keys(track: Dict[str, Any]) -> List[str]:
+        """Return the cache keys of a track, most specific first"""
+        keys = []
+        if track.get('id'):
+            keys.append(f"spotify:{track['id']}")
+        if track.get('isrc'):
+            # The same recording on another album or playlist
+            keys.append(f"isrc:{track['isrc'].upper()}")
+        normalized = '|'.join(clean_text(track.get(field) or '').lower()
+                              for field in ('artist', 'name', 'album'))
+        keys.append(f"text:{normalized}")
+        return keys
+    
+    def get(self, track: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Look up a track; returns {'match': dict or None} on a hit and None on a miss"""
+        for key in self.track_keys(track):
+            row = self.connection.execute(
+                'SELECT match, updated_at FROM matches WHERE key = ?', (key,)).fetchone()
+            if not row:
+                continue
+            match, updated_at = row
+            if match is None:
+                if time.time() - updated_at > self.negative_ttl:
+                    continue
+                return {'match': None}
+            return {'match': json.loads(match)}
+        return None
+    
+    def put(self, track: Dict[str, Any], match: Optional[Dict[str, Any]], topic_id: Optional[str] = None) -> None:
+        """Remember the chosen match for a track, or that nothing was found"""
+        encoded = None
+        score = None
+        if match:
+            stored = {field: match[field] for field in
+                      ('title', 'link', 'quality', 'type', 'priority', 'match_score') if field in match}
+            encoded = json.dumps(stored, ensure_ascii=False)
+            score = match.get('match_score')
+        
+        now = time.time()
+        with self.connection:
+            for key in self.track_keys(track):
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO matches (key, artist, track, topic_id, score, match, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, track.get('artist', ''), track.get('name', ''), topic_id, score, encoded, now))
+    
+    def invalidate(self, scope: str = 'all', artist: Optional[str] = None) -> int:
+        """Delete cached entries ('all', 'hits' or 'misses'), optionally for one artist only"""
+        conditions = []
+        params = []
+        if scope == 'hits':
+            conditions.append('match IS NOT NULL')
+        elif scope == 'misses':
+            conditions.append('match IS NULL')
+        elif scope != 'all':
+            raise ValueError(f"Unknown cache scope: {scope}")
+        if artist:
+            conditions.append('lower(artist) = lower(?)')
+            params.append(artist)
+        
+        query = 'DELETE FROM matches'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        with self.connection:
+            deleted = self.connection.execute(query, params).rowcount
+        logger.info(f"Invalidated {deleted} match cache entries")
+        return deleted
+    
+    def close(self) -> None:
+        """Close the underlying database"""
+        self.connection.close()
\ No newline at end of file
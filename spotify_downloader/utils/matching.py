@@ -2,16 +2,73 @@
 Matching engine for finding the best torrent matches
 """
 
+import os
 import re
-from typing import List, Dict, Any
-from difflib import SequenceMatcher
+import logging
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: pip install numpy
+    np = None
+
+from .assignment import max_weight_assignment
+from .file_table import FileTable
+from .normalize import normalize_name, normalize_query, normalize_title
+from .similarity import SimilarityBackend, get_backend
+from .token_index import TokenIndex
+
+logger = logging.getLogger(__name__)
+
+# Leading "03 - ", "03. " or "1-03 " disc/track number of a file name
+FILE_NUMBER = re.compile(r'^(?:(\d{1,2})-)?(\d{1,3})(?=[\s._-])')
+
+
+def clean_text(text: str) -> str:
+    """Clean problematic characters and normalize whitespace"""
+    # Remove special characters but keep alphanumeric, spaces, dots, and hyphens
+    cleaned = re.sub(r'[^\w\s.-]', '', text)
+    # Normalize whitespace
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    return cleaned
+
+
+def clean_query(text: str) -> str:
+    """Search form of a Spotify name: accents folded, decorations and problematic characters removed"""
+    return clean_text(normalize_query(text))
+
+
+def file_words(filename: str) -> Set[str]:
+    """Words of a normalized file name, splitting on dots, underscores and hyphens too"""
+    return set(normalize_title(filename).replace('.', ' ').replace('_', ' ').replace('-', ' ').split())
+
+
+def prepare_text(text: str) -> Optional[str]:
+    """Normalize one side of a similarity comparison, or None when it is empty"""
+    return text.lower().strip() if text else None
 
 
 class MatchingEngine:
     """Engine for matching Spotify tracks with torrent results"""
     
-    def __init__(self):
+    # Candidate sets larger than this go through a token index before fuzzy scoring
+    PREFILTER_MIN_CANDIDATES = 50
+    PREFILTER_TOP_N = 50
+    # File lists with at least this many audio files are narrowed down directory by directory first
+    TREE_MIN_FILES = 200
+    # Plausible bitrates (kbps) per format, for checking a file's size against the track duration
+    BITRATE_RANGES = {
+        '.mp3': (32, 330), '.aac': (32, 330), '.wma': (32, 330), '.ogg': (32, 500),
+        '.m4a': (32, 2500), '.flac': (200, 5000), '.wav': (700, 9300),
+    }
+    # Allowance for tags and embedded cover art
+    SIZE_SLACK_BYTES = 2 * 1024 * 1024
+    
+    def __init__(self, backend: Optional[Union[str, SimilarityBackend]] = None):
         self.audio_extensions = {'.mp3', '.flac', '.wav', '.aac', '.ogg', '.m4a', '.wma'}
+        self.backend = backend if isinstance(backend, SimilarityBackend) else get_backend(backend)
+        # Optional ScoringPool that takes over batches too large to score inline
+        self.pool = None
     
     def calculate_similarity(self, text1: str, text2: str) -> float:
         """Calculate similarity between two text strings"""
@@ -22,28 +79,119 @@ class MatchingEngine:
         text1 = text1.lower().strip()
         text2 = text2.lower().strip()
         
-        # Use difflib for similarity calculation
-        return SequenceMatcher(None, text1, text2).ratio()
+        # Use the configured backend for similarity calculation
+        return self.backend.ratio(text1, text2)
     
     def calculate_match_score(self, result: Dict[str, Any], target_artist: str, 
                             target_track: str, target_album: str) -> float:
         """Calculate a comprehensive match score for a result"""
-        title = result['title'].lower()
+        return self.score_with_target(result, self.compile_target(target_artist, target_track, target_album))
+    
+    def compile_target(self, target_artist: str, target_track: str, target_album: str) -> 'MatchTarget':
+        """Prepare a track's artist, title and album once for scoring many results"""
+        return MatchTarget(target_artist, target_track, target_album)
+    
+    def score_many(self, results: List[Dict[str, Any]], target: 'MatchTarget') -> List[float]:
+        """Calculate match scores for many results against one compiled target"""
+        if self.pool is not None and self.pool.should_offload(len(results)):
+            return self.pool.score_many(self, results, target)
+        return [self.score_with_target(result, target) for result in results]
+    
+    def score_candidates(self, results: List[Dict[str, Any]], target: 'MatchTarget') -> List[Dict[str, Any]]:
+        """Score the results worth scoring against a compiled target, setting their match_score"""
+        query = ' '.join(target.texts_for_index())
+        titles = [normalize_title(result['title']) for result in results]
+        survivors = [results[i] for i in self.prefilter(titles, query)]
+        if len(survivors) < len(results):
+            logger.debug(f"Prefilter kept {len(survivors)} of {len(results)} results for full scoring")
+        
+        for result, score in zip(survivors, self.score_many(survivors, target)):
+            result['match_score'] = score
+        return survivors
+    
+    def prefilter(self, texts: List[str], query: str, top_n: Optional[int] = None) -> List[int]:
+        """Return the indices of texts worth full fuzzy scoring, in their original order"""
+        if len(texts) <= self.PREFILTER_MIN_CANDIDATES:
+            return list(range(len(texts)))
+        
+        # Candidates sharing no meaningful token or n-gram with the target are dropped outright
+        survivors = TokenIndex(texts).query(query, top_n or self.PREFILTER_TOP_N)
+        return sorted(doc_id for doc_id, _ in survivors)
+    
+    def score_matrix(self, targets: List['MatchTarget'], results: List[Dict[str, Any]],
+                     top_k: int = 10) -> List[List[Tuple[int, float]]]:
+        """Score many targets against shared results, fuzzy-scoring only each target's top_k"""
+        # The cheap word-overlap part of the score ranks every (target, result) pair at once;
+        # each target then gets (result index, full match score) for its top_k results
+        if not targets or not results:
+            return [[] for _ in targets]
+        
+        prescores = self.word_overlap_scores(targets, results)
+        ranked = []
+        for i, target in enumerate(targets):
+            row = prescores[i]
+            if np is not None:
+                count = min(top_k, len(results))
+                top = np.argpartition(-row, count - 1)[:count].tolist()
+            else:
+                top = sorted(range(len(results)), key=lambda j: -row[j])[:top_k]
+            scores = [(j, self.score_with_target(results[j], target)) for j in top]
+            scores.sort(key=lambda item: (-item[1], item[0]))
+            ranked.append(scores)
+        return ranked
+    
+    def word_overlap_scores(self, targets: List['MatchTarget'], results: List[Dict[str, Any]]):
+        """Word-overlap and bonus part of the match score for every (target, result) pair"""
+        # Only words that occur in some target can contribute, so they form the vocabulary: its width
+        # follows the playlist, not the result corpus, and unlike hashed columns no two words collide
+        vocabulary = {}
+        for target in targets:
+            for word in target.artist_words | target.track_words:
+                vocabulary.setdefault(word, len(vocabulary))
+        title_columns = [[vocabulary[word] for word in set(normalize_title(result['title']).split()) if word in vocabulary]
+                         for result in results]
+        bonuses = [(0.1 if result['quality'] == 'lossless' else 0) + (0.05 if result['type'] == 'single' else 0)
+                   for result in results]
+        
+        if np is None:
+            rows = []
+            for target in targets:
+                artist_columns = {vocabulary[word] for word in target.artist_words}
+                track_columns = {vocabulary[word] for word in target.track_words}
+                rows.append([
+                    len(artist_columns.intersection(columns)) / max(len(artist_columns), 1) * 0.1 +
+                    len(track_columns.intersection(columns)) / max(len(track_columns), 1) * 0.1 +
+                    bonus
+                    for columns, bonus in zip(title_columns, bonuses)
+                ])
+            return rows
+        
+        # Binary target and title vectors; one matrix product counts the shared words of every pair
+        artist_matrix = np.zeros((len(targets), len(vocabulary)), dtype=np.float32)
+        track_matrix = np.zeros((len(targets), len(vocabulary)), dtype=np.float32)
+        for i, target in enumerate(targets):
+            artist_matrix[i, [vocabulary[word] for word in target.artist_words]] = 1
+            track_matrix[i, [vocabulary[word] for word in target.track_words]] = 1
+        title_matrix = np.zeros((len(results), len(vocabulary)), dtype=np.float32)
+        for j, columns in enumerate(title_columns):
+            title_matrix[j, columns] = 1
+        
+        artist_overlap = (artist_matrix @ title_matrix.T) / np.maximum(artist_matrix.sum(axis=1), 1)[:, None]
+        track_overlap = (track_matrix @ title_matrix.T) / np.maximum(track_matrix.sum(axis=1), 1)[:, None]
+        return artist_overlap * 0.1 + track_overlap * 0.1 + np.asarray(bonuses, dtype=np.float32)[None, :]
+    
+    def score_with_target(self, result: Dict[str, Any], target: 'MatchTarget') -> float:
+        """Calculate a comprehensive match score for a result against a compiled target"""
+        title = normalize_title(result['title'])
         
-        # Calculate individual similarity scores
-        artist_score = self.calculate_similarity(target_artist.lower(), title)
-        track_score = self.calculate_similarity(target_track.lower(), title)
-        album_score = self.calculate_similarity(target_album.lower(), title)
+        # Calculate individual similarity scores, analysing the title only once
+        artist_score, track_score, album_score = self._similarities(target.texts, title)
         
         # Check for exact word matches (higher weight)
-        artist_words = set(target_artist.lower().split())
-        track_words = set(target_track.lower().split())
-        album_words = set(target_album.lower().split())
         title_words = set(title.split())
         
-        artist_word_matches = len(artist_words.intersection(title_words)) / max(len(artist_words), 1)
-        track_word_matches = len(track_words.intersection(title_words)) / max(len(track_words), 1)
-        album_word_matches = len(album_words.intersection(title_words)) / max(len(album_words), 1)
+        artist_word_matches = len(target.artist_words.intersection(title_words)) / max(len(target.artist_words), 1)
+        track_word_matches = len(target.track_words.intersection(title_words)) / max(len(target.track_words), 1)
         
         # Combined score with weights
         # Artist and track are most important, album is secondary
@@ -63,54 +211,250 @@ class MatchingEngine:
         
         return final_score
     
-    def find_matching_files(self, files: List[Dict[str, Any]], target_track: str, 
-                          target_artist: str) -> List[Dict[str, Any]]:
-        """Find files that match the target track and artist"""
+    def is_confident(self, result: Dict[str, Any], target: 'MatchTarget') -> bool:
+        """Whether a result's title names every word of the target's artist and track"""
+        required = set(re.findall(r'\w+', target.artist)) | set(re.findall(r'\w+', target.track))
+        return bool(required) and required.issubset(re.findall(r'\w+', normalize_title(result['title'])))
+    
+    def _similarities(self, texts: Tuple[Optional[str], ...], text2: str) -> List[float]:
+        """Calculate the similarity of several prepared strings to one text, same as calculate_similarity"""
+        if not text2:
+            return [0.0] * len(texts)
+        return self.backend.ratios(texts, text2.lower().strip())
+    
+    def find_track_files(self, files: Union[List[Dict[str, Any]], FileTable],
+                         track: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Find files that match a Spotify track, using its album, number and duration when known"""
+        return self.find_matching_files(files, track['name'], track['artist'], track.get('album', ''),
+                                        track.get('track_number'), track.get('disc_number'), track.get('duration_ms'))
+    
+    def find_matching_files(self, files: Union[List[Dict[str, Any]], FileTable], target_track: str, 
+                          target_artist: str, target_album: str = '', track_number: Optional[int] = None,
+                          disc_number: Optional[int] = None, duration_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Find files that match the target track and artist, as fresh dicts with a match_score"""
+        # Matching runs on the arrays of a FileTable; dicts are only built for the files returned
+        table = files if isinstance(files, FileTable) else FileTable.from_dicts(files)
+        positions = self._match_table(table, target_track, target_artist, target_album,
+                                      (track_number, disc_number), duration_ms)
+        
         matching_files = []
+        for position in positions:
+            file_info = table.as_dict(position) if table is files else dict(files[position])
+            file_info['match_score'] = table.scores[position]
+            matching_files.append(file_info)
+        return matching_files
+    
+    def _match_table(self, table: FileTable, target_track: str, target_artist: str, target_album: str,
+                     numbers: Tuple[Optional[int], Optional[int]], duration_ms: Optional[int]) -> List[int]:
+        """Return the positions of the matching files of a table, best first"""
+        # Skip non-audio files
+        names = table.names
+        extensions = tuple(self.audio_extensions)
+        audio = [position for position, name in enumerate(names) if name.lower().endswith(extensions)]
         
-        for file_info in files:
-            filename = file_info['name'].lower()
-            filepath = file_info['path'].lower()
+        # Cheap numeric check first: drop files too small or too large for the track's duration
+        if duration_ms:
+            plausible = [position for position in audio
+                         if self.plausible_length(names[position], table.lengths[position], duration_ms)]
+            if plausible:
+                audio = plausible
+        
+        if len(audio) < self.TREE_MIN_FILES:
+            return self._match_files(table, audio, target_track, target_artist, numbers)
+        
+        # Large torrents: only look inside the directories that name the album or artist
+        kept = self._kept_directories({table.directory(position) for position in audio}, target_artist, target_album)
+        promising = [position for position in audio if table.directory(position) in kept]
+        if len(promising) < len(audio):
+            logger.debug(f"Directory pruning kept {len(promising)} of {len(audio)} files")
+        matching = self._match_files(table, promising, target_track, target_artist, numbers)
+        if not matching and len(promising) < len(audio):
+            # The promising directories did not hold the track after all
+            logger.debug(f"No match among {len(promising)} files in promising directories, scanning all")
+            matching = self._match_files(table, audio, target_track, target_artist, numbers)
+        return matching
+    
+    def plausible_length(self, name: str, length: Optional[int], duration_ms: int) -> bool:
+        """Whether a file of this name and byte length can hold a track of this duration"""
+        extension = os.path.splitext(name)[1].lower()
+        if extension not in self.BITRATE_RANGES or not length:
+            return True
+        low, high = self.BITRATE_RANGES[extension]
+        seconds = duration_ms / 1000
+        return seconds * low * 125 * 0.9 <= length <= seconds * high * 125 + self.SIZE_SLACK_BYTES
+    
+    @staticmethod
+    def file_number(filename: str) -> Tuple[Optional[int], Optional[int]]:
+        """Return the (disc, track) number prefix of a file name like '03 - ...' or '1-03. ...'"""
+        match = FILE_NUMBER.match(filename)
+        if not match:
+            return None, None
+        disc, number = match.groups()
+        return (int(disc) if disc else None), int(number)
+    
+    def assign_files(self, files: Union[List[Dict[str, Any]], FileTable], tracks: List[Dict[str, str]],
+                     candidates_per_track: int = 5) -> List[Optional[Dict[str, Any]]]:
+        """Match several tracks against one file list at once, giving no file to two different tracks"""
+        # The same song listed twice in a playlist should still share its file
+        keys = [(normalize_name(track['name']), normalize_name(track['artist'])) for track in tracks]
+        representative: Dict[Tuple[str, str], Dict[str, str]] = {}
+        for key, track in zip(keys, tracks):
+            representative.setdefault(key, track)
+        unique = list(representative)
+        
+        # Each track's best few files become the columns of one assignment problem; a plain
+        # list is packed into a table once instead of once per track
+        table = files if isinstance(files, FileTable) else FileTable.from_dicts(files)
+        track_matches = []
+        columns: Dict[int, int] = {}
+        for key in unique:
+            track = representative[key]
+            matches = self.find_track_files(table, track)[:candidates_per_track]
+            if table is not files:
+                matches = [dict(files[file_info['index']], match_score=file_info['match_score']) for file_info in matches]
+            track_matches.append({file_info['index']: file_info for file_info in matches})
+            for file_index in track_matches[-1]:
+                columns.setdefault(file_index, len(columns))
+        
+        weights = [[None] * len(columns) for _ in unique]
+        for row, matches in enumerate(track_matches):
+            for file_index, file_info in matches.items():
+                weights[row][columns[file_index]] = file_info['match_score']
+        
+        file_indices = list(columns)
+        chosen = {}
+        for key, matches, column in zip(unique, track_matches, max_weight_assignment(weights)):
+            chosen[key] = matches[file_indices[column]] if column is not None else None
+        return [chosen[key] for key in keys]
+    
+    def _kept_directories(self, directories: Set[str], target_artist: str, target_album: str = '') -> Set[str]:
+        """Return the directories (paths without the file name) naming the album, or else the artist,
+        chosen level by level"""
+        album_words = set(re.findall(r'\w+', normalize_name(target_album))) if target_album else set()
+        artist_words = set(re.findall(r'\w+', normalize_name(target_artist))) if target_artist else set()
+        kept = set()
+        
+        def walk(entries: List[Tuple[List[str], str]], depth: int) -> None:
+            subdirs: Dict[str, List[Tuple[List[str], str]]] = {}
+            for parts, directory in entries:
+                if len(parts) == depth:
+                    kept.add(directory)
+                else:
+                    subdirs.setdefault(parts[depth], []).append((parts, directory))
             
-            # Skip non-audio files
-            if not any(filename.endswith(ext) for ext in self.audio_extensions):
-                continue
+            # Each directory name is scored once for all files below it; when no
+            # sibling names the target (e.g. CD1/CD2), every subtree stays in
+            words = {name: set(re.findall(r'\w+', normalize_title(name))) for name in subdirs}
+            promising = ([name for name in subdirs if album_words and album_words <= words[name]] or
+                         [name for name in subdirs if artist_words and artist_words <= words[name]] or
+                         list(subdirs))
+            for name in promising:
+                walk(subdirs[name], depth + 1)
+        
+        walk([(directory.split('/') if directory else [], directory) for directory in directories], 0)
+        return kept
+    
+    def _match_files(self, table: FileTable, positions: List[int], target_track: str, target_artist: str,
+                     numbers: Tuple[Optional[int], Optional[int]] = (None, None)) -> List[int]:
+        """Score audio files against a track, trying files numbered like the track first"""
+        track_number, disc_number = numbers
+        if track_number:
+            numbered = []
+            for position in positions:
+                disc, number = self.file_number(table.names[position])
+                if number == track_number and (disc is None or not disc_number or disc == disc_number):
+                    numbered.append(position)
+            if numbered and len(numbered) < len(positions):
+                # A numbered file naming the whole title is taken without scoring the rest
+                matching = self._scored_matches(table, numbered, target_track, target_artist)
+                if matching and set(normalize_name(target_track).split()) <= file_words(table.names[matching[0]]):
+                    return matching
+        return self._scored_matches(table, positions, target_track, target_artist)
+    
+    def _scored_matches(self, table: FileTable, positions: List[int], target_track: str,
+                        target_artist: str) -> List[int]:
+        """Score audio files against a track and return those above the threshold, best first"""
+        # Keep only files sharing tokens with the target
+        paths = [normalize_title(table.path(position)) for position in positions]
+        query = f"{normalize_name(target_track)} {normalize_name(target_artist)}"
+        survivors = [positions[i] for i in self.prefilter(paths, query)]
+        
+        # Only the survivors are materialized for scoring
+        files = [table.as_dict(position) for position in survivors]
+        if self.pool is not None and self.pool.should_offload(len(files)):
+            scores = self.pool.score_files(self, files, target_track, target_artist)
+        else:
+            scores = self.score_files(files, target_track, target_artist)
+        
+        matching = []
+        for position, combined_score in zip(survivors, scores):
+            table.scores[position] = combined_score
+            
+            # Consider it a match if score is above threshold
+            if combined_score > 0.3:  # Adjustable threshold
+                matching.append(position)
+        
+        # Sort by match score (highest first)
+        matching.sort(key=lambda position: table.scores[position], reverse=True)
+        
+        return matching
+    
+    def score_files(self, files: List[Dict[str, Any]], target_track: str, target_artist: str) -> List[float]:
+        """Calculate the match score of each torrent file against a track"""
+        scores = []
+        
+        # Prepare the target once for every file
+        target_track = normalize_name(target_track)
+        target_artist = normalize_name(target_artist)
+        target_texts = (prepare_text(target_track), prepare_text(target_artist))
+        track_words = set(target_track.split())
+        artist_words = set(target_artist.split())
+        
+        for file_info in files:
+            filename = normalize_title(file_info['name'])
+            filepath = normalize_title(file_info['path'])
             
             # Calculate similarity scores
-            track_score = self.calculate_similarity(target_track.lower(), filename)
-            artist_score = self.calculate_similarity(target_artist.lower(), filename)
+            track_score, artist_score = self._similarities(target_texts, filename)
             
             # Also check the full path for matches
-            path_track_score = self.calculate_similarity(target_track.lower(), filepath)
-            path_artist_score = self.calculate_similarity(target_artist.lower(), filepath)
+            path_track_score, path_artist_score = self._similarities(target_texts, filepath)
             
             # Use the best scores
             best_track_score = max(track_score, path_track_score)
             best_artist_score = max(artist_score, path_artist_score)
             
             # Check for exact word matches
-            track_words = set(target_track.lower().split())
-            artist_words = set(target_artist.lower().split())
-            file_words = set(filename.replace('.', ' ').replace('_', ' ').replace('-', ' ').split())
+            words = file_words(file_info['name'])
             
-            track_word_matches = len(track_words.intersection(file_words))
-            artist_word_matches = len(artist_words.intersection(file_words))
+            track_word_matches = len(track_words.intersection(words))
+            artist_word_matches = len(artist_words.intersection(words))
             
             # Combined score
-            combined_score = (
+            scores.append(
                 best_track_score * 0.4 +
                 best_artist_score * 0.3 +
                 (track_word_matches / max(len(track_words), 1)) * 0.2 +
                 (artist_word_matches / max(len(artist_words), 1)) * 0.1
             )
-            
-            file_info['match_score'] = combined_score
-            
-            # Consider it a match if score is above threshold
-            if combined_score > 0.3:  # Adjustable threshold
-                matching_files.append(file_info)
-        
-        # Sort by match score (highest first)
-        matching_files.sort(key=lambda x: x['match_score'], reverse=True)
         
-        return matching_files
\ No newline at end of file
+        return scores
+
+
+class MatchTarget:
+    """A track's artist, title and album, normalized once for scoring many candidates"""
+    
+    __slots__ = ('artist', 'track', 'album', 'texts', 'artist_words', 'track_words', 'album_words')
+    
+    def __init__(self, artist: str, track: str, album: str):
+        self.artist = normalize_name(artist)
+        self.track = normalize_name(track)
+        self.album = normalize_name(album)
+        self.texts = (prepare_text(self.artist), prepare_text(self.track), prepare_text(self.album))
+        self.artist_words = set(self.artist.split())
+        self.track_words = set(self.track.split())
+        self.album_words = set(self.album.split())
+    
+    def texts_for_index(self) -> Tuple[str, str, str]:
+        """Return the target's artist, title and album for token-index queries"""
+        return self.artist, self.track, self.album
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Unicode, transliteration and decoration normalization shared by searching and matching
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+# Russian and Ukrainian letters to Latin, close to how RuTracker uploaders romanize names
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'і': 'i', 'ї': 'yi', 'є': 'ye', 'ґ': 'g',
+}
+TRANSLITERATION = str.maketrans(CYRILLIC_TO_LATIN)
+
+# Letters NFKD does not decompose into a base letter and a mark
+SPECIAL_LETTERS = str.maketrans({
+    'ß': 'ss', 'ø': 'o', 'Ø': 'O', 'æ': 'ae', 'Æ': 'AE', 'œ': 'oe', 'Œ': 'OE',
+    'ł': 'l', 'Ł': 'L', 'đ': 'd', 'Đ': 'D', 'ð': 'd', 'þ': 'th',
+})
+
+# Featured artists and remaster notes Spotify appends to names but uploaders rarely repeat
+DECORATIONS = re.compile(
+    r'\s*[(\[]\s*(?:feat\.?|ft\.?|featuring|with)\s[^)\]]*[)\]]'
+    r'|\s+(?:feat\.|ft\.|featuring)\s.*$'
+    r'|\s*[(\[][^)\]]*\bremaster(?:ed)?\b[^)\]]*[)\]]'
+    r'|\s+-\s+[^-]*\bremaster(?:ed)?\b.*$',
+    re.IGNORECASE
+)
+
+
+def is_cyrillic(char: str) -> bool:
+    """Whether a character belongs to the Cyrillic block"""
+    return 'Ѐ' <= char <= 'ӿ'
+
+
+@lru_cache(maxsize=65536)
+def fold_diacritics(text: str) -> str:
+    """Strip accents from Latin letters (Beyoncé -> Beyonce), leaving Cyrillic letters intact"""
+    if text.isascii():
+        return text
+    folded = []
+    for char in text.translate(SPECIAL_LETTERS):
+        if is_cyrillic(char):
+            # NFKD would turn й into и plus a breve
+            folded.append(char)
+            continue
+        folded.extend(c for c in unicodedata.normalize('NFKD', char) if not unicodedata.combining(c))
+    return ''.join(folded)
+
+
+@lru_cache(maxsize=65536)
+def transliterate(text: str) -> str:
+    """Romanize Cyrillic letters of a lowercase text"""
+    if text.isascii():
+        return text
+    return text.translate(TRANSLITERATION)
+
+
+@lru_cache(maxsize=65536)
+def strip_decorations(text: str) -> str:
+    """Remove "feat. X" and remaster notes from a track, album or artist name"""
+    stripped = DECORATIONS.sub('', text)
+    return stripped if stripped.strip() else text
+
+
+@lru_cache(maxsize=65536)
+def normalize_title(text: str) -> str:
+    """Lowercase, romanized, accent-free form of a torrent title or file path"""
+    return fold_diacritics(transliterate(text.lower()))
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(text: str) -> str:
+    """Matching form of a Spotify artist, track or album name"""
+    return normalize_title(strip_decorations(text))
+
+
+@lru_cache(maxsize=65536)
+def normalize_query(text: str) -> str:
+    """Search form of a Spotify name: decorations removed and accents folded, script kept"""
+    return fold_diacritics(strip_decorations(text))
\ No newline at end of file
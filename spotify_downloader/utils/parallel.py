@@ -0,0 +1,86 @@
+"""
+Process pool for CPU-bound match scoring
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from .matching import MatchingEngine, MatchTarget
+
+logger = logging.getLogger(__name__)
+
+# One engine per worker process, created on first use
+_worker_engines: Dict[str, MatchingEngine] = {}
+
+
+def _worker_engine(backend_name: str) -> MatchingEngine:
+    """Return this worker's matching engine for a similarity backend"""
+    engine = _worker_engines.get(backend_name)
+    if engine is None:
+        engine = _worker_engines[backend_name] = MatchingEngine(backend_name)
+    return engine
+
+
+def _score_chunk(args: Tuple[str, MatchTarget, List[Dict[str, Any]]]) -> List[float]:
+    """Score one chunk of results against a target inside a worker"""
+    backend_name, target, results = args
+    return _worker_engine(backend_name).score_many(results, target)
+
+
+def _score_files_chunk(args: Tuple[str, str, str, List[Dict[str, Any]]]) -> List[float]:
+    """Score one chunk of torrent files against a track inside a worker"""
+    backend_name, target_track, target_artist, files = args
+    engine = _worker_engine(backend_name)
+    return engine.score_files(files, target_track, target_artist)
+
+
+class ScoringPool:
+    """Persistent process pool that scores large batches in chunks, leaving small ones inline"""
+    
+    # min_batch counts the items actually sent to the workers; below it, pickling and process round
+    # trips cost more than the scoring they save. Prefiltered batches (at most PREFILTER_TOP_N) stay inline
+    def __init__(self, workers: int, chunk_size: int = 64, min_batch: int = 256):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.min_batch = min_batch
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def should_offload(self, batch_size: int) -> bool:
+        """Whether a batch is large enough to be worth sending to the workers"""
+        return self.workers > 0 and batch_size >= self.min_batch
+    
+    def score_many(self, engine: MatchingEngine, results: List[Dict[str, Any]],
+                   target: MatchTarget) -> List[float]:
+        """Score results against a target across the worker processes"""
+        size = self._chunk_length(len(results))
+        chunks = [(engine.backend.name, target, results[i:i + size]) for i in range(0, len(results), size)]
+        return self._map(_score_chunk, chunks)
+    
+    def score_files(self, engine: MatchingEngine, files: List[Dict[str, Any]], target_track: str,
+                    target_artist: str) -> List[float]:
+        """Score torrent files against a track across the worker processes"""
+        size = self._chunk_length(len(files))
+        chunks = [(engine.backend.name, target_track, target_artist, files[i:i + size])
+                  for i in range(0, len(files), size)]
+        return self._map(_score_files_chunk, chunks)
+    
+    def _chunk_length(self, batch_size: int) -> int:
+        """Chunk length that gives every worker a share of the batch, at most chunk_size"""
+        return max(1, min(self.chunk_size, -(-batch_size // self.workers)))
+    
+    def close(self) -> None:
+        """Shut the worker processes down"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def _map(self, func, chunks) -> List[float]:
+        """Run func over the chunks in the pool and flatten the scores in order"""
+        if self._executor is None:
+            logger.info(f"Starting scoring pool with {self.workers} workers")
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        scores = []
+        for chunk_scores in self._executor.map(func, chunks):
+            scores.extend(chunk_scores)
+        return scores
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+Acquisition planning across all tracks of a playlist
+"""
+
+import logging
+from typing import List, Dict, Any, Optional, Callable
+
+from .file_table import FileTable
+from .matching import MatchingEngine, clean_query
+
+logger = logging.getLogger(__name__)
+
+
+class AcquisitionPlanner:
+    """Choose a small set of torrents that covers the whole playlist"""
+    
+    # Typical size of one track, used when a torrent's file list is not known locally
+    ESTIMATED_TRACK_BYTES = {
+        'lossless': 30 * 1024 * 1024,
+        'lossy': 8 * 1024 * 1024,
+    }
+    ESTIMATED_ALBUM_TRACKS = 12
+    
+    def __init__(self, matching_engine: Optional[MatchingEngine] = None, score_tolerance: float = 0.1,
+                 candidates_per_track: int = 5, cross_candidates: int = 10, torrent_cost: float = 1.0,
+                 gigabyte_cost: float = 0.5, selective: bool = True):
+        self.matching_engine = matching_engine or MatchingEngine()
+        self.score_tolerance = score_tolerance
+        self.candidates_per_track = candidates_per_track
+        self.cross_candidates = cross_candidates
+        self.torrent_cost = torrent_cost
+        self.gigabyte_cost = gigabyte_cost
+        self.selective = selective
+    
+    def plan(self, tracks: List[Dict[str, str]], candidates: List[List[Dict[str, Any]]],
+             file_list_provider: Optional[Callable[[Dict[str, Any]], Optional[List[Dict[str, Any]]]]] = None
+             ) -> List[Optional[Dict[str, Any]]]:
+        """Return the chosen candidate for each track, or None when a track has no candidates"""
+        pool = self._build_pool(candidates)
+        file_lists = {}
+        if file_list_provider:
+            for link, candidate in pool.items():
+                file_lists[link] = file_list_provider(candidate)
+        
+        # Album torrents may stand in for other tracks; score every track against them at once
+        active = [i for i in range(len(tracks)) if candidates[i]]
+        album_links = [link for link, candidate in pool.items() if candidate.get('type') == 'album']
+        targets = [self.matching_engine.compile_target(clean_query(tracks[i]['artist']), clean_query(tracks[i]['name']),
+                                                       clean_query(tracks[i]['album'])) for i in active]
+        cross_scores = self.matching_engine.score_matrix(
+            targets, [pool[link] for link in album_links], self.cross_candidates)
+        
+        # For every pooled torrent, find the tracks it can stand in for and what each would cost
+        coverage = {link: {} for link in pool}
+        for i, ranked in zip(active, cross_scores):
+            track = tracks[i]
+            best_score = candidates[i][0]['match_score']
+            scores = {album_links[j]: score for j, score in ranked}
+            # A single can only stand in for the tracks whose own search found it
+            scores.update((candidate['link'], candidate['match_score']) for candidate in candidates[i]
+                          if candidate['link'] in pool)
+            
+            for link, score in scores.items():
+                if score < best_score - self.score_tolerance:
+                    continue
+                
+                files = file_lists.get(link)
+                matching_file = self._matching_file(track, files) if files else None
+                if files and not matching_file:
+                    # The file list is known and does not contain this track
+                    continue
+                coverage[link][i] = (score, self._selected_bytes(pool[link], matching_file))
+        
+        # Greedy weighted set cover: repeatedly take the torrent with the best quality per cost
+        choices = [None] * len(tracks)
+        uncovered = {i for i in range(len(tracks)) if candidates[i]}
+        while uncovered:
+            best_link, best_value, best_tracks = None, 0.0, []
+            for link, covered in coverage.items():
+                gain_tracks = [i for i in covered if i in uncovered]
+                if not gain_tracks:
+                    continue
+                quality = sum(covered[i][0] for i in gain_tracks)
+                if self.selective:
+                    selected_bytes = sum(covered[i][1] for i in gain_tracks)
+                else:
+                    selected_bytes = self._torrent_bytes(pool[link], file_lists.get(link))
+                gigabytes = selected_bytes / (1024 ** 3)
+                value = quality / (self.torrent_cost + self.gigabyte_cost * gigabytes)
+                if best_link is None or value > best_value:
+                    best_link, best_value, best_tracks = link, value, gain_tracks
+            
+            if best_link is None:
+                break
+            
+            for i in best_tracks:
+                choices[i] = dict(pool[best_link], match_score=coverage[best_link][i][0])
+                uncovered.discard(i)
+        
+        torrents = {choice['link'] for choice in choices if choice}
+        logger.info(f"Planned {len(torrents)} torrents for {sum(1 for c in choices if c)} matched tracks")
+        return choices
+    
+    def _build_pool(self, candidates: List[List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """Collect each track's viable candidates into one pool keyed by link"""
+        pool = {}
+        for track_candidates in candidates:
+            if not track_candidates:
+                continue
+            best_score = track_candidates[0]['match_score']
+            for candidate in track_candidates[:self.candidates_per_track]:
+                if candidate['match_score'] < best_score - self.score_tolerance:
+                    break
+                pool.setdefault(candidate['link'], candidate)
+        return pool
+    
+    def download_bytes(self, track: Dict[str, str], candidate: Dict[str, Any],
+                       files: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Estimate what downloading a track from a candidate costs: its file, or the whole torrent"""
+        if not self.selective:
+            return self._torrent_bytes(candidate, files)
+        return self._selected_bytes(candidate, self._matching_file(track, files) if files else None)
+    
+    def _matching_file(self, track: Dict[str, str], files: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Return the file of a torrent that best matches the track, if any"""
+        matching_files = self.matching_engine.find_track_files(files, track)
+        return matching_files[0] if matching_files else None
+    
+    def _selected_bytes(self, candidate: Dict[str, Any], matching_file: Optional[Dict[str, Any]]) -> int:
+        """Estimate how many bytes selecting this track's file from the torrent would download"""
+        if not self.selective:
+            return 0
+        if matching_file:
+            return matching_file['length']
+        return self.ESTIMATED_TRACK_BYTES.get(candidate.get('quality'), self.ESTIMATED_TRACK_BYTES['lossy'])
+    
+    def _torrent_bytes(self, candidate: Dict[str, Any], files: Optional[List[Dict[str, Any]]]) -> int:
+        """Estimate the size of the whole torrent"""
+        if files:
+            if isinstance(files, FileTable):
+                return files.total_size()
+            return sum(file_info['length'] for file_info in files)
+        track_bytes = self.ESTIMATED_TRACK_BYTES.get(candidate.get('quality'), self.ESTIMATED_TRACK_BYTES['lossy'])
+        if candidate.get('type') == 'album':
+            return track_bytes * self.ESTIMATED_ALBUM_TRACKS
+        return track_bytes
\ No newline at end of file
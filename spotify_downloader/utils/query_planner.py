@@ -0,0 +1,142 @@
+"""
+Per-strategy search statistics, used to order a track's searches by how often each one wins
+"""
+
+import os
+import re
+import sqlite3
+import logging
+from typing import Dict, Any, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Search strategies in the fixed order used before any statistics exist
+STRATEGIES = ('artist_track', 'artist_album', 'artist', 'track', 'album', 'artist_word')
+
+STRATEGY_LABELS = {
+    'artist_track': 'artist + track',
+    'artist_album': 'artist + album',
+    'artist': 'artist',
+    'track': 'track',
+    'album': 'album',
+    'artist_word': 'simplified artist',
+}
+
+CYRILLIC = re.compile(r'[\u0400-\u04FF]')
+
+
+class QueryPlanner:
+    """Records requests, hits and wins per strategy and track kind, and orders strategies by win rate"""
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS strategy_stats (
+            feature TEXT NOT NULL,
+            strategy TEXT NOT NULL,
+            requests INTEGER NOT NULL DEFAULT 0,
+            hits INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (feature, strategy)
+        )
+    '''
+    
+    # Win rates assumed before any runs, worth PRIOR_WEIGHT requests; they reproduce the fixed order
+    PRIOR = {'artist_track': 0.5, 'artist_album': 0.3, 'artist': 0.2, 'track': 0.1, 'album': 0.05,
+             'artist_word': 0.02}
+    PRIOR_WEIGHT = 5
+    # Share of searches assumed to return a title naming the artist and track, for run estimates
+    PRIOR_HIT_RATE = 0.3
+    # Strategies that won less often than this after MIN_REQUESTS searches only run when nothing else found a result
+    MIN_REQUESTS = 20
+    SKIP_WIN_RATE = 0.02
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(self.SCHEMA)
+        self.connection.commit()
+    
+    @staticmethod
+    def features(track: Dict[str, Any]) -> str:
+        """Kind of track whose strategies behave alike: script of its names and whether it is from a single"""
+        script = 'cyrillic' if CYRILLIC.search(f"{track.get('artist', '')} {track.get('name', '')}") else 'latin'
+        release = 'single' if track.get('album_type') == 'single' else 'album'
+        return f"{script}:{release}"
+    
+    def _bump(self, track: Dict[str, Any], strategy: str, requests: int, hits: int, wins: int) -> None:
+        """Add to a strategy's counters for the track's kind"""
+        try:
+            with self.connection:
+                self.connection.execute(
+                    'INSERT INTO strategy_stats (feature, strategy, requests, hits, wins) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (feature, strategy) DO UPDATE SET requests = requests + excluded.requests, '
+                    'hits = hits + excluded.hits, wins = wins + excluded.wins',
+                    (self.features(track), strategy, requests, hits, wins))
+        except Exception as e:
+            logger.error(f"Error updating strategy statistics: {str(e)}")
+    
+    def record_search(self, track: Dict[str, Any], strategy: str, hit: bool) -> None:
+        """Count one search request, and whether it returned a title naming the artist and track"""
+        self._bump(track, strategy, 1, int(hit), 0)
+    
+    def record_win(self, track: Dict[str, Any], strategy: str) -> None:
+        """Count the strategy whose result was finally chosen for a track"""
+        if strategy in STRATEGIES:
+            self._bump(track, strategy, 0, 0, 1)
+    
+    def stats(self, feature: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Return {feature: {strategy: requests, hits, wins, hit_rate, win_rate}}"""
+        query = 'SELECT feature, strategy, requests, hits, wins FROM strategy_stats'
+        params = ()
+        if feature is not None:
+            query += ' WHERE feature = ?'
+            params = (feature,)
+        
+        stats = {}
+        for row_feature, strategy, requests, hits, wins in self.connection.execute(query, params):
+            stats.setdefault(row_feature, {})[strategy] = {
+                'requests': requests,
+                'hits': hits,
+                'wins': wins,
+                'hit_rate': hits / requests if requests else 0.0,
+                'win_rate': wins / requests if requests else 0.0,
+            }
+        return stats
+    
+    def hit_rate(self, track: Dict[str, Any], strategy: str) -> float:
+        """Smoothed chance that a search with this strategy returns a confident title for such a track"""
+        feature = self.features(track)
+        counts = self.stats(feature).get(feature, {}).get(strategy, {})
+        return ((counts.get('hits', 0) + self.PRIOR_HIT_RATE * self.PRIOR_WEIGHT) /
+                (counts.get('requests', 0) + self.PRIOR_WEIGHT))
+    
+    def order(self, track: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        """Return (strategies to try best first, strategies kept for when the others find nothing)"""
+        feature = self.features(track)
+        stats = self.stats(feature).get(feature, {})
+        
+        def win_rate(strategy: str) -> float:
+            """Smoothed chance that one request with this strategy finds the chosen match"""
+            counts = stats.get(strategy, {})
+            return ((counts.get('wins', 0) + self.PRIOR[strategy] * self.PRIOR_WEIGHT) /
+                    (counts.get('requests', 0) + self.PRIOR_WEIGHT))
+        
+        # Every search costs one request, so the best order tries the likeliest winners first
+        ranked = sorted(STRATEGIES, key=win_rate, reverse=True)
+        reserve = [strategy for strategy in ranked
+                   if stats.get(strategy, {}).get('requests', 0) >= self.MIN_REQUESTS
+                   and win_rate(strategy) < self.SKIP_WIN_RATE]
+        planned = [strategy for strategy in ranked if strategy not in reserve]
+        if not planned:
+            planned, reserve = reserve[:1], reserve[1:]
+        
+        if ranked != list(STRATEGIES) or reserve:
+            logger.debug(f"Strategy order for {feature}: {', '.join(planned)}"
+                         f"{' (reserve: ' + ', '.join(reserve) + ')' if reserve else ''}")
+        return planned, reserve
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        self.connection.close()
\ No newline at end of file
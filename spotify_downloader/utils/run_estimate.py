@@ -0,0 +1,59 @@
+"""
+Request, byte and time estimates of a run, counted from local data only
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass
+class RunEstimate:
+    """What a real run would do for a playlist, and how long it would take"""
+    
+    tracks: int = 0
+    present: int = 0  # Already in the music library
+    cached: int = 0  # Answered by the match cache, including remembered misses
+    in_torrents: int = 0  # Found in already downloaded torrents
+    from_catalog: int = 0  # Answered from earlier search rows
+    to_search: int = 0  # Tracks that need get_candidates
+    
+    logins: int = 0
+    searches: float = 0.0  # Expected search requests
+    topic_fetches: int = 0  # File-list requests made while verifying candidates
+    torrent_downloads: int = 0  # Topics whose .torrent is not stored yet (page + file request each)
+    transmission_adds: int = 0
+    download_bytes: int = 0
+    
+    # Requests of one login (form and post) and one .torrent download (topic page and file)
+    LOGIN_REQUESTS = 2
+    DOWNLOAD_REQUESTS = 2
+    # Typical response time of one RuTracker request, on top of the configured delay
+    REQUEST_SECONDS = 1.5
+    
+    @property
+    def requests(self) -> float:
+        """Expected number of requests to RuTracker"""
+        return (self.logins * self.LOGIN_REQUESTS + self.searches + self.topic_fetches +
+                self.torrent_downloads * self.DOWNLOAD_REQUESTS)
+    
+    def estimated_seconds(self, request_delay: float, searched_online: bool = True) -> float:
+        """Wall-clock estimate: request time plus the pauses after each searched track, file list and new torrent"""
+        pauses = (self.to_search if searched_online else 0) + self.topic_fetches + self.torrent_downloads
+        return self.requests * self.REQUEST_SECONDS + pauses * request_delay
+    
+    def summary(self, request_delay: float, searched_online: bool = True) -> List[str]:
+        """Human readable report, one line per entry"""
+        seconds = self.estimated_seconds(request_delay, searched_online)
+        return [
+            f"Tracks: {self.tracks} ({self.present} already present, {self.cached} cached, "
+            f"{self.in_torrents} in downloaded torrents, {self.from_catalog} from the search catalog, "
+            f"{self.to_search} to search)",
+            f"Searches: ~{self.searches:.0f}" if searched_online else
+            f"Searches: none ({self.to_search} tracks searched in the local catalog)",
+            f"Topic file-list fetches: {self.topic_fetches}",
+            f".torrent downloads: {self.torrent_downloads}",
+            f"Transmission additions: {self.transmission_adds}",
+            f"Selected download size: ~{self.download_bytes / (1024 ** 3):.1f} GB",
+            f"RuTracker requests: ~{self.requests:.0f}",
+            f"Estimated time: ~{seconds / 60:.0f} min (request delay {request_delay:g}s)",
+        ]
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+String similarity backends for the matching engine
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from difflib import SequenceMatcher
+from typing import List, Optional, Sequence
+
+try:
+    from rapidfuzz import fuzz as rapidfuzz_fuzz
+except ImportError:  # Optional dependency: pip install rapidfuzz
+    rapidfuzz_fuzz = None
+
+logger = logging.getLogger(__name__)
+
+
+class SimilarityBackend(ABC):
+    """Interface for scorers returning a similarity ratio between 0 and 1"""
+    
+    name = 'base'
+    
+    @abstractmethod
+    def ratio(self, text1: str, text2: str) -> float:
+        """Similarity of two prepared, non-empty strings"""
+    
+    def ratios(self, texts: Sequence[Optional[str]], text2: str) -> List[float]:
+        """Similarity of several prepared strings to one text; None entries score 0"""
+        return [self.ratio(text1, text2) if text1 is not None else 0.0 for text1 in texts]
+
+
+class DifflibBackend(SimilarityBackend):
+    """Reference scorer using difflib.SequenceMatcher"""
+    
+    name = 'difflib'
+    
+    def ratio(self, text1: str, text2: str) -> float:
+        """Similarity of two strings using difflib"""
+        return SequenceMatcher(None, text1, text2).ratio()
+    
+    def ratios(self, texts: Sequence[Optional[str]], text2: str) -> List[float]:
+        """Similarity of several strings to one text, analysing the text only once"""
+        # SequenceMatcher caches its analysis of the second sequence, so reuse one matcher
+        matcher = SequenceMatcher(None, '', text2)
+        scores = []
+        for text1 in texts:
+            if text1 is None:
+                scores.append(0.0)
+                continue
+            matcher.set_seq1(text1)
+            scores.append(matcher.ratio())
+        return scores
+
+
+class RapidFuzzBackend(SimilarityBackend):
+    """Compiled scorer using rapidfuzz's normalized Indel similarity"""
+    
+    name = 'rapidfuzz'
+    
+    def __init__(self):
+        """Fail early when rapidfuzz is not installed"""
+        if rapidfuzz_fuzz is None:
+            raise ImportError("rapidfuzz is not installed (pip install rapidfuzz)")
+    
+    def ratio(self, text1: str, text2: str) -> float:
+        """Similarity of two strings using rapidfuzz"""
+        return rapidfuzz_fuzz.ratio(text1, text2) / 100.0
+
+
+BACKENDS = {
+    DifflibBackend.name: DifflibBackend,
+    RapidFuzzBackend.name: RapidFuzzBackend,
+}
+
+
+def get_backend(name: Optional[str] = None) -> SimilarityBackend:
+    """Return a similarity backend by name; 'auto' or None picks the fastest one installed"""
+    if not name or name == 'auto':
+        name = RapidFuzzBackend.name if rapidfuzz_fuzz is not None else DifflibBackend.name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown similarity backend: {name} (choose from {', '.join(BACKENDS)})")
+    logger.debug(f"Using {name} similarity backend")
+    return BACKENDS[name]()
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Inverted token index for cheap candidate prefiltering
+"""
+
+import math
+import re
+from typing import Dict, List, Sequence, Set, Tuple
+
+# Tokens that appear in most titles and say nothing about which track it is
+STOPWORDS = {
+    'the', 'a', 'an', 'and', 'of', 'in', 'on', 'feat', 'ft', 'vs', 'with',
+    'flac', 'mp3', 'ape', 'wav', 'cue', 'log', 'kbps', 'cd', 'lp', 'ep', 'web', 'rip',
+}
+
+WORD_WEIGHT = 1.0
+NGRAM_WEIGHT = 0.25
+
+
+class TokenIndex:
+    """Inverted index of word tokens and character n-grams over a set of candidate strings"""
+    
+    def __init__(self, texts: Sequence[str], ngram_size: int = 3):
+        self.ngram_size = ngram_size
+        self.size = len(texts)
+        self.postings: Dict[str, List[int]] = {}
+        for doc_id, text in enumerate(texts):
+            for feature in self.features(text):
+                self.postings.setdefault(feature, []).append(doc_id)
+    
+    def features(self, text: str) -> Set[str]:
+        """Return the word tokens (prefixed 'w:') and character n-grams (prefixed 'g:') of a text"""
+        features = set()
+        for word in re.findall(r'\w+', text.lower()):
+            if word in STOPWORDS:
+                continue
+            features.add('w:' + word)
+            for i in range(len(word) - self.ngram_size + 1):
+                features.add('g:' + word[i:i + self.ngram_size])
+        return features
+    
+    def query(self, text: str, limit: int = 0) -> List[Tuple[int, float]]:
+        """Return (candidate id, overlap score) for candidates sharing features with text, best first"""
+        scores: Dict[int, float] = {}
+        for feature in self.features(text):
+            posting = self.postings.get(feature)
+            if not posting:
+                continue
+            # Rare features say more about a match than ones every candidate has
+            weight = (WORD_WEIGHT if feature.startswith('w:') else NGRAM_WEIGHT) * math.log(1 + self.size / len(posting))
+            for doc_id in posting:
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
\ No newline at end of file
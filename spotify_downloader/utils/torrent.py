@@ -2,83 +2,149 @@
 Torrent file analysis utilities
 """
 
-import bencodepy
-from typing import List, Dict, Any
+import os
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
+from .bencode import read_torrent
+from .file_table import FileTable
+
 logger = logging.getLogger(__name__)
 
 
+class TorrentMetadata:
+    """A .torrent decoded once, with the file list and totals derived on first use"""
+    
+    # path -> (mtime, size, metadata) in least recently used order; a torrent is decoded again only
+    # after it changes on disk or falls out of the MAX_CACHED most recent ones
+    _cache: 'OrderedDict[str, Tuple[int, int, TorrentMetadata]]' = OrderedDict()
+    MAX_CACHED = 1024
+    
+    def __init__(self, path: str, decoded: Dict[str, Any]):
+        self.path = path
+        self._decoded = decoded
+        self._files: Optional[FileTable] = None
+        self._total_size: Optional[int] = None
+    
+    @classmethod
+    def load(cls, torrent_file: str, cache: bool = True) -> 'TorrentMetadata':
+        """Return the metadata of a torrent file, decoding it only if it is new or changed;
+        cache=False decodes it without remembering it, for short-lived files"""
+        path = os.path.realpath(torrent_file)
+        if not cache:
+            return cls(path, read_torrent(path))
+        
+        stat = os.stat(path)
+        cached = cls._cache.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            cls._cache.move_to_end(path)
+            return cached[2]
+        metadata = cls(path, read_torrent(path))
+        cls._cache[path] = (stat.st_mtime_ns, stat.st_size, metadata)
+        cls._cache.move_to_end(path)
+        while len(cls._cache) > cls.MAX_CACHED:
+            cls._cache.popitem(last=False)
+        return metadata
+    
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Forget every decoded torrent"""
+        cls._cache.clear()
+    
+    @property
+    def files(self) -> FileTable:
+        """Files of the torrent in index order; single-file torrents have one entry"""
+        if self._files is None:
+            if self._decoded['files'] is None:
+                self._files = FileTable.from_entries([(self._decoded['name'], self._decoded['length'])])
+            else:
+                self._files = FileTable.from_entries(('/'.join(parts), length)
+                                                     for parts, length in self._decoded['files'])
+        return self._files
+    
+    @property
+    def total_size(self) -> int:
+        """Sum of all file lengths"""
+        if self._total_size is None:
+            self._total_size = self.files.total_size()
+        return self._total_size
+    
+    @property
+    def name(self) -> str:
+        """Torrent name (the top directory of multi-file torrents)"""
+        return self._decoded['name']
+    
+    @property
+    def piece_length(self) -> int:
+        """Bytes per piece"""
+        return self._decoded['piece_length']
+    
+    @property
+    def announce(self) -> str:
+        """Tracker announce URL"""
+        return self._decoded['announce']
+    
+    @property
+    def comment(self) -> str:
+        """Torrent comment; RuTracker puts the topic URL here"""
+        return self._decoded['comment']
+    
+    @property
+    def info_hash(self) -> str:
+        """Hex SHA-1 of the info dictionary"""
+        return self._decoded['info_hash']
+    
+    @property
+    def is_private(self) -> bool:
+        """Whether the torrent is flagged private"""
+        return self._decoded['private']
+    
+    def file_dicts(self) -> List[Dict[str, Any]]:
+        """Fresh file dicts, safe for callers to annotate"""
+        return list(self.files)
+    
+    def info(self) -> Dict[str, Any]:
+        """Basic torrent information as returned by TorrentAnalyzer.get_torrent_info"""
+        return {
+            'name': self.name,
+            'announce': self.announce,
+            'comment': self.comment,
+            'created_by': self._decoded['created_by'],
+            'creation_date': self._decoded['creation_date'],
+            'is_private': self.is_private,
+            'piece_length': self.piece_length,
+            'total_size': self.total_size,
+        }
+
+
 class TorrentAnalyzer:
     """Analyzer for torrent file contents"""
     
-    def analyze_torrent_contents(self, torrent_file: str) -> List[Dict[str, Any]]:
-        """Analyze torrent file contents and return file list"""
+    def get_metadata(self, torrent_file: str, cache: bool = True) -> Optional[TorrentMetadata]:
+        """Return the decoded metadata of a torrent file, shared by every analysis of that file"""
         try:
-            with open(torrent_file, 'rb') as f:
-                torrent_data = bencodepy.decode(f.read())
-            
-            files = []
-            
-            # Handle single file torrents
-            if b'files' not in torrent_data[b'info']:
-                # Single file torrent
-                name = torrent_data[b'info'][b'name'].decode('utf-8')
-                length = torrent_data[b'info'][b'length']
-                files.append({
-                    'index': 0,
-                    'path': name,
-                    'length': length,
-                    'name': name
-                })
-            else:
-                # Multi-file torrent
-                for index, file_info in enumerate(torrent_data[b'info'][b'files']):
-                    # Build file path
-                    path_parts = [part.decode('utf-8') for part in file_info[b'path']]
-                    full_path = '/'.join(path_parts)
-                    filename = path_parts[-1]
-                    length = file_info[b'length']
-                    
-                    files.append({
-                        'index': index,
-                        'path': full_path,
-                        'length': length,
-                        'name': filename
-                    })
-            
-            return files
-            
+            return TorrentMetadata.load(torrent_file, cache)
         except Exception as e:
-            logger.error(f"Error analyzing torrent contents: {str(e)}")
-            return []
+            logger.error(f"Error reading torrent file: {str(e)}")
+            return None
+    
+    def analyze_torrent_contents(self, torrent_file: str) -> List[Dict[str, Any]]:
+        """Analyze torrent file contents and return file list"""
+        metadata = self.get_metadata(torrent_file)
+        return metadata.file_dicts() if metadata else []
+    
+    def get_file_table(self, torrent_file: str) -> Optional[FileTable]:
+        """Return the compact file table of a torrent, shared by every analysis of that file"""
+        metadata = self.get_metadata(torrent_file)
+        return metadata.files if metadata else None
     
     def get_torrent_info(self, torrent_file: str) -> Dict[str, Any]:
         """Get basic torrent information"""
-        try:
-            with open(torrent_file, 'rb') as f:
-                torrent_data = bencodepy.decode(f.read())
-            
-            info = {
-                'name': torrent_data[b'info'][b'name'].decode('utf-8'),
-                'announce': torrent_data.get(b'announce', b'').decode('utf-8'),
-                'comment': torrent_data.get(b'comment', b'').decode('utf-8'),
-                'created_by': torrent_data.get(b'created by', b'').decode('utf-8'),
-                'creation_date': torrent_data.get(b'creation date', 0),
-                'is_private': torrent_data[b'info'].get(b'private', 0) == 1,
-                'piece_length': torrent_data[b'info'].get(b'piece length', 0),
-            }
-            
-            # Calculate total size
-            if b'files' in torrent_data[b'info']:
-                total_size = sum(file_info[b'length'] for file_info in torrent_data[b'info'][b'files'])
-            else:
-                total_size = torrent_data[b'info'][b'length']
-            
-            info['total_size'] = total_size
-            
-            return info
-            
-        except Exception as e:
-            logger.error(f"Error getting torrent info: {str(e)}")
-            return {}
\ No newline at end of file
+        metadata = self.get_metadata(torrent_file)
+        return metadata.info() if metadata else {}
+    
+    def get_info_hash(self, torrent_file: str, cache: bool = True) -> Optional[str]:
+        """Get the hex info-hash of a torrent file"""
+        metadata = self.get_metadata(torrent_file, cache)
+        return metadata.info_hash if metadata else None
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+Persistent index of the torrents already on disk and the files inside them
+"""
+
+import os
+import re
+import sqlite3
+import logging
+from typing import Dict, Any, Optional, List, Tuple
+
+from .matching import MatchingEngine
+from .torrent import TorrentAnalyzer, TorrentMetadata
+from .normalize import normalize_name, normalize_title
+
+logger = logging.getLogger(__name__)
+
+TOPIC_URL = 'https://rutracker.org/forum/viewtopic.php?t={}'
+
+
+class TorrentIndex:
+    """SQLite index of every .torrent in a directory: info-hash, topic ID and full file list"""
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS torrents (
+            info_hash TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            topic_id TEXT,
+            name TEXT NOT NULL,
+            total_size INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS torrents_path ON torrents (path);
+        CREATE TABLE IF NOT EXISTS files (
+            info_hash TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            length INTEGER NOT NULL,
+            PRIMARY KEY (info_hash, idx)
+        );
+    '''
+    # One row per file with the normalized torrent name and file path, for word lookups
+    FTS_SCHEMA = 'CREATE VIRTUAL TABLE IF NOT EXISTS file_words USING fts5(text, info_hash UNINDEXED)'
+    PLAIN_SCHEMA = 'CREATE TABLE IF NOT EXISTS file_words (text TEXT NOT NULL, info_hash TEXT NOT NULL)'
+    
+    LOSSLESS_EXTENSIONS = ('.flac', '.wav', '.ape', '.alac')
+    MAX_CANDIDATES = 20
+    
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(self.SCHEMA)
+        try:
+            self.connection.execute(self.FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to LIKE scans
+            self.connection.execute(self.PLAIN_SCHEMA)
+            self.full_text = False
+        self.connection.commit()
+        self.torrent_analyzer = TorrentAnalyzer()
+    
+    def refresh(self, torrents_dir: str, topic_ids: Optional[Dict[str, str]] = None) -> int:
+        """Index new and changed .torrent files and drop deleted ones; returns how many were (re)indexed"""
+        # topic_ids maps info-hash -> topic ID for torrents whose comment does not name their topic
+        topic_ids = topic_ids or {}
+        on_disk = {}
+        try:
+            for entry in os.scandir(torrents_dir):
+                if entry.is_file() and entry.name.endswith('.torrent'):
+                    stat = entry.stat()
+                    on_disk[os.path.abspath(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error scanning torrents directory: {str(e)}")
+            return 0
+        
+        indexed = {path: (mtime_ns, size) for path, mtime_ns, size in
+                   self.connection.execute('SELECT path, mtime_ns, size FROM torrents')}
+        
+        updated = 0
+        with self.connection:
+            for path in set(indexed) - set(on_disk):
+                self._remove_path(path)
+            
+            for path, stamp in on_disk.items():
+                if indexed.get(path) == stamp:
+                    continue
+                metadata = self.torrent_analyzer.get_metadata(path)
+                self._remove_path(path)
+                if metadata is None:
+                    continue
+                self._add(path, stamp, metadata, topic_ids)
+                updated += 1
+        
+        if updated:
+            logger.info(f"Indexed {updated} torrents in {torrents_dir}")
+        return updated
+    
+    def _remove_path(self, path: str) -> None:
+        """Delete the rows of the torrent stored at path"""
+        rows = self.connection.execute('SELECT info_hash FROM torrents WHERE path = ?', (path,)).fetchall()
+        for (info_hash,) in rows:
+            self._remove_hash(info_hash)
+    
+    def _remove_hash(self, info_hash: str) -> None:
+        """Delete the rows of one torrent"""
+        self.connection.execute('DELETE FROM torrents WHERE info_hash = ?', (info_hash,))
+        self.connection.execute('DELETE FROM files WHERE info_hash = ?', (info_hash,))
+        self.connection.execute('DELETE FROM file_words WHERE info_hash = ?', (info_hash,))
+    
+    def _add(self, path: str, stamp: Tuple[int, int], metadata: TorrentMetadata,
+             topic_ids: Dict[str, str]) -> None:
+        """Insert one decoded torrent"""
+        info_hash = metadata.info_hash
+        topic_match = re.search(r'[?&]t=(\d+)', metadata.comment or '')
+        topic_id = topic_match.group(1) if topic_match else topic_ids.get(info_hash)
+        
+        # The same torrent saved under two names is indexed once, at its latest path
+        self._remove_hash(info_hash)
+        self.connection.execute(
+            'INSERT INTO torrents (info_hash, path, mtime_ns, size, topic_id, name, total_size) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (info_hash, path, stamp[0], stamp[1], topic_id, metadata.name, metadata.total_size))
+        table = metadata.files
+        paths = [table.path(position) for position in range(len(table))]
+        self.connection.executemany(
+            'INSERT INTO files (info_hash, idx, path, length) VALUES (?, ?, ?, ?)',
+            [(info_hash, position, path, table.lengths[position]) for position, path in enumerate(paths)])
+        self.connection.executemany(
+            'INSERT INTO file_words (text, info_hash) VALUES (?, ?)',
+            [(normalize_title(f"{metadata.name}/{path}"), info_hash) for path in paths])
+    
+    def file_list(self, info_hash: str) -> List[Dict[str, Any]]:
+        """Return a torrent's files in the shape TorrentAnalyzer.analyze_torrent_contents produces"""
+        return [{'index': idx, 'path': path, 'length': length, 'name': path.rsplit('/', 1)[-1]}
+                for idx, path, length in self.connection.execute(
+                    'SELECT idx, path, length FROM files WHERE info_hash = ? ORDER BY idx', (info_hash,))]
+    
+    def topics(self) -> List[Tuple[str, str, str]]:
+        """Return (topic ID, info-hash, path) of every indexed torrent with a known topic"""
+        return self.connection.execute(
+            'SELECT topic_id, info_hash, path FROM torrents WHERE topic_id IS NOT NULL').fetchall()
+    
+    def candidate_torrents(self, words: List[str]) -> List[str]:
+        """Return the info-hashes of torrents with a file whose name and path contain every word"""
+        if not words:
+            return []
+        if self.full_text:
+            query = ' AND '.join('"' + word.replace('"', '""') + '"' for word in words)
+            rows = self.connection.execute(
+                'SELECT DISTINCT info_hash FROM file_words WHERE file_words MATCH ? LIMIT ?',
+                (query, self.MAX_CANDIDATES))
+        else:
+            conditions = ' AND '.join(['text LIKE ?'] * len(words))
+            rows = self.connection.execute(
+                f'SELECT DISTINCT info_hash FROM file_words WHERE {conditions} LIMIT ?',
+                [f'%{word}%' for word in words] + [self.MAX_CANDIDATES])
+        return [info_hash for (info_hash,) in rows]
+    
+    def find_track(self, track: Dict[str, Any], matching_engine: MatchingEngine) -> Optional[Dict[str, Any]]:
+        """Return a search-result-like match for a track found in an indexed torrent, or None"""
+        track_words = re.findall(r'\w+', normalize_name(track.get('name') or ''))
+        artist_words = set(re.findall(r'\w+', normalize_name(track.get('artist') or '')))
+        
+        try:
+            best = None
+            for info_hash in self.candidate_torrents(track_words):
+                row = self.connection.execute(
+                    'SELECT topic_id, name FROM torrents WHERE info_hash = ?', (info_hash,)).fetchone()
+                if not row or not row[0]:
+                    # Without a topic the rest of the pipeline cannot refer to the torrent
+                    continue
+                topic_id, name = row
+                files = self.file_list(info_hash)
+                matching = matching_engine.find_track_files(files, track)
+                if not matching:
+                    continue
+                
+                # The file itself must be named after the song, and the artist must appear in the torrent
+                file_info = matching[0]
+                if not set(track_words) <= set(re.findall(r'\w+', normalize_title(file_info['name']))):
+                    continue
+                context = set(re.findall(r'\w+', normalize_title(f"{name}/{file_info['path']}")))
+                if not artist_words <= context:
+                    continue
+                
+                if best is None or file_info['match_score'] > best[1]['match_score']:
+                    best = (topic_id, file_info, name, len(files))
+        except Exception as e:
+            logger.error(f"Error searching torrent index: {str(e)}")
+            return None
+        
+        if best is None:
+            return None
+        
+        topic_id, file_info, name, file_count = best
+        quality = 'lossless' if file_info['name'].lower().endswith(self.LOSSLESS_EXTENSIONS) else 'lossy'
+        result_type = 'album' if file_count > 1 else 'single'
+        match = {
+            'title': name,
+            'link': TOPIC_URL.format(topic_id),
+            'quality': quality,
+            'type': result_type,
+            'priority': {('lossless', 'single'): 4, ('lossless', 'album'): 3, ('lossy', 'single'): 2}.get(
+                (quality, result_type), 1),
+            'verified_file': file_info['path'],
+            'local': True,
+        }
+        match['match_score'] = matching_engine.calculate_match_score(
+            match, track['artist'], track['name'], track.get('album', ''))
+        return match
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        self.connection.close()
\ No newline at end of file
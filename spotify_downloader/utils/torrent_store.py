@@ -0,0 +1,128 @@
+"""
+Content-addressed storage for downloaded torrent files
+"""
+
+import os
+import json
+import tempfile
+import logging
+from typing import Iterable, Optional, Dict, Any, Tuple
+
+from .torrent import TorrentAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class TorrentStore:
+    """Store of .torrent files keyed by info-hash, with a topic ID lookup index"""
+    
+    INDEX_FILENAME = 'index.json'
+    
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.index_path = os.path.join(store_dir, self.INDEX_FILENAME)
+        self.torrent_analyzer = TorrentAnalyzer()
+        self._index = self._load_index()
+    
+    def get_by_topic(self, topic_id: Optional[str]) -> Optional[str]:
+        """Return the stored torrent file for a RuTracker topic ID, if any"""
+        if not topic_id:
+            return None
+        info_hash = self._index['topics'].get(str(topic_id))
+        return self.get_by_hash(info_hash) if info_hash else None
+    
+    def get_by_hash(self, info_hash: Optional[str]) -> Optional[str]:
+        """Return the stored torrent file for an info-hash, if any"""
+        if not info_hash:
+            return None
+        filename = self._index['torrents'].get(info_hash.lower())
+        if not filename:
+            return None
+        path = os.path.join(self.store_dir, filename)
+        if not os.path.exists(path):
+            logger.debug(f"Stored torrent missing on disk: {path}")
+            return None
+        return path
+    
+    def get_topic_hash(self, topic_id: Optional[str]) -> Optional[str]:
+        """Return the info-hash recorded for a topic ID, if any"""
+        if not topic_id:
+            return None
+        return self._index['topics'].get(str(topic_id))
+    
+    def topics_by_hash(self) -> Dict[str, str]:
+        """Return the reverse of the topic index: info-hash -> topic ID"""
+        return {info_hash: topic_id for topic_id, info_hash in self._index['topics'].items()}
+    
+    def adopt(self, entries: Iterable[Tuple[str, str, str]]) -> int:
+        """Record (topic ID, info-hash, path) of torrents already inside the store directory"""
+        added = 0
+        store_dir = os.path.abspath(self.store_dir)
+        for topic_id, info_hash, path in entries:
+            if str(topic_id) in self._index['topics'] or os.path.dirname(os.path.abspath(path)) != store_dir:
+                continue
+            self._index['torrents'].setdefault(info_hash, os.path.basename(path))
+            self._index['topics'][str(topic_id)] = info_hash
+            added += 1
+        if added:
+            self._save_index()
+        return added
+    
+    def save_stream(self, chunks: Iterable[bytes], topic_id: Optional[str] = None) -> Optional[str]:
+        """Write a streamed torrent into the store atomically and return its path"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.store_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+            
+            # The temporary path is renamed below, so caching its metadata would only leak memory
+            info_hash = self.torrent_analyzer.get_info_hash(temp_path, cache=False)
+            if not info_hash:
+                logger.warning("Downloaded data is not a valid torrent file")
+                os.remove(temp_path)
+                return None
+            
+            filename = f"{info_hash}.torrent"
+            path = os.path.join(self.store_dir, filename)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.error(f"Error storing torrent: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        
+        self._index['torrents'][info_hash] = filename
+        if topic_id:
+            self._index['topics'][str(topic_id)] = info_hash
+        self._save_index()
+        
+        logger.info(f"Stored torrent {info_hash} at {path}")
+        return path
+    
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Load the lookup index from disk"""
+        index = {'topics': {}, 'torrents': {}}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            index['topics'].update(data.get('topics', {}))
+            index['torrents'].update(data.get('torrents', {}))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not read torrent store index {self.index_path}: {str(e)}")
+        return index
+    
+    def _save_index(self) -> None:
+        """Atomically write the lookup index to disk"""
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.store_dir, suffix='.json.part')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.index_path)
+        except Exception as e:
+            logger.error(f"Error writing torrent store index: {str(e)}")
\ No newline at end of file
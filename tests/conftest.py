@@ -0,0 +1,22 @@
+"""
+Shared pytest fixtures
+"""
+
+import pytest
+
+from spotify_downloader.utils.config import Config
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Config pointing all output directories at a temporary folder"""
+    return Config(
+        spotify_client_id="test_id",
+        spotify_client_secret="test_secret",
+        rutracker_login="test_login",
+        rutracker_password="test_password",
+        spotify_playlist_id="test_playlist_id",
+        debug_dir=str(tmp_path / "debug"),
+        torrents_dir=str(tmp_path / "torrents"),
+        cache_dir=str(tmp_path / "cache")
+    )
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Test jointly assigning torrent files to the tracks sharing a torrent
+"""
+
+import itertools
+import random
+
+from spotify_downloader.utils.assignment import max_weight_assignment
+from spotify_downloader.utils.matching import MatchingEngine
+
+
+def brute_force_best(weights):
+    """Best total weight over every valid assignment"""
+    rows, columns = len(weights), len(weights[0])
+    best = 0.0
+    for choice in itertools.product([None] + list(range(columns)), repeat=rows):
+        used = [column for column in choice if column is not None]
+        if len(used) != len(set(used)):
+            continue
+        if any(column is not None and weights[row][column] is None for row, column in enumerate(choice)):
+            continue
+        best = max(best, sum(weights[row][column] for row, column in enumerate(choice) if column is not None))
+    return best
+
+
+def test_assignment_beats_greedy():
+    """Test that the runner-up track gives way when that frees a better total"""
+    weights = [
+        [0.9, 0.8],
+        [0.85, None],
+    ]
+    
+    assert max_weight_assignment(weights) == [1, 0]
+
+
+def test_assignment_matches_brute_force():
+    """Test optimality on small random problems, including forbidden pairs"""
+    rng = random.Random(3)
+    for _ in range(200):
+        rows, columns = rng.randint(1, 4), rng.randint(1, 4)
+        weights = [[round(rng.random(), 3) if rng.random() > 0.3 else None for _ in range(columns)]
+                   for _ in range(rows)]
+        assignment = max_weight_assignment(weights)
+        
+        used = [column for column in assignment if column is not None]
+        assert len(used) == len(set(used))
+        total = sum(weights[row][column] for row, column in enumerate(assignment) if column is not None)
+        assert abs(total - brute_force_best(weights)) < 1e-9
+
+
+def test_assign_files_gives_each_track_its_own_file(monkeypatch):
+    """Test that two tracks never claim one file while duplicates still share theirs"""
+    engine = MatchingEngine(backend='difflib')
+    scores = {
+        'Yesterday': [(0, 0.9), (1, 0.8)],
+        'Yesterday - Take 2': [(0, 0.85)],
+    }
+    
+    def fake_find(files, track):
+        return [dict(files[index], match_score=score) for index, score in scores[track['name']]]
+    
+    monkeypatch.setattr(engine, 'find_track_files', fake_find)
+    files = [{'index': i, 'name': f'{i}.flac', 'path': f'{i}.flac', 'length': 1} for i in range(2)]
+    tracks = [{'name': 'Yesterday', 'artist': 'The Beatles'},
+              {'name': 'Yesterday - Take 2', 'artist': 'The Beatles'},
+              {'name': 'Yesterday', 'artist': 'The Beatles'}]
+    
+    assigned = engine.assign_files(files, tracks)
+    
+    assert [file_info['index'] for file_info in assigned] == [1, 0, 1]
+    assert assigned[0]['match_score'] == 0.8
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Test the streaming bencode reader against bencodepy
+"""
+
+import hashlib
+
+import bencodepy
+import pytest
+
+from spotify_downloader.utils.bencode import BencodeError, BencodeReader, parse_torrent, read_torrent
+from spotify_downloader.utils.torrent import TorrentAnalyzer
+
+
+def make_torrent_data(files=None, pieces=20 * 500):
+    """Build a multi-file (or single-file when files is None) torrent"""
+    info = {b'name': 'Кино - Группа крови'.encode('utf-8'), b'piece length': 262144, b'pieces': b'\xab' * pieces,
+            b'private': 1}
+    if files is None:
+        info[b'length'] = 123456
+    else:
+        info[b'files'] = [{b'path': [part.encode('utf-8') for part in path.split('/')], b'length': length}
+                          for path, length in files]
+    torrent = {b'announce': b'http://bt.example/ann', b'comment': b'https://rutracker.org/forum/viewtopic.php?t=42',
+               b'creation date': 1700000000, b'announce-list': [[b'http://a'], [b'http://b']], b'info': info}
+    return bencodepy.encode(torrent), info
+
+
+def test_read_value_matches_bencodepy():
+    """Test that full decoding agrees with bencodepy"""
+    raw, _ = make_torrent_data([('CD1/01 - Track.flac', 1000)])
+    
+    assert BencodeReader(raw).read_value() == bencodepy.decode(raw)
+
+
+def test_parse_multi_file_torrent(tmp_path):
+    """Test decoding names, lengths and metadata through mmap"""
+    raw, info = make_torrent_data([('CD1/01 - Группа крови.flac', 30000000), ('cover.jpg', 100)])
+    path = tmp_path / 'album.torrent'
+    path.write_bytes(raw)
+    
+    torrent = read_torrent(str(path))
+    
+    assert torrent['name'] == 'Кино - Группа крови'
+    assert torrent['files'] == [(['CD1', '01 - Группа крови.flac'], 30000000), (['cover.jpg'], 100)]
+    assert torrent['piece_length'] == 262144
+    assert torrent['private'] is True
+    assert torrent['announce'] == 'http://bt.example/ann'
+    assert torrent['creation_date'] == 1700000000
+    assert torrent['info_hash'] == hashlib.sha1(bencodepy.encode(info)).hexdigest()
+
+
+def test_single_file_torrent():
+    """Test that single-file torrents report their length and no file list"""
+    raw, _ = make_torrent_data(None)
+    
+    torrent = parse_torrent(raw)
+    
+    assert torrent['files'] is None
+    assert torrent['length'] == 123456
+
+
+def test_analyzer_uses_reader(tmp_path):
+    """Test TorrentAnalyzer results on top of the reader"""
+    raw, info = make_torrent_data([('CD1/01 - Track.flac', 1000), ('CD1/02 - Track.flac', 2000)])
+    path = tmp_path / 'album.torrent'
+    path.write_bytes(raw)
+    analyzer = TorrentAnalyzer()
+    
+    files = analyzer.analyze_torrent_contents(str(path))
+    
+    assert [(f['index'], f['path'], f['name'], f['length']) for f in files] == [
+        (0, 'CD1/01 - Track.flac', '01 - Track.flac', 1000),
+        (1, 'CD1/02 - Track.flac', '02 - Track.flac', 2000),
+    ]
+    assert analyzer.get_torrent_info(str(path))['total_size'] == 3000
+    assert analyzer.get_info_hash(str(path)) == hashlib.sha1(bencodepy.encode(info)).hexdigest()
+
+
+def test_legacy_encodings_are_decoded():
+    """Test that cp1251 and Latin-1 strings decode instead of failing the whole torrent"""
+    info = {b'name': 'Кино - Группа крови'.encode('cp1251'), b'piece length': 16384, b'pieces': b'\x00' * 20,
+            b'files': [{b'path': ['Группа крови.flac'.encode('cp1251')], b'length': 1000},
+                       {b'path': ['Café.flac'.encode('latin-1')], b'length': 10}]}
+    raw = bencodepy.encode({b'comment': 'Раздача'.encode('cp1251'), b'created by': b'\xe9\x98', b'info': info})
+    
+    torrent = parse_torrent(raw)
+    
+    assert torrent['name'] == 'Кино - Группа крови'
+    assert torrent['files'][0] == (['Группа крови.flac'], 1000)
+    assert torrent['files'][1][0][0].endswith('.flac')
+    assert torrent['comment'] == 'Раздача'
+    assert torrent['info_hash'] == hashlib.sha1(bencodepy.encode(info)).hexdigest()
+
+
+def test_invalid_data_is_rejected(tmp_path):
+    """Test truncated and empty torrents"""
+    raw, _ = make_torrent_data([('01 - Track.flac', 1000)])
+    
+    with pytest.raises(BencodeError):
+        parse_torrent(raw[:len(raw) // 2])
+    with pytest.raises(BencodeError):
+        parse_torrent(b'd8:announce3:urle')
+    
+    empty = tmp_path / 'empty.torrent'
+    empty.write_bytes(b'')
+    assert TorrentAnalyzer().analyze_torrent_contents(str(empty)) == []
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Test checking candidate file lists before choosing a match
+"""
+
+from spotify_downloader.core.rutracker import RuTrackerClient
+
+
+FILE_LIST_HTML = """
+<ul class="ftree">
+  <li class="dir"><div><s></s><b>Queen - A Night at the Opera (1975)</b><i>74 MB</i></div>
+    <ul>
+      <li class="file"><b>01. Death on Two Legs.flac</b><i>31457280</i></li>
+      <li class="file"><b>11. Bohemian Rhapsody.flac</b><i>41943040</i></li>
+      <li class="file"><b>cover.jpg</b><i>102400</i></li>
+    </ul>
+  </li>
+</ul>
+"""
+
+TRACK = {'name': 'Bohemian Rhapsody', 'artist': 'Queen', 'album': 'A Night at the Opera'}
+
+
+def make_candidate(topic_id, title):
+    """Build a scored search result"""
+    return {
+        'title': title,
+        'link': f'https://rutracker.org/forum/viewtopic.php?t={topic_id}',
+        'quality': 'lossless',
+        'type': 'album',
+        'priority': 3,
+        'match_score': 0.5
+    }
+
+
+def test_parse_file_list(config):
+    """Test parsing the viewtorrent.php file tree"""
+    client = RuTrackerClient(config)
+    
+    files = client._parse_file_list(FILE_LIST_HTML)
+    
+    assert [f['path'] for f in files] == [
+        'Queen - A Night at the Opera (1975)/01. Death on Two Legs.flac',
+        'Queen - A Night at the Opera (1975)/11. Bohemian Rhapsody.flac',
+        'Queen - A Night at the Opera (1975)/cover.jpg',
+    ]
+    assert files[1]['length'] == 41943040
+    assert files[2]['name'] == 'cover.jpg'
+
+
+def test_verify_candidates_prefers_listing_with_track(config, monkeypatch):
+    """Test that a candidate without the track is dropped and the verified one wins"""
+    client = RuTrackerClient(config)
+    listings = {
+        '1': [{'index': 0, 'path': 'Queen - Greatest Hits/cover.jpg', 'length': 10, 'name': 'cover.jpg'}],
+        '2': client._parse_file_list(FILE_LIST_HTML),
+    }
+    monkeypatch.setattr(client, 'get_topic_file_list', lambda link: listings.get(client.get_topic_id(link)))
+    candidates = [
+        make_candidate(1, 'Queen - Greatest Hits'),
+        make_candidate(2, 'Queen - A Night at the Opera'),
+        make_candidate(3, 'Queen - Live Killers'),
+    ]
+    
+    verified = client.verify_candidates(TRACK, candidates, top_k=3)
+    
+    assert [client.get_topic_id(c['link']) for c in verified] == ['2', '3']
+    assert verified[0]['verified_file'].endswith('11. Bohemian Rhapsody.flac')
+
+
+def test_verification_can_be_disabled(config):
+    """Test that top_k=0 leaves the ranking untouched"""
+    client = RuTrackerClient(config)
+    candidates = [make_candidate(1, 'Queen - Greatest Hits')]
+    
+    assert client.verify_candidates(TRACK, candidates, top_k=0) == candidates
+
+
+def test_file_list_fetches_are_paced(config, monkeypatch):
+    """Test that every file-list request is followed by the configured delay"""
+    config.request_delay = 1.5
+    client = RuTrackerClient(config)
+    pauses = []
+    
+    class FakeResponse:
+        status_code = 200
+        text = FILE_LIST_HTML
+    
+    class FakeSession:
+        def post(self, *args, **kwargs):
+            """Return the sample file list"""
+            return FakeResponse()
+    
+    client.session = FakeSession()
+    monkeypatch.setattr('spotify_downloader.core.rutracker.time.sleep', pauses.append)
+    
+    client.verify_candidates(TRACK, [make_candidate(1, 'Queen - A Night at the Opera'),
+                                     make_candidate(2, 'Queen - Greatest Hits')])
+    client.get_topic_file_list('https://rutracker.org/forum/viewtopic.php?t=1')
+    
+    assert pauses == [1.5, 1.5]
\ No newline at end of file
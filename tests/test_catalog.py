@@ -0,0 +1,132 @@
+"""
+Test the catalog of search result rows
+"""
+
+from spotify_downloader.core.downloader import SpotifyPlaylistDownloader
+from spotify_downloader.core.rutracker import RuTrackerClient
+from spotify_downloader.utils.catalog import SearchCatalog
+
+
+def row(topic_id, title, quality='lossless', result_type='album'):
+    """Build a parsed search row"""
+    return {'title': title, 'link': f'https://rutracker.org/forum/viewtopic.php?t={topic_id}',
+            'quality': quality, 'type': result_type, 'priority': 3}
+
+
+ROWS = [
+    row(100, 'Queen - A Night at the Opera (1975) [FLAC]'),
+    row(200, 'Queen - Bohemian Rhapsody (single) [FLAC]', result_type='single'),
+    row(300, 'Кино - Группа крови (1988) [FLAC]'),
+]
+
+TRACK = {'name': 'Bohemian Rhapsody', 'artist': 'Queen', 'album': 'A Night at the Opera'}
+
+
+def test_rows_are_deduplicated_by_topic(tmp_path):
+    """Test that a topic seen twice is stored once, keeping when it was first seen"""
+    catalog = SearchCatalog(str(tmp_path / "catalog.sqlite"))
+    
+    assert catalog.add(ROWS, seen_at=1000.0) == 3
+    assert catalog.add([row(100, 'Queen - A Night at the Opera (1975) [FLAC 24bit]')], seen_at=2000.0) == 0
+    
+    assert len(catalog) == 3
+    first_seen, last_seen = catalog.connection.execute(
+        "SELECT first_seen, last_seen FROM topics WHERE topic_id = '100'").fetchone()
+    assert (first_seen, last_seen) == (1000.0, 2000.0)
+
+
+def test_search_by_words(tmp_path):
+    """Test full-text lookups on normalized titles, including transliterated ones"""
+    catalog = SearchCatalog(str(tmp_path / "catalog.sqlite"))
+    catalog.add(ROWS)
+    
+    assert {r['link'][-3:] for r in catalog.search(['queen'])} == {'100', '200'}
+    assert [r['link'][-3:] for r in catalog.search(['queen', 'rhapsody'])] == ['200']
+    assert [r['title'] for r in catalog.search(['kino'])] == ['Кино - Группа крови (1988) [FLAC]']
+    assert catalog.search(['queen', 'innuendo']) == []
+
+
+def test_stale_rows_are_ignored(tmp_path):
+    """Test that rows not seen for longer than max_age are not returned"""
+    catalog = SearchCatalog(str(tmp_path / "catalog.sqlite"), max_age=60)
+    catalog.add(ROWS, seen_at=1000.0)
+    
+    assert catalog.search(['queen']) == []
+
+
+def test_catalog_candidates_need_a_confident_row(config):
+    """Test that the catalog only answers when a row names both artist and track"""
+    client = RuTrackerClient(config)
+    client.catalog.add(ROWS[:1])
+    
+    assert client.get_catalog_candidates(TRACK) == []
+    
+    client.catalog.add(ROWS)
+    candidates = client.get_catalog_candidates(TRACK)
+    
+    assert candidates[0]['link'].endswith('t=200')
+    assert all(candidate['search_strategy'] == 'catalog' for candidate in candidates)
+
+
+def test_process_tracks_answers_from_catalog(config, monkeypatch):
+    """Test that a track answered by the catalog needs no login or search"""
+    config.download_torrents = False
+    downloader = SpotifyPlaylistDownloader(config)
+    downloader.rutracker_client.catalog.add(ROWS)
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("RuTracker should not be contacted")
+    
+    monkeypatch.setattr(downloader.rutracker_client, 'login', fail)
+    monkeypatch.setattr(downloader.rutracker_client, 'search', fail)
+    
+    results = downloader.process_tracks([TRACK])
+    
+    assert results[0]['rutracker_link'] == 'https://rutracker.org/forum/viewtopic.php?t=200'
+
+
+def test_edited_title_is_reindexed(tmp_path):
+    """Test that a topic whose title changed is found by its new words only"""
+    catalog = SearchCatalog(str(tmp_path / "catalog.sqlite"))
+    catalog.add(ROWS)
+    catalog.add([row(300, 'Kino - Zvezda po imeni Solnce (1989) [FLAC]')])
+    
+    assert [r['link'][-3:] for r in catalog.search(['solnce'])] == ['300']
+    assert catalog.search(['krovi']) == []
+    assert catalog.connection.execute('SELECT COUNT(*) FROM topic_words').fetchone()[0] == 3
+
+
+def test_legacy_word_index_is_rebuilt(tmp_path):
+    """Test that a catalog indexed by a topic_id column is re-indexed by rowid"""
+    path = str(tmp_path / "catalog.sqlite")
+    catalog = SearchCatalog(path)
+    catalog.add(ROWS)
+    catalog.connection.executescript(
+        'DROP TABLE topic_words; CREATE TABLE topic_words (text TEXT NOT NULL, topic_id TEXT NOT NULL);')
+    catalog.close()
+    
+    catalog = SearchCatalog(path)
+    
+    assert [r['link'][-3:] for r in catalog.search(['queen', 'rhapsody'])] == ['200']
+
+
+def test_failed_login_keeps_local_matches(config, monkeypatch):
+    """Test that a failed login only leaves the tracks that need a search unmatched"""
+    config.download_torrents = False
+    downloader = SpotifyPlaylistDownloader(config)
+    downloader.rutracker_client.catalog.add(ROWS)
+    attempts = []
+    
+    def failed_login():
+        attempts.append(1)
+        return False
+    
+    monkeypatch.setattr(downloader.rutracker_client, 'login', failed_login)
+    unknown = [{'name': f'Song {i}', 'artist': 'Nobody', 'album': 'Nothing'} for i in range(2)]
+    
+    results = downloader.process_tracks(unknown + [TRACK])
+    
+    assert [result['rutracker_link'] for result in results] == [
+        'Not found', 'Not found', 'https://rutracker.org/forum/viewtopic.php?t=200']
+    assert len(attempts) == 1
+    assert downloader.match_cache.get(unknown[0]) is None
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Test importing RuTracker XML dumps into the search catalog
+"""
+
+import gzip
+
+import pytest
+
+from spotify_downloader.core.downloader import SpotifyPlaylistDownloader
+from spotify_downloader.core.rutracker import RuTrackerClient
+from spotify_downloader.utils.catalog import SearchCatalog
+from spotify_downloader.utils.dump_import import import_dump, is_music_forum
+
+DUMP = '''<?xml version="1.0" encoding="utf-8"?>
+<torrents>
+<torrent id="100" registred_at="2012.01.01 10:00:00" size="450000000">
+<title>Queen - A Night at the Opera (1975) [FLAC]</title>
+<torrent hash="0123456789ABCDEF0123456789ABCDEF01234567" tracker_id="1"/>
+<forum id="737">Рок, Панк, Альтернатива (lossless)</forum>
+<content>[b]Tracklist[/b] 01. Death on Two Legs ...</content>
+</torrent>
+<torrent id="200" registred_at="2013.05.05 10:00:00" size="40000000">
+<title>Queen - Bohemian Rhapsody (single) [MP3]</title>
+<torrent hash="89ABCDEF0123456789ABCDEF0123456789ABCDEF" tracker_id="1"/>
+<forum id="1719">Зарубежный Рок (lossy)</forum>
+<content/>
+</torrent>
+<torrent id="300" registred_at="2014.02.02 10:00:00" size="1400000000">
+<title>Queen: Live at Wembley (1986) DVDRip</title>
+<torrent hash="FEDCBA9876543210FEDCBA9876543210FEDCBA98" tracker_id="1"/>
+<forum id="2">Концерты и видеоклипы</forum>
+<content/>
+</torrent>
+</torrents>'''
+
+TRACK = {'name': 'Bohemian Rhapsody', 'artist': 'Queen', 'album': 'A Night at the Opera'}
+
+
+def test_import_keeps_music_forums(tmp_path):
+    """Test that only topics in music forums are imported, as search rows"""
+    dump = tmp_path / "rutracker.xml.gz"
+    with gzip.open(dump, 'wt', encoding='utf-8') as f:
+        f.write(DUMP)
+    catalog = SearchCatalog(str(tmp_path / "catalog.sqlite"))
+    
+    assert import_dump(str(dump), catalog) == 2
+    
+    rows = {row['link'][-3:]: row for row in catalog.search(['queen'])}
+    assert set(rows) == {'100', '200'}
+    assert rows['100']['quality'] == 'lossless'
+    assert rows['200'] == {'title': 'Queen - Bohemian Rhapsody (single) [MP3]',
+                           'link': 'https://rutracker.org/forum/viewtopic.php?t=200',
+                           'quality': 'lossy', 'type': 'single', 'priority': 2}
+
+
+def test_import_by_forum_ids(tmp_path):
+    """Test that an explicit forum ID set replaces the forum name heuristic"""
+    dump = tmp_path / "rutracker.xml"
+    dump.write_text(DUMP, encoding='utf-8')
+    catalog = SearchCatalog(str(tmp_path / "catalog.sqlite"))
+    
+    assert import_dump(str(dump), catalog, forum_ids={'2'}) == 1
+    assert [row['link'][-3:] for row in catalog.search(['queen'])] == ['300']
+
+
+def test_truncated_dump_keeps_parsed_topics(tmp_path):
+    """Test that the topics before a parse error are still imported"""
+    dump = tmp_path / "rutracker.xml"
+    dump.write_text(DUMP[:DUMP.index('<torrent id="300"') + 30], encoding='utf-8')
+    catalog = SearchCatalog(str(tmp_path / "catalog.sqlite"))
+    
+    assert import_dump(str(dump), catalog) == 2
+
+
+def test_offline_search_answers_from_catalog(config, tmp_path, monkeypatch):
+    """Test that offline candidates come from the imported dump without network access"""
+    dump = tmp_path / "rutracker.xml"
+    dump.write_text(DUMP, encoding='utf-8')
+    config.offline_search = True
+    client = RuTrackerClient(config)
+    import_dump(str(dump), client.catalog)
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("RuTracker should not be contacted")
+    
+    monkeypatch.setattr(client, 'login', fail)
+    monkeypatch.setattr(client, '_parse_search_results', fail)
+    
+    candidates = client.verify_candidates(TRACK, client.get_candidates(TRACK))
+    
+    assert candidates[0]['link'].endswith('t=200')
+
+
+def test_offline_misses_are_not_cached(config):
+    """Test that tracks missing from the local catalog are searched on the next online run"""
+    config.offline_search = True
+    config.download_torrents = False
+    downloader = SpotifyPlaylistDownloader(config)
+    downloader.rutracker_client.catalog.add([{'title': 'Queen - Bohemian Rhapsody (single) [MP3]',
+                                              'link': 'https://rutracker.org/forum/viewtopic.php?t=200',
+                                              'quality': 'lossy', 'type': 'single', 'priority': 2}])
+    missing = {'name': 'Creep', 'artist': 'Radiohead', 'album': 'Pablo Honey'}
+    
+    downloader.process_tracks([TRACK, missing])
+    
+    assert downloader.match_cache.get(TRACK)['match']['link'].endswith('t=200')
+    assert downloader.match_cache.get(missing) is None
+
+
+@pytest.mark.parametrize('name', [
+    'Рок, Панк, Альтернатива (lossless)',
+    'Зарубежный Рок (lossy)',
+    'Поп-музыка (lossless)',
+    'Электронная музыка (Hi-Res stereo)',
+    'Классическая музыка (lossless)',
+    'Дискографии Hard Rock',
+    'Jazz, Blues (lossy)',
+])
+def test_music_forums(name):
+    """Test forum names of the music sections"""
+    assert is_music_forum(name)
+
+
+@pytest.mark.parametrize('name', [
+    'Научно-популярные фильмы',
+    'Электронные книги',
+    'Аудиокниги: классическая литература',
+    'Музыкальные фильмы',
+    'Концертное видео (рок)',
+    'Rapidshare links',
+    'Country houses and gardens',
+])
+def test_non_music_forums(name):
+    """Test forum names that share prefixes or genre words with the music sections"""
+    assert not is_music_forum(name)
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Test the array-backed torrent file table
+"""
+
+import sys
+
+from spotify_downloader.utils.file_table import FileTable
+from spotify_downloader.utils.matching import MatchingEngine
+
+
+def make_files(count=300):
+    """Build a discography-like file list of dicts"""
+    files = []
+    for i in range(count):
+        album = f"Queen - Album {i // 12}"
+        title = 'Bohemian Rhapsody' if i == 125 else f'Song {i}'
+        files.append({'index': i, 'path': f"{album}/{i % 12 + 1:02d} - {title}.flac",
+                      'length': 30000000 + i, 'name': f"{i % 12 + 1:02d} - {title}.flac"})
+    files.append({'index': count, 'path': 'cover.jpg', 'length': 1000, 'name': 'cover.jpg'})
+    return files
+
+
+def test_round_trip_and_shared_directories():
+    """Test that rows read back as the original dicts and directories are stored once"""
+    files = make_files()
+    table = FileTable.from_dicts(files)
+    
+    assert len(table) == len(files)
+    assert list(table) == files
+    assert table.path(len(files) - 1) == 'cover.jpg'
+    assert len(table.dirs) == 26
+    assert table.total_size() == sum(f['length'] for f in files)
+
+
+def test_matching_a_table_gives_list_results():
+    """Test that matching a table returns the same files and scores as matching dicts"""
+    engine = MatchingEngine(backend='difflib')
+    files = make_files()
+    track = {'name': 'Bohemian Rhapsody', 'artist': 'Queen', 'album': 'Album 10', 'track_number': 6}
+    
+    from_list = engine.find_track_files(files, track)
+    from_table = engine.find_track_files(FileTable.from_dicts(files), track)
+    
+    assert from_table == from_list
+    assert from_table[0]['path'] == 'Queen - Album 10/06 - Bohemian Rhapsody.flac'
+    assert all('match_score' not in f for f in files)
+
+
+def test_table_smaller_than_dicts():
+    """Test that the table needs less memory than one dict per file"""
+    files = make_files(3000)
+    table = FileTable.from_dicts(files)
+    
+    dict_bytes = sum(sys.getsizeof(f) + sys.getsizeof(f['path']) + sys.getsizeof(f['name']) for f in files)
+    
+    assert table.memory_bytes() < dict_bytes / 2
\ No newline at end of file
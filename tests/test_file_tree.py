@@ -0,0 +1,83 @@
+"""
+Test directory-level pruning of large torrent file lists
+"""
+
+from spotify_downloader.utils.matching import MatchingEngine
+
+
+def make_discography(albums=20, tracks=12):
+    """Build a discography file list with one folder per album and per-disc subfolders"""
+    files = []
+    for album in range(albums):
+        for number in range(tracks):
+            name = f"{number + 1:02d} - Song {album}-{number}.flac"
+            files.append({'index': len(files), 'name': name, 'length': 1000,
+                          'path': f"Queen - Discography/{1970 + album} - Album {album}/CD{number % 2 + 1}/{name}"})
+    return files
+
+
+def add_file(files, path):
+    """Append a file with the given path"""
+    files.append({'index': len(files), 'name': path.rsplit('/', 1)[-1], 'length': 1000, 'path': path})
+
+
+def directories(files):
+    """Directories holding the given files"""
+    return {f['path'].rpartition('/')[0] for f in files}
+
+
+def test_pruning_keeps_album_directory_and_its_discs():
+    """Test that only the folder naming the album survives, with all its subfolders"""
+    engine = MatchingEngine(backend='difflib')
+    files = make_discography()
+    add_file(files, 'Queen - Discography/1975 - A Night at the Opera/CD1/11 - Bohemian Rhapsody.flac')
+    add_file(files, 'Queen - Discography/1975 - A Night at the Opera/CD2/01 - Bohemian Rhapsody (Live).flac')
+    
+    kept = engine._kept_directories(directories(files), 'Queen', 'A Night at the Opera (2011 Remaster)')
+    
+    assert kept == {'Queen - Discography/1975 - A Night at the Opera/CD1',
+                    'Queen - Discography/1975 - A Night at the Opera/CD2'}
+
+
+def test_pruning_without_matching_directory_keeps_everything():
+    """Test that nothing is pruned when no directory names the album or artist"""
+    engine = MatchingEngine(backend='difflib')
+    files = make_discography(albums=3)
+    
+    assert engine._kept_directories(directories(files), 'Queen', 'Innuendo') == directories(files)
+
+
+def test_pruning_skips_other_albums_of_the_discography():
+    """Test that a song also on a compilation is taken from the album's folder"""
+    engine = MatchingEngine(backend='difflib')
+    files = make_discography()
+    add_file(files, 'Queen - Discography/1981 - Greatest Hits/01 - Bohemian Rhapsody.flac')
+    add_file(files, 'Queen - Discography/1975 - A Night at the Opera/CD1/11 - Bohemian Rhapsody.flac')
+    
+    matching = engine.find_matching_files(files, 'Bohemian Rhapsody', 'Queen', 'A Night at the Opera')
+    
+    assert [f['path'] for f in matching] == ['Queen - Discography/1975 - A Night at the Opera/CD1/11 - Bohemian Rhapsody.flac']
+
+
+def test_find_matching_files_in_large_discography():
+    """Test matching a track in a torrent above the pruning threshold"""
+    engine = MatchingEngine(backend='difflib')
+    files = make_discography()
+    add_file(files, 'Queen - Discography/1975 - A Night at the Opera/CD1/11 - Bohemian Rhapsody.flac')
+    assert len(files) >= engine.TREE_MIN_FILES
+    
+    matching = engine.find_matching_files(files, 'Bohemian Rhapsody', 'Queen', 'A Night at the Opera')
+    
+    assert matching[0]['name'] == '11 - Bohemian Rhapsody.flac'
+
+
+def test_find_matching_files_falls_back_to_full_scan():
+    """Test that a track filed outside its album's folder is still found"""
+    engine = MatchingEngine(backend='difflib')
+    files = make_discography()
+    add_file(files, 'Queen - Discography/1975 - A Night at the Opera/CD1/01 - Death on Two Legs.flac')
+    add_file(files, 'Queen - Discography/Singles/Bohemian Rhapsody.flac')
+    
+    matching = engine.find_matching_files(files, 'Bohemian Rhapsody', 'Queen', 'A Night at the Opera')
+    
+    assert matching[0]['path'] == 'Queen - Discography/Singles/Bohemian Rhapsody.flac'
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Test the index of owned music files
+"""
+
+import os
+
+from spotify_downloader.core.downloader import SpotifyPlaylistDownloader
+from spotify_downloader.utils.library import MusicLibrary
+
+
+TRACK = {'name': 'Bohemian Rhapsody - Remastered 2011', 'artist': 'Queen', 'album': 'A Night at the Opera',
+         'artists': ['Queen']}
+
+
+def touch(root, relative_path, size=100):
+    """Create a dummy audio file and return its path"""
+    path = os.path.join(str(root), *relative_path.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'\x00' * size)
+    return path
+
+
+def test_parse_path():
+    """Test artist, title and album guesses from folder and file names"""
+    assert MusicLibrary.parse_path(os.path.join('Music', 'Queen', 'A Night at the Opera', '11 - Bohemian Rhapsody.flac')) == \
+        ('Queen', 'Bohemian Rhapsody', 'A Night at the Opera')
+    assert MusicLibrary.parse_path(os.path.join('Music', 'Queen - Innuendo (1991)', '01. Innuendo.mp3')) == \
+        ('Queen', 'Innuendo', 'Innuendo (1991)')
+    assert MusicLibrary.parse_path(os.path.join('Downloads', 'Queen - Radio Ga Ga.mp3'))[:2] == ('Queen', 'Radio Ga Ga')
+
+
+def test_scan_is_incremental(tmp_path, monkeypatch):
+    """Test that only new or changed files are described again and deleted ones are dropped"""
+    library = MusicLibrary(str(tmp_path / "library.sqlite"))
+    music = tmp_path / "music"
+    first = touch(music, 'Queen/A Night at the Opera/11 - Bohemian Rhapsody.flac')
+    touch(music, 'Queen/Innuendo/01 - Innuendo.flac')
+    touch(music, 'Queen/Innuendo/cover.jpg')
+    described = []
+    original = library.describe
+    monkeypatch.setattr(library, 'describe', lambda path: described.append(path) or original(path))
+    
+    assert library.scan([str(music)]) == 2
+    assert library.scan([str(music)]) == 0
+    
+    touch(music, 'Queen/A Night at the Opera/11 - Bohemian Rhapsody.flac', size=200)
+    assert library.scan([str(music)]) == 1
+    assert described[-1] == first
+    
+    os.remove(first)
+    library.scan([str(music)])
+    assert library.find_track(TRACK) is None
+
+
+def test_find_track_checks_artist_and_duration(tmp_path, monkeypatch):
+    """Test that title, artist and (when tagged) duration must all agree"""
+    library = MusicLibrary(str(tmp_path / "library.sqlite"))
+    music = tmp_path / "music"
+    path = touch(music, 'Queen/A Night at the Opera/11 - Bohemian Rhapsody.flac')
+    touch(music, 'Panic! At The Disco/Covers/Bohemian Rhapsody.flac')
+    monkeypatch.setattr(library, '_read_tags', lambda p: {'duration_ms': 354000} if p == path else {})
+    library.scan([str(music)])
+    
+    assert library.find_track(TRACK) == path
+    assert library.find_track(dict(TRACK, duration_ms=355000)) == path
+    assert library.find_track(dict(TRACK, duration_ms=420000)) is None
+    assert library.find_track(dict(TRACK, artist='Pentatonix', artists=['Pentatonix'])) is None
+
+
+def test_process_tracks_marks_owned_tracks(config, monkeypatch):
+    """Test that owned tracks are reported as present without contacting RuTracker"""
+    config.music_library = str(config.cache_dir + '_music')
+    path = touch(config.music_library, 'Queen/A Night at the Opera/11 - Bohemian Rhapsody.flac')
+    downloader = SpotifyPlaylistDownloader(config)
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("RuTracker should not be contacted")
+    
+    monkeypatch.setattr(downloader.rutracker_client, 'login', fail)
+    monkeypatch.setattr(downloader.rutracker_client, 'get_candidates', fail)
+    
+    results = downloader.process_tracks([TRACK])
+    
+    assert results[0]['rutracker_link'] == 'Already present'
+    assert results[0]['local_file'] == path
\ No newline at end of file
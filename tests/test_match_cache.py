@@ -0,0 +1,110 @@
+"""
+Test the persistent match cache
+"""
+
+import time
+
+from spotify_downloader.core.downloader import SpotifyPlaylistDownloader
+from spotify_downloader.utils.match_cache import MatchCache
+
+
+TRACK = {'id': '3z8h0TU7ReDPLIbEnYhWZb', 'name': 'Bohemian Rhapsody', 'artist': 'Queen',
+         'album': 'A Night at the Opera'}
+
+MATCH = {
+    'title': 'Queen - A Night at the Opera (1975) [FLAC]',
+    'link': 'https://rutracker.org/forum/viewtopic.php?t=100',
+    'quality': 'lossless',
+    'type': 'album',
+    'priority': 3,
+    'match_score': 0.61,
+    'search_strategy': 'not stored'
+}
+
+
+def test_hit_survives_reopen(tmp_path):
+    """Test that a stored match is returned by a new cache instance"""
+    path = str(tmp_path / "cache.sqlite")
+    cache = MatchCache(path)
+    cache.put(TRACK, MATCH, topic_id='100')
+    cache.close()
+    
+    cached = MatchCache(path).get(TRACK)
+    
+    assert cached['match']['link'] == MATCH['link']
+    assert cached['match']['match_score'] == 0.61
+    assert 'search_strategy' not in cached['match']
+
+
+def test_text_key_matches_without_spotify_id(tmp_path):
+    """Test lookup by normalized artist, track and album"""
+    cache = MatchCache(str(tmp_path / "cache.sqlite"))
+    cache.put(TRACK, MATCH)
+    
+    cached = cache.get({'name': 'bohemian  rhapsody', 'artist': 'QUEEN', 'album': 'A Night at the Opera'})
+    
+    assert cached['match']['title'] == MATCH['title']
+
+
+def test_negative_entries_expire(tmp_path):
+    """Test that misses are remembered only for the TTL"""
+    cache = MatchCache(str(tmp_path / "cache.sqlite"), negative_ttl=60)
+    cache.put(TRACK, None)
+    
+    assert cache.get(TRACK) == {'match': None}
+    
+    cache.connection.execute('UPDATE matches SET updated_at = ?', (time.time() - 120,))
+    assert cache.get(TRACK) is None
+
+
+def test_invalidate_by_scope_and_artist(tmp_path):
+    """Test invalidating misses and a single artist"""
+    cache = MatchCache(str(tmp_path / "cache.sqlite"))
+    other = {'name': 'Imagine', 'artist': 'John Lennon', 'album': 'Imagine'}
+    cache.put(TRACK, MATCH)
+    cache.put(other, None)
+    
+    cache.invalidate('misses')
+    assert cache.get(other) is None
+    assert cache.get(TRACK) is not None
+    
+    cache.invalidate('all', artist='queen')
+    assert cache.get(TRACK) is None
+
+
+def test_failed_search_is_not_cached_as_miss(config, monkeypatch):
+    """Test that a track whose search failed is searched again on the next run"""
+    config.download_torrents = False
+    downloader = SpotifyPlaylistDownloader(config)
+    client = downloader.rutracker_client
+    monkeypatch.setattr(client, 'login', lambda: True)
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    queries = []
+    
+    def flaky_search(query):
+        queries.append(query)
+        return [] if len(queries) == 1 else None
+    
+    monkeypatch.setattr(client, 'search', flaky_search)
+    
+    assert client.get_candidates(TRACK) is None
+    downloader.process_tracks([TRACK])
+    
+    assert downloader.match_cache.get(TRACK) is None
+
+
+def test_http_error_is_not_an_empty_result(config, monkeypatch):
+    """Test that a failed search request is told apart from a search without results"""
+    client = SpotifyPlaylistDownloader(config).rutracker_client
+    
+    class Session:
+        """Session whose every request is rate limited"""
+        
+        def get(self, *args, **kwargs):
+            """Return a 503 response"""
+            return type('Response', (), {'status_code': 503, 'url': 'https://rutracker.org/forum/search.php'})()
+    
+    client.session = Session()
+    
+    assert client.search('Queen Bohemian Rhapsody') is None
+    assert len(client.catalog) == 0
\ No newline at end of file
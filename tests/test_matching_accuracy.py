@@ -0,0 +1,34 @@
+"""
+Guard matching accuracy against the labelled corpus used by benchmarks/bench_accuracy.py
+"""
+
+import pytest
+
+from benchmarks.bench_accuracy import check_thresholds, evaluate, load_corpus
+from spotify_downloader.utils.matching import MatchingEngine
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    return load_corpus()
+
+
+def test_accuracy_does_not_regress(corpus):
+    """Test top-1 accuracy of the reference backend against the corpus thresholds"""
+    report = evaluate(MatchingEngine(backend='difflib'), corpus, repeat=1)
+    
+    # Latency depends on the machine, so it is only checked by the benchmark script
+    assert check_thresholds(report, corpus['thresholds'], latency=False) == [], report['failures']
+    assert report['candidate_latency_us'] > 0 and report['file_latency_us'] > 0
+
+
+def test_check_thresholds_reports_regressions(corpus):
+    """Test that falling accuracy and rising latency are both reported"""
+    report = {'candidate_accuracy': 0.1, 'file_accuracy': 1.0,
+              'candidate_latency_us': 1e6, 'file_latency_us': 1.0}
+    
+    problems = check_thresholds(report, corpus['thresholds'])
+    
+    assert len(problems) == 2
+    assert problems[0].startswith('candidate_accuracy')
+    assert problems[1].startswith('candidate_latency_us')
\ No newline at end of file
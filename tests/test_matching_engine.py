@@ -0,0 +1,136 @@
+"""
+Test the matching engine against the original difflib scoring and across backends
+"""
+
+from difflib import SequenceMatcher
+
+import pytest
+
+from spotify_downloader.utils.matching import MatchingEngine
+from spotify_downloader.utils.normalize import normalize_title
+from spotify_downloader.utils.similarity import BACKENDS, get_backend
+
+
+def reference_similarity(text1, text2):
+    """The original calculate_similarity"""
+    if not text1 or not text2:
+        return 0.0
+    return SequenceMatcher(None, text1.lower().strip(), text2.lower().strip()).ratio()
+
+
+def reference_match_score(result, target_artist, target_track, target_album):
+    """The original calculate_match_score, on titles romanized and folded like the engine does"""
+    title = normalize_title(result['title'])
+    artist_words = set(target_artist.lower().split())
+    track_words = set(target_track.lower().split())
+    title_words = set(title.split())
+    artist_word_matches = len(artist_words.intersection(title_words)) / max(len(artist_words), 1)
+    track_word_matches = len(track_words.intersection(title_words)) / max(len(track_words), 1)
+    combined_score = (
+        reference_similarity(target_artist.lower(), title) * 0.3 +
+        reference_similarity(target_track.lower(), title) * 0.3 +
+        reference_similarity(target_album.lower(), title) * 0.2 +
+        artist_word_matches * 0.1 +
+        track_word_matches * 0.1
+    )
+    quality_bonus = 0.1 if result['quality'] == 'lossless' else 0
+    type_bonus = 0.05 if result['type'] == 'single' else 0
+    return combined_score + quality_bonus + type_bonus
+
+
+RESULTS = [
+    {'title': 'The Beatles - Yesterday (1965) [FLAC]', 'quality': 'lossless', 'type': 'single'},
+    {'title': 'Beatles Yesterday compilation album', 'quality': 'lossy', 'type': 'album'},
+    {'title': 'Various Artists - Yesterday covers', 'quality': 'lossless', 'type': 'album'},
+    {'title': 'The Beatles - Help! (Complete Album)', 'quality': 'lossless', 'type': 'album'},
+    {'title': '  ', 'quality': 'lossy', 'type': 'single'},
+    {'title': 'Битлз - Дискография ' * 12, 'quality': 'lossy', 'type': 'album'},
+]
+
+TARGETS = [
+    ('The Beatles', 'Yesterday', 'Help!'),
+    ('Queen', 'Bohemian Rhapsody', ''),
+    ('  ', 'Imagine', 'Imagine'),
+]
+
+
+@pytest.mark.parametrize("target", TARGETS)
+def test_score_many_matches_original_scores(target):
+    """Test that score_many returns exactly the original scores"""
+    engine = MatchingEngine(backend="difflib")
+    
+    scores = engine.score_many(RESULTS, engine.compile_target(*target))
+    
+    assert scores == [reference_match_score(result, *target) for result in RESULTS]
+    assert scores == [engine.calculate_match_score(result, *target) for result in RESULTS]
+
+
+def test_find_matching_files_scores_unchanged():
+    """Test that file scores are the original four-similarity formula"""
+    engine = MatchingEngine(backend="difflib")
+    files = [
+        {'index': 0, 'path': 'N.E.R.D - Fly Or Die/03 - She Wants To Move.flac', 'length': 1,
+         'name': '03 - She Wants To Move.flac'},
+        {'index': 1, 'path': 'N.E.R.D - Fly Or Die/cover.jpg', 'length': 1, 'name': 'cover.jpg'},
+    ]
+    
+    matching = engine.find_matching_files(files, 'She Wants To Move', 'N.E.R.D')
+    
+    filename, filepath = files[0]['name'].lower(), files[0]['path'].lower()
+    file_words = set(filename.replace('.', ' ').replace('_', ' ').replace('-', ' ').split())
+    expected = (
+        max(reference_similarity('she wants to move', filename), reference_similarity('she wants to move', filepath)) * 0.4 +
+        max(reference_similarity('n.e.r.d', filename), reference_similarity('n.e.r.d', filepath)) * 0.3 +
+        (len({'she', 'wants', 'to', 'move'} & file_words) / 4) * 0.2 +
+        (len({'n.e.r.d'} & file_words) / 1) * 0.1
+    )
+    assert [f['index'] for f in matching] == [0]
+    assert matching[0]['match_score'] == expected
+
+
+def test_unknown_backend_is_rejected():
+    """Test that a misspelled backend name fails loudly"""
+    with pytest.raises(ValueError, match="Unknown similarity backend"):
+        get_backend("levenshtein")
+
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_rankings_stable_across_backends(backend):
+    """Test that every installed backend ranks candidates like the difflib reference"""
+    if backend == 'rapidfuzz':
+        pytest.importorskip("rapidfuzz")
+    reference = MatchingEngine(backend="difflib")
+    engine = MatchingEngine(backend=backend)
+    
+    for target in TARGETS:
+        expected = reference.score_many(RESULTS, reference.compile_target(*target))
+        scores = engine.score_many(RESULTS, engine.compile_target(*target))
+        
+        assert max(range(len(RESULTS)), key=scores.__getitem__) == max(range(len(RESULTS)), key=expected.__getitem__)
+        assert all(abs(a - b) <= 0.05 for a, b in zip(scores, expected))
+
+
+def test_score_matrix_fuzzy_scores_top_k_exactly():
+    """Test that the matrix path returns exact scores for each target's top candidates"""
+    engine = MatchingEngine(backend="difflib")
+    targets = [engine.compile_target(*target) for target in TARGETS]
+    
+    ranked = engine.score_matrix(targets, RESULTS, top_k=2)
+    
+    assert [len(row) for row in ranked] == [2, 2, 2]
+    for target, row in zip(targets, ranked):
+        assert all(score == engine.score_with_target(RESULTS[j], target) for j, score in row)
+    assert ranked[0][0][0] == 0
+
+
+def test_word_overlap_scores_without_numpy(monkeypatch):
+    """Test that the pure-Python fallback agrees with the NumPy matrix product"""
+    np = pytest.importorskip("numpy")
+    engine = MatchingEngine(backend="difflib")
+    targets = [engine.compile_target(*target) for target in TARGETS]
+    
+    vectorized = engine.word_overlap_scores(targets, RESULTS)
+    monkeypatch.setattr('spotify_downloader.utils.matching.np', None)
+    fallback = engine.word_overlap_scores(targets, RESULTS)
+    
+    assert np.allclose(vectorized, np.array(fallback), atol=1e-6)
\ No newline at end of file
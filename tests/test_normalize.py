@@ -0,0 +1,91 @@
+"""
+Test unicode, transliteration and decoration normalization
+"""
+
+from spotify_downloader.core.rutracker import RuTrackerClient
+from spotify_downloader.utils.matching import MatchingEngine, clean_query
+from spotify_downloader.utils.normalize import (
+    fold_diacritics, normalize_name, normalize_title, strip_decorations, transliterate
+)
+
+
+def make_result(title, link='https://rutracker.org/forum/viewtopic.php?t=1'):
+    """Build an unscored search result"""
+    return {'title': title, 'link': link, 'quality': 'lossless', 'type': 'album', 'priority': 3}
+
+
+def test_fold_diacritics_keeps_cyrillic():
+    """Test that accents are removed from Latin letters only"""
+    assert fold_diacritics('Beyoncé Sigur Rós Motörhead') == 'Beyonce Sigur Ros Motorhead'
+    assert fold_diacritics('Мумий Тролль') == 'Мумий Тролль'
+    assert fold_diacritics('Straße Øresund') == 'Strasse Oresund'
+
+
+def test_transliterate_and_normalize_title():
+    """Test that Cyrillic titles are romanized for comparison"""
+    assert transliterate('кино') == 'kino'
+    assert normalize_title('Кино - Группа крови [FLAC]') == 'kino - gruppa krovi [flac]'
+    assert normalize_title('Plain Title') == 'plain title'
+
+
+def test_strip_decorations():
+    """Test removing featured artists and remaster notes"""
+    assert strip_decorations('Crazy in Love (feat. JAY-Z)') == 'Crazy in Love'
+    assert strip_decorations('Hey Jude - Remastered 2015') == 'Hey Jude'
+    assert strip_decorations('Abbey Road (2019 Remaster)') == 'Abbey Road'
+    assert strip_decorations('Something feat. Someone') == 'Something'
+    assert strip_decorations('Remastered') == 'Remastered'
+    assert normalize_name('Déjà Vu (Remastered)') == 'deja vu'
+
+
+def test_clean_query():
+    """Test the search form of Spotify names"""
+    assert clean_query('Beyoncé') == 'Beyonce'
+    assert clean_query('Halo (feat. Someone) - Remastered 2011') == 'Halo'
+    assert clean_query('Кино') == 'Кино'
+
+
+def test_cyrillic_title_matches_latin_target():
+    """Test that a Latin target ranks the Cyrillic release of the same track first"""
+    engine = MatchingEngine(backend='difflib')
+    target = engine.compile_target('Kino', 'Gruppa krovi', 'Gruppa krovi')
+    results = [make_result('Кино - Группа крови (1988) [FLAC]'), make_result('Kiss - Love Gun (1977) [FLAC]')]
+    
+    scores = engine.score_many(results, target)
+    
+    assert scores[0] > scores[1]
+    assert engine.is_confident(results[0], target)
+    assert not engine.is_confident(results[1], target)
+
+
+def test_confident_match_skips_broad_searches(config, monkeypatch):
+    """Test that artist-only and other broad queries are skipped after a confident hit"""
+    client = RuTrackerClient(config)
+    queries = []
+    
+    def fake_search(query):
+        queries.append(query)
+        return [make_result('Beyoncé - Halo (2008) [FLAC]', f'https://rutracker.org/forum/viewtopic.php?t={len(queries)}')]
+    
+    monkeypatch.setattr(client, 'search', fake_search)
+    
+    candidates = client.get_candidates({'name': 'Halo - Remastered', 'artist': 'Beyoncé', 'album': 'I Am... Sasha Fierce'})
+    
+    assert queries == ['Beyonce Halo', 'Beyonce I Am... Sasha Fierce']
+    assert len(candidates) == 2
+
+
+def test_unconfident_results_fall_through(config, monkeypatch):
+    """Test that the full cascade still runs when no title names the track"""
+    client = RuTrackerClient(config)
+    queries = []
+    
+    def fake_search(query):
+        queries.append(query)
+        return [make_result('Some Other Band - Discography', f'https://rutracker.org/forum/viewtopic.php?t={len(queries)}')]
+    
+    monkeypatch.setattr(client, 'search', fake_search)
+    
+    client.get_candidates({'name': 'Halo', 'artist': 'Beyonce', 'album': 'Sasha Fierce'})
+    
+    assert len(queries) == 6
\ No newline at end of file
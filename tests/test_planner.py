@@ -0,0 +1,71 @@
+"""
+Test the album-aware acquisition planner
+"""
+
+from spotify_downloader.utils.planner import AcquisitionPlanner
+
+
+def make_result(title, topic_id, score, result_type='single', quality='lossless'):
+    """Build a scored search result"""
+    return {
+        'title': title,
+        'link': f'https://rutracker.org/forum/viewtopic.php?t={topic_id}',
+        'quality': quality,
+        'type': result_type,
+        'priority': 3,
+        'match_score': score
+    }
+
+
+TRACKS = [
+    {'name': 'Bohemian Rhapsody', 'artist': 'Queen', 'album': 'A Night at the Opera'},
+    {'name': 'Love of My Life', 'artist': 'Queen', 'album': 'A Night at the Opera'},
+    {'name': "You're My Best Friend", 'artist': 'Queen', 'album': 'A Night at the Opera'},
+]
+
+ALBUM = 'Queen - A Night at the Opera (1975) [FLAC] album'
+
+
+def test_album_torrent_replaces_singles():
+    """Test that one album torrent is chosen over one single per track"""
+    candidates = [
+        [make_result('Queen - Bohemian Rhapsody [FLAC]', 1, 0.62), make_result(ALBUM, 9, 0.58, 'album')],
+        [make_result('Queen - Love of My Life [FLAC]', 2, 0.60), make_result(ALBUM, 9, 0.57, 'album')],
+        [make_result("Queen - You're My Best Friend [FLAC]", 3, 0.61), make_result(ALBUM, 9, 0.56, 'album')],
+    ]
+    
+    choices = AcquisitionPlanner().plan(TRACKS, candidates)
+    
+    assert {choice['link'] for choice in choices} == {'https://rutracker.org/forum/viewtopic.php?t=9'}
+    assert [choice['match_score'] for choice in choices] == [0.58, 0.57, 0.56]
+
+
+def test_quality_tolerance_is_respected():
+    """Test that a much worse shared torrent does not replace a good match"""
+    candidates = [
+        [make_result('Queen - Bohemian Rhapsody [FLAC]', 1, 0.90), make_result(ALBUM, 9, 0.40, 'album')],
+        [make_result(ALBUM, 9, 0.57, 'album')],
+        [],
+    ]
+    
+    choices = AcquisitionPlanner(score_tolerance=0.1).plan(TRACKS, candidates)
+    
+    assert choices[0]['link'].endswith('t=1')
+    assert choices[1]['link'].endswith('t=9')
+    assert choices[2] is None
+
+
+def test_known_file_sizes_favour_smaller_download():
+    """Test that file lengths from torrent metadata steer the choice between equal torrents"""
+    candidates = [[make_result('Queen - Bohemian Rhapsody 24bit', 1, 0.60),
+                   make_result('Queen - Bohemian Rhapsody', 2, 0.60)]]
+    sizes = {'1': 4 * 1024 ** 3, '2': 40 * 1024 ** 2}
+    
+    def file_list(candidate):
+        topic_id = candidate['link'].rsplit('=', 1)[1]
+        return [{'index': 0, 'path': 'Queen - Bohemian Rhapsody.flac',
+                 'name': 'Queen - Bohemian Rhapsody.flac', 'length': sizes[topic_id]}]
+    
+    choices = AcquisitionPlanner().plan(TRACKS[:1], candidates, file_list)
+    
+    assert choices[0]['link'].endswith('t=2')
\ No newline at end of file
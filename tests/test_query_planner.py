@@ -0,0 +1,131 @@
+"""
+Test the adaptive ordering of search strategies
+"""
+
+import time
+
+from spotify_downloader.core.downloader import SpotifyPlaylistDownloader
+from spotify_downloader.core.rutracker import RuTrackerClient
+from spotify_downloader.utils.query_planner import QueryPlanner, STRATEGIES
+
+TRACK = {'name': 'Halo', 'artist': 'Beyonce', 'album': 'I Am... Sasha Fierce'}
+CYRILLIC_TRACK = {'name': 'Группа крови', 'artist': 'Кино', 'album': 'Группа крови', 'album_type': 'album'}
+
+
+def make_result(title, topic_id):
+    """Build a parsed search row"""
+    return {'title': title, 'link': f'https://rutracker.org/forum/viewtopic.php?t={topic_id}',
+            'quality': 'lossless', 'type': 'album', 'priority': 3}
+
+
+def test_features():
+    """Test that tracks are grouped by script and release type"""
+    assert QueryPlanner.features(TRACK) == 'latin:album'
+    assert QueryPlanner.features(CYRILLIC_TRACK) == 'cyrillic:album'
+    assert QueryPlanner.features(dict(TRACK, album_type='single')) == 'latin:single'
+
+
+def test_default_order_without_statistics(tmp_path):
+    """Test that the fixed order is kept until statistics say otherwise"""
+    planner = QueryPlanner(str(tmp_path / "stats.sqlite"))
+    
+    assert planner.order(TRACK) == (list(STRATEGIES), [])
+
+
+def test_winning_strategy_moves_first_per_feature(tmp_path):
+    """Test that a strategy winning for one kind of track leads only for that kind"""
+    planner = QueryPlanner(str(tmp_path / "stats.sqlite"))
+    for _ in range(10):
+        planner.record_search(CYRILLIC_TRACK, 'artist_track', False)
+        planner.record_search(CYRILLIC_TRACK, 'artist_album', True)
+        planner.record_win(CYRILLIC_TRACK, 'artist_album')
+    
+    planned, _ = planner.order(CYRILLIC_TRACK)
+    assert planned[0] == 'artist_album'
+    assert planner.order(TRACK) == (list(STRATEGIES), [])
+    
+    stats = planner.stats('cyrillic:album')['cyrillic:album']
+    assert stats['artist_album']['win_rate'] == 1.0
+    assert stats['artist_track'] == {'requests': 10, 'hits': 0, 'wins': 0, 'hit_rate': 0.0, 'win_rate': 0.0}
+
+
+def test_losing_strategy_is_kept_in_reserve(tmp_path):
+    """Test that a strategy that never wins only runs when nothing else found a result"""
+    planner = QueryPlanner(str(tmp_path / "stats.sqlite"))
+    for _ in range(QueryPlanner.MIN_REQUESTS):
+        planner.record_search(TRACK, 'album', False)
+    
+    planned, reserve = planner.order(TRACK)
+    
+    assert reserve == ['album']
+    assert 'album' not in planned
+
+
+def test_get_candidates_follows_the_planner(config, monkeypatch):
+    """Test that searches run in the planned order and are recorded"""
+    client = RuTrackerClient(config)
+    for _ in range(10):
+        client.query_planner.record_search(TRACK, 'artist_album', True)
+        client.query_planner.record_win(TRACK, 'artist_album')
+    queries = []
+    
+    def fake_search(query):
+        queries.append(query)
+        return [make_result('Beyonce - Halo (2008) [FLAC]', len(queries))]
+    
+    monkeypatch.setattr(client, 'search', fake_search)
+    
+    candidates = client.get_candidates(TRACK)
+    
+    assert queries == ['Beyonce I Am... Sasha Fierce', 'Beyonce Halo']
+    assert {candidate['search_strategy'] for candidate in candidates} == {'artist_album', 'artist_track'}
+    assert client.query_planner.stats('latin:album')['latin:album']['artist_track']['hits'] == 1
+
+
+def test_fixed_order_when_disabled(config, monkeypatch):
+    """Test that adaptive_search=False keeps the fixed strategy order"""
+    config.adaptive_search = False
+    client = RuTrackerClient(config)
+    for _ in range(10):
+        client.query_planner.record_win(TRACK, 'artist_album')
+    queries = []
+    
+    def fake_search(query):
+        queries.append(query)
+        return []
+    
+    monkeypatch.setattr(client, 'search', fake_search)
+    
+    client.get_candidates(TRACK)
+    
+    assert queries[:2] == ['Beyonce Halo', 'Beyonce I Am... Sasha Fierce']
+
+
+def test_win_is_shared_by_every_strategy_that_found_the_topic(config, monkeypatch):
+    """Test that a topic returned by several searches credits each of their strategies"""
+    config.download_torrents = False
+    config.verify_candidates = 0
+    downloader = SpotifyPlaylistDownloader(config)
+    monkeypatch.setattr(downloader.rutracker_client, 'login', lambda: True)
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    
+    def fake_search(query):
+        return [make_result('Beyonce - Halo (2008) [FLAC]', 1)]
+    
+    monkeypatch.setattr(downloader.rutracker_client, 'search', fake_search)
+    
+    downloader.process_tracks([TRACK])
+    
+    stats = downloader.rutracker_client.query_planner.stats('latin:album')['latin:album']
+    assert stats['artist_track']['wins'] == 1
+    assert stats['artist_album']['wins'] == 1
+
+
+def test_offline_searches_are_not_recorded(config):
+    """Test that catalog lookups in offline mode leave the statistics alone"""
+    config.offline_search = True
+    client = RuTrackerClient(config)
+    client.catalog.add([make_result('Beyonce - Halo (2008) [FLAC]', 1)])
+    
+    assert client.get_candidates(TRACK)
+    assert client.query_planner.stats() == {}
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+Test the dry-run estimate of a playlist run
+"""
+
+import pytest
+
+from spotify_downloader.core.downloader import SpotifyPlaylistDownloader
+from spotify_downloader.utils.run_estimate import RunEstimate
+
+CATALOG_ROWS = [
+    {'title': 'Queen - Bohemian Rhapsody (single) [FLAC]', 'link': 'https://rutracker.org/forum/viewtopic.php?t=200',
+     'quality': 'lossless', 'type': 'single', 'priority': 4},
+]
+
+TRACKS = [
+    {'name': 'Bohemian Rhapsody', 'artist': 'Queen', 'album': 'A Night at the Opera'},
+    {'name': 'Halo', 'artist': 'Beyonce', 'album': 'I Am... Sasha Fierce'},
+    {'name': 'If I Were a Boy', 'artist': 'Beyonce', 'album': 'I Am... Sasha Fierce'},
+    {'name': 'Creep', 'artist': 'Radiohead', 'album': 'Pablo Honey'},
+]
+
+
+@pytest.fixture
+def downloader(config, monkeypatch):
+    """Downloader whose RuTracker client fails on any network use"""
+    downloader = SpotifyPlaylistDownloader(config)
+    downloader.rutracker_client.catalog.add(CATALOG_ROWS)
+    downloader.match_cache.put(TRACKS[3], {'title': 'Radiohead - Pablo Honey [FLAC]', 'quality': 'lossless',
+                                           'type': 'album', 'priority': 3, 'match_score': 0.9,
+                                           'link': 'https://rutracker.org/forum/viewtopic.php?t=300'}, '300')
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("RuTracker should not be contacted")
+    
+    for name in ('login', 'search', 'get_topic_file_list', 'fetch_torrent', 'get_candidates'):
+        monkeypatch.setattr(downloader.rutracker_client, name, fail)
+    return downloader
+
+
+def test_estimate_counts_each_kind_of_track(downloader):
+    """Test that cached, catalog and unknown tracks are counted without any request"""
+    estimate = downloader.estimate_run(TRACKS)
+    
+    assert (estimate.cached, estimate.from_catalog, estimate.to_search) == (1, 1, 2)
+    # Two known topics plus one album torrent for the two Beyonce tracks
+    assert estimate.torrent_downloads == 3
+    assert estimate.transmission_adds == 3
+    # The catalog track comes before any login, so only the searched tracks fetch file lists
+    assert estimate.topic_fetches == 2 * 3
+    assert estimate.logins == 1
+    assert 2 * 2 <= estimate.searches <= 2 * 6
+    assert estimate.download_bytes > 0
+
+
+def test_catalog_file_lists_are_fetched_after_a_login(downloader):
+    """Test that catalog candidates count file-list fetches once an earlier search has logged in"""
+    estimate = downloader.estimate_run(TRACKS[1:3] + TRACKS[:1])
+    
+    assert estimate.from_catalog == 1
+    assert estimate.topic_fetches == 1 + 2 * 3
+
+
+def test_offline_estimate_has_no_searches(downloader):
+    """Test that an offline run only pays for .torrent downloads"""
+    downloader.config.offline_search = True
+    
+    estimate = downloader.estimate_run(TRACKS)
+    
+    assert estimate.searches == 0
+    assert estimate.topic_fetches == 0
+    assert estimate.requests == RunEstimate.LOGIN_REQUESTS + 3 * RunEstimate.DOWNLOAD_REQUESTS
+
+
+def test_estimated_time_uses_request_delay():
+    """Test that the delay applies after each searched track, file-list fetch and new torrent"""
+    estimate = RunEstimate(to_search=10, searches=20, topic_fetches=7, torrent_downloads=5)
+    
+    base = estimate.estimated_seconds(0)
+    
+    assert estimate.estimated_seconds(2) == base + 22 * 2
+    assert estimate.estimated_seconds(2, searched_online=False) == base + 12 * 2
\ No newline at end of file
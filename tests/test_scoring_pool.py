@@ -0,0 +1,103 @@
+"""
+Tests for process-pool scoring
+"""
+
+import pytest
+
+from spotify_downloader.utils.matching import MatchingEngine
+from spotify_downloader.utils.parallel import ScoringPool
+
+
+@pytest.fixture
+def pool():
+    """Two-worker pool with small chunks and a low offload threshold"""
+    pool = ScoringPool(2, chunk_size=7, min_batch=10)
+    yield pool
+    pool.close()
+
+
+def make_results(count):
+    """Build parsed search rows for the same album"""
+    return [{'title': f"Queen - A Night at the Opera {i} [FLAC]", 'quality': 'lossless' if i % 2 else 'lossy',
+             'type': 'single' if i % 3 else 'album'} for i in range(count)]
+
+
+def make_files(count, directory='Queen/Album'):
+    """Build a numbered file list with the target song at the end"""
+    return [{'index': i, 'name': f"{i:02d} - Track {i}.flac", 'path': f"{directory}/{i:02d} - Track {i}.flac",
+             'length': 1000} for i in range(count)] + \
+        [{'index': count, 'name': '11 - Bohemian Rhapsody.flac',
+          'path': 'Queen/A Night at the Opera/11 - Bohemian Rhapsody.flac', 'length': 1000}]
+
+
+def test_pool_scores_match_inline(pool):
+    """Test that pooled result scores equal inline scores"""
+    inline = MatchingEngine(backend='difflib')
+    pooled = MatchingEngine(backend='difflib')
+    pooled.pool = pool
+    results = make_results(40)
+    target = inline.compile_target('Queen', 'Bohemian Rhapsody', 'A Night at the Opera')
+    
+    assert pooled.score_many(results, target) == inline.score_many(results, target)
+
+
+def test_pool_file_matches_match_inline(pool):
+    """Test that pooled file matching returns the same files and scores as inline matching"""
+    inline = MatchingEngine(backend='difflib')
+    pooled = MatchingEngine(backend='difflib')
+    pooled.pool = pool
+    
+    expected = inline.find_matching_files(make_files(30), 'Bohemian Rhapsody', 'Queen')
+    actual = pooled.find_matching_files(make_files(30), 'Bohemian Rhapsody', 'Queen')
+    
+    assert [(f['index'], f['match_score']) for f in actual] == [(f['index'], f['match_score']) for f in expected]
+    assert actual[0]['name'] == '11 - Bohemian Rhapsody.flac'
+
+
+def test_small_batches_stay_inline():
+    """Test that batches below min_batch never start the workers"""
+    pool = ScoringPool(2, min_batch=100)
+    engine = MatchingEngine(backend='difflib')
+    engine.pool = pool
+    target = engine.compile_target('Queen', 'Bohemian Rhapsody', 'A Night at the Opera')
+    
+    engine.score_many(make_results(5), target)
+    
+    assert pool._executor is None
+    assert not ScoringPool(0).should_offload(1000)
+
+
+def test_prefiltered_batches_stay_inline():
+    """Test that large lists cut down by the prefilter are scored without the workers"""
+    pool = ScoringPool(2)
+    engine = MatchingEngine(backend='difflib')
+    engine.pool = pool
+    track = {'name': 'Bohemian Rhapsody', 'artist': 'Queen', 'album': 'A Night at the Opera'}
+    target = engine.compile_target('Queen', 'Bohemian Rhapsody', 'A Night at the Opera')
+    
+    try:
+        matches = engine.find_track_files(make_files(400, 'Queen/A Night at the Opera'), track)
+        survivors = engine.score_candidates(make_results(300), target)
+        assert pool._executor is None
+    finally:
+        pool.close()
+    
+    assert matches[0]['name'] == '11 - Bohemian Rhapsody.flac'
+    assert len(survivors) == MatchingEngine.PREFILTER_TOP_N
+
+
+def test_large_batches_use_the_pool():
+    """Test that a batch of at least min_batch fully scored results goes to the workers"""
+    pool = ScoringPool(2)
+    engine = MatchingEngine(backend='difflib')
+    engine.pool = pool
+    target = engine.compile_target('Queen', 'Bohemian Rhapsody', 'A Night at the Opera')
+    results = make_results(pool.min_batch)
+    
+    try:
+        scores = engine.score_many(results, target)
+        assert pool._executor is not None
+    finally:
+        pool.close()
+    
+    assert scores == MatchingEngine(backend='difflib').score_many(results, target)
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Test the token index prefilter used before fuzzy scoring
+"""
+
+from spotify_downloader.utils.matching import MatchingEngine
+from spotify_downloader.utils.token_index import TokenIndex
+
+
+def make_discography(albums=50, tracks=20):
+    """Build a large discography-style file list"""
+    files = []
+    for album in range(albums):
+        for track in range(tracks):
+            name = f"{track + 1:02d} - Song Number {album * tracks + track}.flac"
+            files.append({
+                'index': len(files),
+                'path': f"Queen - Discography/{1970 + album} - Album {album}/{name}",
+                'length': 30000000,
+                'name': name
+            })
+    return files
+
+
+def test_query_ranks_shared_rare_tokens_first():
+    """Test that candidates sharing rare tokens outrank ones sharing common tokens"""
+    index = TokenIndex([
+        'Queen - Greatest Hits [FLAC]',
+        'Queen - A Night at the Opera [FLAC]',
+        'Metallica - Master of Puppets',
+    ])
+    
+    ranked = index.query('Queen Bohemian Rhapsody A Night at the Opera')
+    
+    assert [doc_id for doc_id, _ in ranked][:2] == [1, 0]
+    assert 2 not in [doc_id for doc_id, _ in ranked]
+
+
+def test_stopwords_alone_do_not_match():
+    """Test that sharing only format tags and articles is not a match"""
+    index = TokenIndex(['The Doors - LP [FLAC]'])
+    
+    assert index.query('The FLAC LP') == []
+
+
+def test_small_sets_are_not_prefiltered():
+    """Test that small candidate sets are scored in full"""
+    engine = MatchingEngine(backend="difflib")
+    texts = ['Unrelated title'] * engine.PREFILTER_MIN_CANDIDATES
+    
+    assert engine.prefilter(texts, 'Queen') == list(range(len(texts)))
+
+
+def test_large_torrent_only_scores_survivors():
+    """Test that a discography torrent scores few files and still finds the track"""
+    engine = MatchingEngine(backend="difflib")
+    files = make_discography()
+    
+    matching = engine.find_matching_files(files, 'Song Number 777', 'Queen')
+    
+    assert matching[0]['name'] == '18 - Song Number 777.flac'
+    scored = [f for f in files if 'match_score' in f]
+    assert len(scored) <= engine.PREFILTER_TOP_N
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Test that tracks sharing a RuTracker topic are fetched and added once
+"""
+
+from spotify_downloader.core.downloader import SpotifyPlaylistDownloader
+from spotify_downloader.core.transmission import TransmissionClient
+
+
+def make_entry(name, link):
+    """Build a (track, match, result) entry as produced by process_tracks"""
+    track = {'name': name, 'artist': 'Queen', 'album': 'A Night at the Opera'}
+    match = {'link': link, 'title': 'Queen - A Night at the Opera [FLAC]'}
+    return track, match, {'transmission_opened': 'No'}
+
+
+def test_group_matches_by_topic(config):
+    """Test that matches are grouped by topic ID in playlist order"""
+    downloader = SpotifyPlaylistDownloader(config)
+    matched = [
+        make_entry('Bohemian Rhapsody', 'https://rutracker.org/forum/viewtopic.php?t=100'),
+        make_entry('Radio Ga Ga', 'https://rutracker.org/forum/viewtopic.php?t=200'),
+        make_entry('Love of My Life', 'https://rutracker.org/forum/viewtopic.php?t=100'),
+    ]
+    
+    groups = downloader.group_matches_by_topic(matched)
+    
+    assert list(groups) == ['100', '200']
+    assert [track['name'] for track, _, _ in groups['100']] == ['Bohemian Rhapsody', 'Love of My Life']
+
+
+def test_acquire_torrents_fetches_each_topic_once(config, monkeypatch):
+    """Test that a shared topic is downloaded and added to Transmission once"""
+    downloader = SpotifyPlaylistDownloader(config)
+    fetched, added = [], []
+    
+    def fake_fetch(link):
+        fetched.append(link)
+        return 'https://rutracker.org/forum/dl.php?t=100', '/tmp/abc.torrent'
+    
+    def fake_add(torrent_file, tracks):
+        added.append([track['name'] for track in tracks])
+        return True
+    
+    monkeypatch.setattr(downloader.rutracker_client, 'login', lambda: True)
+    monkeypatch.setattr(downloader.rutracker_client, 'fetch_torrent', fake_fetch)
+    monkeypatch.setattr(downloader.transmission_client, 'add_torrent_for_tracks', fake_add)
+    monkeypatch.setattr('spotify_downloader.core.downloader.time.sleep', lambda seconds: None)
+    
+    matched = [
+        make_entry('Bohemian Rhapsody', 'https://rutracker.org/forum/viewtopic.php?t=100'),
+        make_entry('Love of My Life', 'https://rutracker.org/forum/viewtopic.php?t=100'),
+    ]
+    downloader._acquire_torrents(matched)
+    
+    assert len(fetched) == 1
+    assert added == [['Bohemian Rhapsody', 'Love of My Life']]
+    assert all(result['transmission_opened'] == 'Yes' for _, _, result in matched)
+    assert all(result['torrent_file'] == '/tmp/abc.torrent' for _, _, result in matched)
+
+
+def test_select_files_covers_every_track(config):
+    """Test that one selection holds the best file of each track"""
+    client = TransmissionClient(config)
+    files = [
+        {'index': 0, 'path': 'Queen/01 - Bohemian Rhapsody.flac', 'length': 100, 'name': '01 - Bohemian Rhapsody.flac'},
+        {'index': 1, 'path': 'Queen/02 - Love of My Life.flac', 'length': 100, 'name': '02 - Love of My Life.flac'},
+        {'index': 2, 'path': 'Queen/cover.jpg', 'length': 10, 'name': 'cover.jpg'},
+    ]
+    tracks = [
+        {'name': 'Love of My Life', 'artist': 'Queen'},
+        {'name': 'Bohemian Rhapsody', 'artist': 'Queen'},
+    ]
+    
+    selected = client.select_files(files, tracks)
+    
+    assert [f['index'] for f in selected] == [0, 1]
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Test the index of downloaded torrents
+"""
+
+import os
+
+import bencodepy
+
+from spotify_downloader.core.downloader import SpotifyPlaylistDownloader
+from spotify_downloader.utils.matching import MatchingEngine
+from spotify_downloader.utils.torrent_index import TorrentIndex
+
+
+TRACK = {'name': 'Love of My Life', 'artist': 'Queen', 'album': 'A Night at the Opera'}
+
+ALBUM_FILES = [
+    ("01 - Death on Two Legs.flac", 25000000),
+    ("09 - Love of My Life.flac", 22000000),
+    ("11 - Bohemian Rhapsody.flac", 40000000),
+    ("cover.jpg", 100000),
+]
+
+
+def write_torrent(directory, filename, name="Queen - A Night at the Opera (1975) [FLAC]", files=None,
+                  comment="https://rutracker.org/forum/viewtopic.php?t=100"):
+    """Write a small multi-file torrent and return its path"""
+    files = files or ALBUM_FILES
+    info = {
+        b'name': name.encode('utf-8'),
+        b'piece length': 16384,
+        b'pieces': b'\x00' * 20,
+        b'files': [{b'path': [path.encode('utf-8')], b'length': length} for path, length in files],
+    }
+    torrent = {b'announce': b'http://bt.example/ann', b'info': info}
+    if comment:
+        torrent[b'comment'] = comment.encode('utf-8')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, filename)
+    with open(path, 'wb') as f:
+        f.write(bencodepy.encode(torrent))
+    return path
+
+
+def test_refresh_is_incremental(tmp_path):
+    """Test that unchanged torrents are not decoded again and deleted ones are dropped"""
+    torrents_dir = str(tmp_path / "torrents")
+    index = TorrentIndex(str(tmp_path / "index.sqlite"))
+    first = write_torrent(torrents_dir, "a.torrent")
+    write_torrent(torrents_dir, "b.torrent", name="Queen - News of the World",
+                  files=[("01 - We Will Rock You.mp3", 5000000)], comment="")
+    
+    assert index.refresh(torrents_dir, {}) == 2
+    assert index.refresh(torrents_dir, {}) == 0
+    
+    os.remove(first)
+    assert index.refresh(torrents_dir, {}) == 0
+    assert index.topics() == []
+
+
+def test_topic_from_comment_or_store(tmp_path):
+    """Test that the topic ID comes from the comment, else from the store's topic index"""
+    torrents_dir = str(tmp_path / "torrents")
+    index = TorrentIndex(str(tmp_path / "index.sqlite"))
+    write_torrent(torrents_dir, "a.torrent")
+    write_torrent(torrents_dir, "b.torrent", name="Queen - News of the World",
+                  files=[("01 - We Will Rock You.mp3", 5000000)], comment="")
+    index.refresh(torrents_dir, {})
+    news_hash = [row for row in index.connection.execute('SELECT info_hash, name FROM torrents')
+                 if 'News' in row[1]][0][0]
+    index.close()
+    
+    # A reopened index keeps its rows; a torrent only gets its topic from the store once it changes
+    index = TorrentIndex(str(tmp_path / "index.sqlite"))
+    os.utime(os.path.join(torrents_dir, "b.torrent"), ns=(1, 1))
+    index.refresh(torrents_dir, {news_hash: '200'})
+    
+    assert sorted(topic for topic, _, _ in index.topics()) == ['100', '200']
+
+
+def test_find_track_in_downloaded_album(tmp_path):
+    """Test that a track inside an indexed album torrent is found with its file"""
+    torrents_dir = str(tmp_path / "torrents")
+    index = TorrentIndex(str(tmp_path / "index.sqlite"))
+    write_torrent(torrents_dir, "a.torrent")
+    index.refresh(torrents_dir, {})
+    
+    match = index.find_track(TRACK, MatchingEngine())
+    
+    assert match['link'] == 'https://rutracker.org/forum/viewtopic.php?t=100'
+    assert match['verified_file'] == "09 - Love of My Life.flac"
+    assert match['quality'] == 'lossless'
+    assert match['type'] == 'album'
+    assert match['match_score'] > 0
+
+
+def test_find_track_needs_artist_and_title(tmp_path):
+    """Test that a file with the right title by another artist is not a hit"""
+    torrents_dir = str(tmp_path / "torrents")
+    index = TorrentIndex(str(tmp_path / "index.sqlite"))
+    write_torrent(torrents_dir, "a.torrent", name="Scorpions - Lovedrive",
+                  files=[("01 - Love of My Life.flac", 22000000)])
+    index.refresh(torrents_dir, {})
+    
+    assert index.find_track(TRACK, MatchingEngine()) is None
+    assert index.find_track(dict(TRACK, name='Radio Ga Ga'), MatchingEngine()) is None
+
+
+def test_process_tracks_uses_downloaded_torrents(config, monkeypatch):
+    """Test that a track in an already downloaded torrent needs no login or search"""
+    write_torrent(config.torrents_dir, "legacy.torrent")
+    downloader = SpotifyPlaylistDownloader(config)
+    config.download_torrents = False
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("RuTracker should not be contacted")
+    
+    monkeypatch.setattr(downloader.rutracker_client, 'login', fail)
+    monkeypatch.setattr(downloader.rutracker_client, 'get_candidates', fail)
+    
+    results = downloader.process_tracks([TRACK])
+    
+    assert results[0]['rutracker_link'] == 'https://rutracker.org/forum/viewtopic.php?t=100'
+    assert downloader.rutracker_client.torrent_store.get_by_topic('100').endswith('legacy.torrent')
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Test decoding each torrent once per process
+"""
+
+import os
+
+import bencodepy
+import pytest
+
+from spotify_downloader.utils import torrent as torrent_module
+from spotify_downloader.utils.file_table import FileTable
+from spotify_downloader.utils.torrent import TorrentAnalyzer, TorrentMetadata
+
+
+def write_torrent(path, files):
+    """Write a multi-file torrent with the given (path, length) files"""
+    info = {b'name': b'Queen - A Night at the Opera', b'piece length': 16384, b'pieces': b'\x00' * 20,
+            b'files': [{b'path': name.encode().split(b'/'), b'length': length} for name, length in files]}
+    path.write_bytes(bencodepy.encode({b'announce': b'http://bt.example/ann', b'info': info}))
+
+
+@pytest.fixture
+def decode_count(monkeypatch):
+    """Count how often torrent files are decoded"""
+    TorrentMetadata.clear_cache()
+    calls = []
+    real_read = torrent_module.read_torrent
+    
+    def counting_read(path):
+        calls.append(path)
+        return real_read(path)
+    
+    monkeypatch.setattr(torrent_module, 'read_torrent', counting_read)
+    yield calls
+    TorrentMetadata.clear_cache()
+
+
+def test_analyses_share_one_decode(tmp_path, decode_count):
+    """Test that file list, info and hash of one torrent cost a single decode"""
+    path = tmp_path / 'album.torrent'
+    write_torrent(path, [('CD1/11 - Bohemian Rhapsody.flac', 44000000), ('cover.jpg', 100)])
+    analyzer = TorrentAnalyzer()
+    
+    files = analyzer.analyze_torrent_contents(str(path))
+    info = analyzer.get_torrent_info(str(path))
+    info_hash = analyzer.get_info_hash(str(path))
+    TorrentAnalyzer().analyze_torrent_contents(str(path))
+    
+    assert len(decode_count) == 1
+    assert files[0] == {'index': 0, 'path': 'CD1/11 - Bohemian Rhapsody.flac', 'length': 44000000,
+                        'name': '11 - Bohemian Rhapsody.flac'}
+    assert info['total_size'] == 44000100
+    assert info['piece_length'] == 16384
+    assert len(info_hash) == 40
+
+
+def test_changed_file_is_decoded_again(tmp_path, decode_count):
+    """Test that the cache follows the file's mtime and size"""
+    path = tmp_path / 'album.torrent'
+    write_torrent(path, [('01 - Track.flac', 1000)])
+    first = TorrentMetadata.load(str(path))
+    
+    write_torrent(path, [('01 - Track.flac', 1000), ('02 - Track.flac', 2000)])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+    second = TorrentMetadata.load(str(path))
+    
+    assert len(decode_count) == 2
+    assert len(first.files) == 1
+    assert len(second.files) == 2
+    assert second.total_size == 3000
+
+
+def test_cache_keeps_the_most_recent_torrents(tmp_path, decode_count, monkeypatch):
+    """Test that the least recently used torrent is dropped once the cache is full"""
+    monkeypatch.setattr(TorrentMetadata, 'MAX_CACHED', 2)
+    paths = [tmp_path / f'album{i}.torrent' for i in range(3)]
+    for path in paths:
+        write_torrent(path, [('01 - Track.flac', 1000)])
+    
+    TorrentMetadata.load(str(paths[0]))
+    TorrentMetadata.load(str(paths[1]))
+    TorrentMetadata.load(str(paths[0]))
+    TorrentMetadata.load(str(paths[2]))
+    TorrentMetadata.load(str(paths[0]))
+    TorrentMetadata.load(str(paths[1]))
+    
+    assert len(TorrentMetadata._cache) == 2
+    assert decode_count == [os.path.realpath(paths[i]) for i in (0, 1, 2, 1)]
+
+
+def test_uncached_load_is_not_remembered(tmp_path, decode_count):
+    """Test that short-lived files such as partial downloads stay out of the cache"""
+    path = tmp_path / 'album.torrent.part'
+    write_torrent(path, [('01 - Track.flac', 1000)])
+    
+    assert len(TorrentAnalyzer().get_info_hash(str(path), cache=False)) == 40
+    assert TorrentMetadata._cache == {}
+
+
+def test_file_dicts_are_fresh_copies(tmp_path, decode_count):
+    """Test that annotating returned files does not leak into the cached metadata"""
+    path = tmp_path / 'album.torrent'
+    write_torrent(path, [('01 - Track.flac', 1000)])
+    analyzer = TorrentAnalyzer()
+    
+    analyzer.analyze_torrent_contents(str(path))[0]['match_score'] = 0.9
+    
+    assert 'match_score' not in analyzer.analyze_torrent_contents(str(path))[0]
+    assert isinstance(TorrentMetadata.load(str(path)).files, FileTable)
+
+
+def test_missing_file(tmp_path):
+    """Test that unreadable torrents give empty results"""
+    analyzer = TorrentAnalyzer()
+    
+    assert analyzer.analyze_torrent_contents(str(tmp_path / 'missing.torrent')) == []
+    assert analyzer.get_torrent_info(str(tmp_path / 'missing.torrent')) == {}
+    assert analyzer.get_info_hash(str(tmp_path / 'missing.torrent')) is None
\ No newline at end of file
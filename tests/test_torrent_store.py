@@ -0,0 +1,59 @@
+"""
+Test the content-addressed torrent store
+"""
+
+import hashlib
+import os
+
+import bencodepy
+
+from spotify_downloader.utils.torrent import TorrentMetadata
+from spotify_downloader.utils.torrent_store import TorrentStore
+
+
+def make_torrent(name="Artist - Album", files=None):
+    """Build a small multi-file torrent and return (raw bytes, info-hash)"""
+    files = files or [("01 - Track.flac", 1000), ("cover.jpg", 10)]
+    info = {
+        b'name': name.encode('utf-8'),
+        b'piece length': 16384,
+        b'pieces': b'\x00' * 20,
+        b'files': [{b'path': [path.encode('utf-8')], b'length': length} for path, length in files],
+    }
+    raw = bencodepy.encode({b'announce': b'http://bt.example/ann', b'info': info})
+    return raw, hashlib.sha1(bencodepy.encode(info)).hexdigest()
+
+
+def test_save_stream_is_keyed_by_info_hash(tmp_path):
+    """Test that streamed torrents are stored under their info-hash"""
+    store = TorrentStore(str(tmp_path))
+    raw, info_hash = make_torrent()
+    
+    path = store.save_stream([raw[:7], raw[7:]], topic_id="12345")
+    
+    assert path == os.path.join(str(tmp_path), f"{info_hash}.torrent")
+    with open(path, 'rb') as f:
+        assert f.read() == raw
+    assert store.get_by_topic("12345") == path
+    assert store.get_by_hash(info_hash.upper()) == path
+    assert not any(cached.endswith('.part') for cached in TorrentMetadata._cache)
+
+
+def test_index_survives_reload(tmp_path):
+    """Test that the lookup index is persisted across instances"""
+    raw, info_hash = make_torrent()
+    TorrentStore(str(tmp_path)).save_stream([raw], topic_id="777")
+    
+    store = TorrentStore(str(tmp_path))
+    assert store.get_topic_hash("777") == info_hash
+    assert store.get_by_topic("777").endswith(f"{info_hash}.torrent")
+    assert store.get_by_topic("778") is None
+
+
+def test_invalid_data_is_discarded(tmp_path):
+    """Test that non-torrent responses leave nothing behind"""
+    store = TorrentStore(str(tmp_path))
+    
+    assert store.save_stream([b"<html>login required</html>"], topic_id="1") is None
+    assert store.get_by_topic("1") is None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.part')]
\ No newline at end of file
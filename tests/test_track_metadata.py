@@ -0,0 +1,94 @@
+"""
+Test keeping Spotify track metadata and using it for file matching
+"""
+
+from spotify_downloader.core.downloader import SpotifyPlaylistDownloader
+from spotify_downloader.utils.match_cache import MatchCache
+from spotify_downloader.utils.matching import MatchingEngine
+
+
+SPOTIFY_ITEM = {
+    'track': {
+        'type': 'track',
+        'id': '3BQHpFgAp4l80e1XslIjNI',
+        'name': 'Yesterday - Remastered 2009',
+        'artists': [{'name': 'The Beatles'}],
+        'album': {'name': 'Help! (Remastered)'},
+        'duration_ms': 125666,
+        'track_number': 13,
+        'disc_number': 1,
+        'external_ids': {'isrc': 'GBAYE0601477'},
+    }
+}
+
+
+def make_file(index, path, length=10 * 1024 * 1024):
+    """Build a torrent file entry"""
+    return {'index': index, 'path': path, 'name': path.rsplit('/', 1)[-1], 'length': length}
+
+
+def test_playlist_tracks_keep_metadata(config, monkeypatch):
+    """Test that duration, numbers, all artists and ISRC are kept"""
+    downloader = SpotifyPlaylistDownloader(config)
+    monkeypatch.setattr(downloader.spotify_client, 'playlist_tracks',
+                        lambda playlist_id: {'items': [SPOTIFY_ITEM], 'next': None})
+    
+    track = downloader.get_playlist_tracks('playlist')[0]
+    
+    assert track['artists'] == ['The Beatles']
+    assert (track['duration_ms'], track['track_number'], track['disc_number']) == (125666, 13, 1)
+    assert track['isrc'] == 'GBAYE0601477'
+
+
+def test_file_number():
+    """Test parsing disc and track number prefixes"""
+    assert MatchingEngine.file_number('03 - Yesterday.flac') == (None, 3)
+    assert MatchingEngine.file_number('13. Yesterday.flac') == (None, 13)
+    assert MatchingEngine.file_number('2-05 Intro.mp3') == (2, 5)
+    assert MatchingEngine.file_number('1965 - Yesterday.flac') == (None, None)
+    assert MatchingEngine.file_number('Yesterday.flac') == (None, None)
+
+
+def test_plausible_length():
+    """Test checking a file's size against the track duration"""
+    engine = MatchingEngine(backend='difflib')
+    
+    assert engine.plausible_length('a.mp3', 4 * 1024 * 1024, 180000)
+    assert not engine.plausible_length('a.mp3', 40 * 1024 * 1024, 180000)
+    assert not engine.plausible_length('a.flac', 1024 * 1024, 180000)
+    assert engine.plausible_length('a.flac', 0, 180000)
+    assert engine.plausible_length('cover.jpg', 40 * 1024 * 1024, 180000)
+
+
+def test_disc_and_track_number_pick_the_right_copy():
+    """Test that numbers decide between files with the same title"""
+    engine = MatchingEngine(backend='difflib')
+    files = [make_file(0, 'Album/CD1/1-05 - Intro.flac'), make_file(1, 'Album/CD2/2-05 - Intro.flac'),
+             make_file(2, 'Album/CD2/2-06 - Outro.flac')]
+    track = {'name': 'Intro', 'artist': 'Someone', 'album': 'Album', 'track_number': 5, 'disc_number': 2}
+    
+    assert engine.find_matching_files([dict(f) for f in files], 'Intro', 'Someone')[0]['index'] == 0
+    assert engine.find_track_files([dict(f) for f in files], track)[0]['index'] == 1
+
+
+def test_duration_rules_out_wrong_size():
+    """Test that a file too long for the track loses to one of fitting size"""
+    engine = MatchingEngine(backend='difflib')
+    files = [make_file(0, 'Beatles/Yesterday (Extended Mix).mp3', 30 * 1024 * 1024),
+             make_file(1, 'Beatles/Yesterday.mp3', 4 * 1024 * 1024)]
+    track = {'name': 'Yesterday', 'artist': 'The Beatles', 'duration_ms': 125666}
+    
+    matching = engine.find_track_files([dict(f) for f in files], track)
+    
+    assert [f['index'] for f in matching] == [1]
+
+
+def test_isrc_key_matches_across_albums(tmp_path):
+    """Test that the same recording on another release hits the cache"""
+    cache = MatchCache(str(tmp_path / "cache.sqlite"))
+    cache.put({'id': 'a', 'name': 'Yesterday', 'artist': 'The Beatles', 'album': 'Help!', 'isrc': 'GBAYE0601477'},
+              {'title': 'The Beatles - Help! [FLAC]', 'link': 'https://rutracker.org/forum/viewtopic.php?t=1'})
+    
+    cached = cache.get({'id': 'b', 'name': 'Yesterday', 'artist': 'The Beatles', 'album': '1', 'isrc': 'gbaye0601477'})
+    
+    assert cached['match']['link'] == 'https://rutracker.org/forum/viewtopic.php?t=1'
\ No newline at end of file
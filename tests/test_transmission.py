@@ -0,0 +1,52 @@
+"""
+Test adding torrents to Transmission and selecting their files by info-hash
+"""
+
+import subprocess
+
+import bencodepy
+import pytest
+
+from spotify_downloader.core.transmission import TransmissionClient
+
+
+class FakeCompleted:
+    """Minimal subprocess.CompletedProcess stand-in"""
+    
+    def __init__(self, returncode=0):
+        self.returncode = returncode
+        self.stdout = ''
+        self.stderr = ''
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    """Record transmission-remote invocations instead of running them"""
+    calls = []
+    
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        return FakeCompleted()
+    
+    monkeypatch.setattr(subprocess, 'run', fake_run)
+    return calls
+
+
+def test_selection_addresses_torrent_by_info_hash(config, tmp_path, commands, monkeypatch):
+    """Test that files are selected on the added torrent's hash, without listing or waiting"""
+    monkeypatch.setattr('time.sleep', lambda seconds: pytest.fail("no sleeping expected"))
+    info = {b'name': b'Queen', b'piece length': 16384, b'pieces': b'\x00' * 20,
+            b'files': [{b'path': [b'01 - Death on Two Legs.flac'], b'length': 100},
+                       {b'path': [b'11 - Bohemian Rhapsody.flac'], b'length': 100}]}
+    torrent_file = tmp_path / 'album.torrent'
+    torrent_file.write_bytes(bencodepy.encode({b'info': info}))
+    client = TransmissionClient(config)
+    info_hash = client.torrent_analyzer.get_info_hash(str(torrent_file))
+    
+    added = client.add_torrent_for_tracks(str(torrent_file), [{'name': 'Bohemian Rhapsody', 'artist': 'Queen'}])
+    
+    assert added
+    assert commands[1][:2] == ['transmission-remote', '-a']
+    assert commands[2] == ['transmission-remote', '-t', info_hash, '--no-get', 'all']
+    assert commands[3] == ['transmission-remote', '-t', info_hash, '--get', '1', '--priority-high', '1']
+    assert not any('-l' in cmd for cmd in commands)
\ No newline at end of file